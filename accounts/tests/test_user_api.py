@@ -1,9 +1,16 @@
-from django.test import TestCase
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from accounts.throttles import LoginEmailRateThrottle, LoginIPRateThrottle
+from core.deletion import get_deletion_progress
+from core.hashers import HashingUnavailable
+
 CREATE_USER_URL = reverse("accounts:create")
 CREATE_TOKEN_URL = reverse("accounts:token")
 ME_URL = reverse("accounts:me")
@@ -85,6 +92,71 @@ class PublicUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class LoginThrottleTests(TestCase):
+    """Test the throttling of sign-ins and signups"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        create_user(email="example@email.com", password="password123")
+
+    def test_email_throttled(self):
+        """Test that floods of sign-ins to one account are rejected unhashed"""
+        payload = {"email": "example@email.com", "password": "wrongpass"}
+        with patch.object(
+            LoginEmailRateThrottle, "THROTTLE_RATES", {"login_email": "2/min"}
+        ):
+            for _ in range(2):
+                self.client.post(CREATE_TOKEN_URL, payload)
+
+            with patch("core.hashers.get_pool") as get_pool:
+                res = self.client.post(CREATE_TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        get_pool.assert_not_called()
+
+    def test_email_throttle_ignores_case(self):
+        """Test that the email throttle counts addresses in any case"""
+        with patch.object(
+            LoginEmailRateThrottle, "THROTTLE_RATES", {"login_email": "1/min"}
+        ):
+            self.client.post(
+                CREATE_TOKEN_URL, {"email": "example@email.com", "password": "x"}
+            )
+            res = self.client.post(
+                CREATE_TOKEN_URL, {"email": "EXAMPLE@email.com", "password": "x"}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_ip_throttled(self):
+        """Test that floods from one address are rejected across accounts"""
+        with patch.object(LoginIPRateThrottle, "THROTTLE_RATES", {"login_ip": "2/min"}):
+            for i in range(2):
+                self.client.post(
+                    CREATE_TOKEN_URL, {"email": f"user{i}@email.com", "password": "x"}
+                )
+            token = self.client.post(
+                CREATE_TOKEN_URL, {"email": "other@email.com", "password": "x"}
+            )
+            signup = self.client.post(
+                CREATE_USER_URL, {"email": "new@email.com", "password": "password123"}
+            )
+
+        self.assertEqual(token.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(signup.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_hashing_unavailable(self):
+        """Test that sign-ins fail fast while the hashing pool is full"""
+        payload = {"email": "example@email.com", "password": "password123"}
+        with patch("core.hashers.get_pool") as get_pool:
+            get_pool.return_value.run.side_effect = HashingUnavailable()
+            res = self.client.post(CREATE_TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
 class PrivateUserApiTests(TestCase):
     """Tests for private user APIs that require authentication"""
 
@@ -115,3 +187,21 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["name"], payload["name"])
         self.assertTrue(self.user.check_password(payload["password"]))
+
+    @override_settings(ACCOUNT_DELETION_WORKERS=0)
+    def test_delete_account(self):
+        """Test that deleting the account deactivates and then deletes it"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            res = self.client.delete(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertIsNotNone(self.user.deletion_updated_at)
+        self.assertEqual(get_deletion_progress(self.user.pk), {"status": "pending"})
+
+        for callback in callbacks:
+            callback()
+
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertEqual(get_deletion_progress(self.user.pk)["status"], "done")
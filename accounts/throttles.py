@@ -0,0 +1,31 @@
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginIPRateThrottle(SimpleRateThrottle):
+    """Limits the sign-ins and signups of a client address"""
+
+    scope = "login_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class LoginEmailRateThrottle(SimpleRateThrottle):
+    """Limits the sign-ins to an account, from any address"""
+
+    scope = "login_email"
+
+    def get_cache_key(self, request, view):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+
+        # Hashed, so cache keys neither leak addresses nor exceed key limits
+        digest = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+
+        return self.cache_format % {"scope": self.scope, "ident": digest}
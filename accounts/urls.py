@@ -6,5 +6,6 @@ app_name = "accounts"
 urlpatterns = [
     path("create/", views.UserCreateView.as_view(), name="create"),
     path("token/", views.TokenCreateView.as_view(), name="token"),
+    path("token/refresh/", views.TokenRefreshView.as_view(), name="token-refresh"),
     path("me/", views.ManageUserView.as_view(), name="me"),
 ]
@@ -1,25 +1,68 @@
 from re import L
-from rest_framework.generics import CreateAPIView, RetrieveUpdateAPIView
+from rest_framework.generics import CreateAPIView, RetrieveUpdateDestroyAPIView
+from rest_framework.response import Response
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.settings import api_settings
-from rest_framework import authentication, permissions
+from rest_framework.views import APIView
+from rest_framework import permissions, status
+
+from core.authentication import CachedTokenAuthentication
+from core.deletion import schedule_user_deletion
+from core.models import AuthToken
+from core.replicas import ReplicaReadMixin
 
 from .serializers import UserSerializer, AuthTokenSerializer
+from .throttles import LoginEmailRateThrottle, LoginIPRateThrottle
+
+
+def token_payload(token):
+    return {"token": token.key, "expires_at": token.expires_at}
 
 
 class UserCreateView(CreateAPIView):
     serializer_class = UserSerializer
+    throttle_classes = (LoginIPRateThrottle,)
 
 
 class TokenCreateView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    # Checked before the serializer, so throttled requests never hash
+    throttle_classes = (LoginIPRateThrottle, LoginEmailRateThrottle)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        token = AuthToken.objects.issue(serializer.validated_data["user"])
 
+        return Response(token_payload(token))
 
-class ManageUserView(RetrieveUpdateAPIView):
+
+class TokenRefreshView(APIView):
+    """Exchange the token authenticating the request for a new one"""
+
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        token = AuthToken.objects.rotate(request.auth)
+        if token is None:
+            raise AuthenticationFailed("Token was already rotated.")
+
+        return Response(token_payload(token))
+
+
+class ManageUserView(ReplicaReadMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
         return self.request.user
+
+    def destroy(self, request, *args, **kwargs):
+        """Deactivate the account at once and delete it in the background"""
+        schedule_user_deletion(self.get_object())
+
+        return Response(status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,5 @@
+"""Performance harness for the recipe and accounts APIs
+
+Run with `python -m benchmarks run` and compare two result files with
+`python -m benchmarks compare baseline.json results.json`.
+"""
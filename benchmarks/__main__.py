@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+import sys
+
+import django
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmark scenarios")
+    run_parser.add_argument("--scenario", action="append", dest="scenarios")
+    run_parser.add_argument("--iterations", type=int, default=50)
+    run_parser.add_argument("--recipes", type=int, default=1000)
+    run_parser.add_argument("--tags", type=int, default=20)
+    run_parser.add_argument("--ingredients", type=int, default=50)
+    run_parser.add_argument("--tags-per-recipe", type=int, default=3)
+    run_parser.add_argument("--ingredients-per-recipe", type=int, default=5)
+    run_parser.add_argument("--output", help="Write results to this JSON file")
+    run_parser.add_argument("--baseline", help="Fail on regressions against it")
+    run_parser.add_argument("--threshold", type=float, default=0.2)
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    django.setup()
+    from benchmarks import runner
+
+    if args.command == "run":
+        results = runner.run(
+            scenarios=args.scenarios or runner.DEFAULT_SCENARIOS,
+            iterations=args.iterations,
+            recipes=args.recipes,
+            tags=args.tags,
+            ingredients=args.ingredients,
+            tags_per_recipe=args.tags_per_recipe,
+            ingredients_per_recipe=args.ingredients_per_recipe,
+        )
+        if args.output:
+            runner.dump(results, args.output)
+        print(json.dumps(results["scenarios"], indent=2))
+        baseline = runner.load(args.baseline) if args.baseline else None
+    else:
+        results = runner.load(args.current)
+        baseline = runner.load(args.baseline)
+
+    if baseline is None:
+        return 0
+
+    regressions = runner.compare(baseline, results, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+
+from core.models import AuthToken
+from recipe.bulk import write_related
+from recipe.models import Ingredient, Recipe, Tag
+
+BATCH_SIZE = 1000
+
+
+def create_catalogue(
+    user, recipes, tags=20, ingredients=50, tags_per_recipe=3, ingredients_per_recipe=5
+):
+    """Bulk create `recipes` recipes for `user` over fresh tags and ingredients
+
+    Each recipe is linked to `tags_per_recipe` tags and
+    `ingredients_per_recipe` ingredients, spread evenly over the pools.
+    """
+    offset = Recipe.objects.filter(user=user).count()
+    tag_pool = Tag.objects.bulk_create(
+        [Tag(user=user, name=f"tag{offset}-{i}") for i in range(tags)],
+        batch_size=BATCH_SIZE,
+    )
+    ingredient_pool = Ingredient.objects.bulk_create(
+        [
+            Ingredient(user=user, name=f"ingredient{offset}-{i}")
+            for i in range(ingredients)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    created = Recipe.objects.bulk_create(
+        [
+            Recipe(
+                user=user,
+                title=f"recipe{offset + i}",
+                time_minutes=5 + i % 90,
+                price=f"{1 + i % 50}.50",
+            )
+            for i in range(recipes)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    write_related(
+        [
+            (
+                recipe,
+                {
+                    "tags": _spread(tag_pool, i, tags_per_recipe),
+                    "ingredients": _spread(ingredient_pool, i, ingredients_per_recipe),
+                },
+            )
+            for i, recipe in enumerate(created)
+        ]
+    )
+
+    return created
+
+
+def _spread(pool, index, count):
+    if not pool:
+        return []
+
+    return [pool[(index + n) % len(pool)].id for n in range(min(count, len(pool)))]
+
+
+def create_user(email="benchmark@example.com", password="benchmark", **catalogue):
+    """Create a user with a token and a catalogue sized by `catalogue`"""
+    user = get_user_model().objects.create_user(email, password)
+    token = AuthToken.objects.issue(user)
+    create_catalogue(user, **catalogue)
+
+    return user, token
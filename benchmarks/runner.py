@@ -0,0 +1,90 @@
+import json
+import platform
+
+import django
+from django.core.management import call_command
+from django.db import connection
+
+from benchmarks.generators import create_user
+from benchmarks.scenarios import SCENARIOS, Context, run_scenario
+
+DEFAULT_SCENARIOS = tuple(SCENARIOS)
+
+
+def run(
+    scenarios=DEFAULT_SCENARIOS,
+    iterations=50,
+    recipes=1000,
+    tags=20,
+    ingredients=50,
+    tags_per_recipe=3,
+    ingredients_per_recipe=5,
+    migrate=True,
+):
+    """Build a synthetic catalogue and time each scenario against it"""
+    if migrate:
+        call_command("migrate", verbosity=0, interactive=False)
+
+    config = {
+        "iterations": iterations,
+        "recipes": recipes,
+        "tags": tags,
+        "ingredients": ingredients,
+        "tags_per_recipe": tags_per_recipe,
+        "ingredients_per_recipe": ingredients_per_recipe,
+    }
+    user, token = create_user(
+        recipes=recipes,
+        tags=tags,
+        ingredients=ingredients,
+        tags_per_recipe=tags_per_recipe,
+        ingredients_per_recipe=ingredients_per_recipe,
+    )
+    context = Context(user, token)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+        },
+        "config": config,
+        "scenarios": {
+            name: run_scenario(name, context, iterations) for name in scenarios
+        },
+    }
+
+
+def compare(baseline, current, threshold=0.2):
+    """Return the regressions of `current` against `baseline`
+
+    A scenario regresses when its p50 or p99 latency grows by more than
+    `threshold` or when it runs more queries.
+    """
+    regressions = []
+    for name, result in current["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        if result["queries"] > base["queries"]:
+            regressions.append(
+                f"{name}: queries {base['queries']} -> {result['queries']}"
+            )
+        for metric in ("p50_ms", "p99_ms"):
+            if result[metric] > base[metric] * (1 + threshold):
+                regressions.append(
+                    f"{name}: {metric} {base[metric]:.3f} -> {result[metric]:.3f}"
+                )
+
+    return regressions
+
+
+def load(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def dump(results, path):
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+        file.write("\n")
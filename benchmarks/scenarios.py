@@ -0,0 +1,170 @@
+import asyncio
+import time
+import tracemalloc
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.authentication import token_cache
+from recipe.models import Ingredient, Recipe, Tag
+
+SCENARIOS = {}
+
+# Requests in flight at once in the concurrent scenarios
+CONCURRENCY = 10
+
+
+def scenario(name, clear_caches=True):
+    """Register a benchmark; it returns the request to time for a context"""
+
+    def register(func):
+        SCENARIOS[name] = (func, clear_caches)
+        return func
+
+    return register
+
+
+class Context:
+    def __init__(self, user, token):
+        self.user = user
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        self.async_client = AsyncClient()
+        self.headers = {"Authorization": f"Token {token.key}"}
+        self.recipe = Recipe.objects.filter(user=user).order_by("id").first()
+        self.tag_ids = list(
+            Tag.objects.filter(user=user).values_list("id", flat=True)[:3]
+        )
+        self.ingredient_ids = list(
+            Ingredient.objects.filter(user=user).values_list("id", flat=True)[:5]
+        )
+
+    def recipe_payload(self, index=0):
+        return {
+            "title": f"benchmark{index}",
+            "time_minutes": 10,
+            "price": "9.99",
+            "tags": self.tag_ids,
+            "ingredients": self.ingredient_ids,
+        }
+
+
+@scenario("list")
+def list_recipes(context):
+    return lambda: context.client.get(reverse("recipe:recipe-list"), {"page_size": 100})
+
+
+@scenario("list_cached", clear_caches=False)
+def list_recipes_cached(context):
+    return list_recipes(context)
+
+
+@scenario("list_concurrent")
+def list_recipes_concurrent(context):
+    url = reverse("recipe:recipe-list")
+
+    async def batch():
+        responses = await asyncio.gather(
+            *(
+                context.async_client.get(
+                    url, {"page_size": 100}, headers=context.headers
+                )
+                for _ in range(CONCURRENCY)
+            )
+        )
+        return max(responses, key=lambda response: response.status_code)
+
+    return async_to_sync(batch)
+
+
+@scenario("retrieve")
+def retrieve_recipe(context):
+    url = reverse("recipe:recipe-detail", args=[context.recipe.id])
+
+    return lambda: context.client.get(url)
+
+
+@scenario("create")
+def create_recipe(context):
+    url = reverse("recipe:recipe-list")
+
+    return lambda: context.client.post(url, context.recipe_payload(), format="json")
+
+
+@scenario("bulk_create")
+def bulk_create_recipes(context):
+    url = reverse("recipe:recipe-bulk")
+    payload = [context.recipe_payload(index) for index in range(100)]
+
+    return lambda: context.client.post(url, payload, format="json")
+
+
+@scenario("token_auth")
+def token_auth(context):
+    url = reverse("accounts:me")
+
+    return lambda: context.client.get(url)
+
+
+@scenario("token_auth_cached", clear_caches=False)
+def token_auth_cached(context):
+    return token_auth(context)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of `values`"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+
+    return ordered[index]
+
+
+def run_scenario(name, context, iterations):
+    """Time `iterations` requests of a scenario
+
+    Query counts come from the last timed request and peak memory from
+    one extra request traced separately, so tracing doesn't skew latency.
+    """
+    func, clear_caches = SCENARIOS[name]
+    request = func(context)
+
+    def call():
+        if clear_caches:
+            cache.clear()
+            token_cache.clear()
+        response = request()
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name} failed with {response.status_code}")
+
+    call()
+    latencies = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - started_at) * 1000)
+
+    with CaptureQueriesContext(connection) as captured:
+        call()
+    # The captured slice reads the live query log, count it before it resets
+    queries = len(captured)
+
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "queries": queries,
+        "p50_ms": round(percentile(latencies, 0.5), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
@@ -0,0 +1,18 @@
+"""Settings for running benchmarks locally against SQLite"""
+
+import os
+
+from recipe_app_api.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ["testserver"]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("BENCHMARK_DB", ":memory:"),
+    }
+}
+
+# Keep per-request log lines out of benchmark output
+LOGGING["loggers"]["core.instrumentation"]["level"] = "WARNING"  # noqa: F405
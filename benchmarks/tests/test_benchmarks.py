@@ -0,0 +1,48 @@
+from django.test import TestCase
+
+from benchmarks import runner
+from recipe.models import Recipe
+
+
+class BenchmarkRunnerTests(TestCase):
+    """Test the benchmark runner on a tiny catalogue"""
+
+    def test_run_records_metrics(self):
+        """Test that every scenario records queries, latency and memory"""
+        results = runner.run(iterations=2, recipes=5, migrate=False)
+
+        self.assertEqual(set(results["scenarios"]), set(runner.DEFAULT_SCENARIOS))
+        for result in results["scenarios"].values():
+            self.assertEqual(
+                set(result),
+                {
+                    "iterations",
+                    "queries",
+                    "p50_ms",
+                    "p99_ms",
+                    "mean_ms",
+                    "peak_memory_kb",
+                },
+            )
+        self.assertEqual(results["scenarios"]["list_cached"]["queries"], 0)
+        self.assertGreaterEqual(Recipe.objects.count(), 5)
+
+    def test_compare_flags_regressions(self):
+        """Test that slower or chattier scenarios are reported"""
+        baseline = {
+            "scenarios": {
+                "list": {"queries": 3, "p50_ms": 10.0, "p99_ms": 20.0},
+                "retrieve": {"queries": 3, "p50_ms": 5.0, "p99_ms": 8.0},
+            }
+        }
+        current = {
+            "scenarios": {
+                "list": {"queries": 4, "p50_ms": 11.0, "p99_ms": 30.0},
+                "retrieve": {"queries": 3, "p50_ms": 5.5, "p99_ms": 8.0},
+            }
+        }
+
+        regressions = runner.compare(baseline, current, threshold=0.2)
+
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(item.startswith("list:") for item in regressions))
@@ -0,0 +1,182 @@
+import copy
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+
+from core.instrumentation import phase
+from core.models import AuthToken
+
+
+class TokenCache:
+    """Bounded in-process LRU of token key -> token, with a TTL per entry.
+
+    The cache lives in each worker process. Signal handlers evict entries
+    as soon as a token or its user changes locally; the TTL bounds how long
+    other processes may keep serving a stale entry.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._keys_by_user = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, token = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+
+        return token
+
+    def set(self, key, token):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, token)
+            self._keys_by_user[token.user_id].add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def evict(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def evict_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[1].user_id
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+
+token_cache = TokenCache(
+    maxsize=getattr(settings, "TOKEN_CACHE_MAXSIZE", 10000),
+    ttl=getattr(settings, "TOKEN_CACHE_TTL", 60),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Expiring token authentication resolving tokens through `token_cache`
+
+    Entries are keyed by the token's digest, which is what signal handlers
+    know when they evict them.
+    """
+
+    model = AuthToken
+
+    def authenticate(self, request):
+        with phase("auth"):
+            return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        digest = self.get_model().digest_key(key)
+        token = token_cache.get(digest)
+        if token is None:
+            token = (
+                self.get_model()
+                .objects.select_related("user")
+                .filter(digest=digest)
+                .first()
+            )
+            self._check(token)
+            token_cache.set(digest, token)
+
+        return self._copies(self._check_expiry(token, digest))
+
+    async def aauthenticate(self, request):
+        """Async variant of `authenticate` for the async views"""
+        with phase("auth"):
+            key = self.get_key(request)
+            if key is None:
+                return None
+
+            digest = self.get_model().digest_key(key)
+            token = token_cache.get(digest)
+            if token is None:
+                token = (
+                    await self.get_model()
+                    .objects.select_related("user")
+                    .filter(digest=digest)
+                    .afirst()
+                )
+                self._check(token)
+                token_cache.set(digest, token)
+
+            return self._copies(self._check_expiry(token, digest))
+
+    def _check(self, token):
+        if token is None:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+    def _check_expiry(self, token, digest):
+        if token.is_expired:
+            token_cache.evict(digest)
+            raise exceptions.AuthenticationFailed(_("Token has expired."))
+
+        return token
+
+    def get_key(self, request):
+        """Return the token key of the `Authorization` header, as `authenticate`"""
+        auth = get_authorization_header(request).split()
+
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) == 1:
+            msg = _("Invalid token header. No credentials provided.")
+            raise exceptions.AuthenticationFailed(msg)
+        elif len(auth) > 2:
+            msg = _("Invalid token header. Token string should not contain spaces.")
+            raise exceptions.AuthenticationFailed(msg)
+
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            msg = _(
+                "Invalid token header. "
+                "Token string should not contain invalid characters."
+            )
+            raise exceptions.AuthenticationFailed(msg)
+
+    def _copies(self, token):
+        # Hand out copies so a request mutating its user can't leak into
+        # other requests sharing the cached instance
+        user = copy.copy(token.user)
+        token = copy.copy(token)
+        token.user = user
+
+        return (user, token)
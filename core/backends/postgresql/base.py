@@ -0,0 +1,88 @@
+"""PostgreSQL backend checking connections out of a process-wide pool
+
+Enabled by setting `ENGINE` to `core.backends.postgresql` and passing the
+`ConnectionPool` arguments as `OPTIONS["pool"]`. Django's own connection
+handling is unchanged: opening a connection checks one out of the pool and
+closing it, e.g. at the end of each request, returns it. Use it with
+`CONN_MAX_AGE = 0` so connections go back to the pool after every request.
+"""
+
+from functools import partial
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from core.backends.postgresql.creation import DatabaseCreation
+from core.instrumentation import phase
+from core.pool import get_pool
+
+# libpq transaction states, shared by psycopg2 and psycopg 3
+TRANSACTION_STATUS_IDLE = 0
+TRANSACTION_STATUS_UNKNOWN = 4
+
+
+def is_usable(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+    return True
+
+
+def reset(connection):
+    """Roll back whatever a returned connection left open"""
+    if connection.closed:
+        return False
+
+    status = connection.info.transaction_status
+    if status == TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    @property
+    def pool(self):
+        settings_dict = self.settings_dict
+        key = (
+            self.alias,
+            settings_dict["NAME"],
+            settings_dict["HOST"],
+            settings_dict["PORT"],
+            settings_dict["USER"],
+        )
+        options = settings_dict["OPTIONS"].get("pool") or {}
+
+        return get_pool(key, is_usable=is_usable, reset=reset, **options)
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        connect = partial(super().get_new_connection, conn_params)
+        with phase("db_pool"):
+            connection = self.pool.getconn(connect)
+
+        # Set by `get_new_connection()` on new connections only, pooled
+        # ones already carry the isolation level of the same OPTIONS
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", IsolationLevel.READ_COMMITTED
+            )
+        )
+
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # Errors since the last commit may have broken the connection
+                discard = self.errors_occurred and not self.is_usable()
+                return self.pool.putconn(self.connection, discard=discard)
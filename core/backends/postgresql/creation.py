@@ -0,0 +1,13 @@
+from django.db.backends.postgresql import creation
+
+from core.pool import pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would keep the test database in use
+        for key, pool in list(pools.items()):
+            if key[:2] == (self.connection.alias, test_database_name):
+                pool.close_all()
+
+        super()._destroy_test_db(test_database_name, verbosity)
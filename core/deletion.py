@@ -0,0 +1,214 @@
+"""Deletion of users and everything cascading from them, in chunks
+
+`Model.delete()` collects every dependent row into memory and deletes them
+in one transaction, which for users with large catalogues takes too long
+and holds locks on all of it. `delete_user` instead walks the `CASCADE`
+relations pointing at the user and deletes their rows with set-based
+`DELETE ... WHERE pk IN (...)` statements, a chunk of rows per short
+transaction, dependents before the rows they point at.
+
+Rows are deleted without `pre_delete`/`post_delete` signals. Apps keeping
+state derived from deleted rows handle `pre_chunk_delete` instead, sent
+with the primary keys of each chunk before it or its dependents are deleted.
+
+Deletions outlive the request asking for them, on a pool of worker threads.
+`User.deletion_updated_at` is stamped when one is requested and after every
+chunk, and the user row goes last, so a deletion cut short by a restart or
+a failure leaves an inactive user whose stamp stops moving. Deleting again
+is safe, `manage.py delete_account --resume` finishes the deletions that
+made no progress for `ACCOUNT_DELETION_STALLED_AFTER` seconds and is meant
+to run after deploys or periodically.
+"""
+
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.dispatch import Signal
+from django.utils import timezone
+
+from core.workers import get_executor, run_in_worker
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = getattr(settings, "ACCOUNT_DELETION_CHUNK_SIZE", 1000)
+PROGRESS_TIMEOUT = 24 * 60 * 60
+# Deletions without progress for this long are presumed cut short
+STALLED_AFTER = getattr(settings, "ACCOUNT_DELETION_STALLED_AFTER", 60 * 60)
+
+# Sent with `sender=model, pks=[...], using=alias` before rows are deleted
+pre_chunk_delete = Signal()
+
+
+def _progress_key(user_id):
+    return f"core:account-deletion:{user_id}"
+
+
+def get_deletion_progress(user_id):
+    """Return the progress of a user's deletion, `None` if none was started"""
+    return cache.get(_progress_key(user_id))
+
+
+class ChunkedDeleter:
+    """Deletes rows and their dependents in chunks of `chunk_size` rows
+
+    `progress(deleted)` is called after every chunk with the number of rows
+    deleted so far by model label.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, chunk_size=CHUNK_SIZE, progress=None):
+        self.using = using
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.deleted = Counter()
+
+    def delete_dependents(self, model, pks):
+        """Delete the rows cascading from the `pks` of `model`, chunk by chunk
+
+        Relations other than `CASCADE` are left to `Model.delete()`.
+        """
+        for relation in self._cascades(model):
+            related_model = relation.related_model
+            queryset = self._filter(related_model, relation.field.name, pks)
+            while True:
+                chunk = list(
+                    queryset.order_by("pk").values_list("pk", flat=True)[
+                        : self.chunk_size
+                    ]
+                )
+                if not chunk:
+                    break
+                with transaction.atomic(using=self.using):
+                    self._delete_chunk(related_model, chunk)
+                if self.progress:
+                    self.progress(dict(self.deleted))
+
+    def _cascades(self, model):
+        return [
+            relation
+            for relation in get_candidate_relations_to_delete(model._meta)
+            if relation.field.remote_field.on_delete is models.CASCADE
+        ]
+
+    def _filter(self, model, field, pks):
+        return model._base_manager.using(self.using).filter(**{f"{field}__in": pks})
+
+    def _delete_chunk(self, model, pks):
+        pre_chunk_delete.send(sender=model, pks=pks, using=self.using)
+        # Within a chunk, dependents are few enough to delete in one go
+        for relation in get_candidate_relations_to_delete(model._meta):
+            related_model, field = relation.related_model, relation.field
+            dependents = self._filter(related_model, field.name, pks)
+            on_delete = field.remote_field.on_delete
+            if on_delete is models.SET_NULL:
+                dependents.update(**{field.name: None})
+            elif on_delete is models.CASCADE and self._cascades(related_model):
+                dependent_pks = list(dependents.values_list("pk", flat=True))
+                if dependent_pks:
+                    self._delete_chunk(related_model, dependent_pks)
+            elif on_delete is models.CASCADE:
+                self.deleted[related_model._meta.label] += dependents._raw_delete(
+                    self.using
+                )
+            # PROTECT and RESTRICT fail on the foreign key, as they should
+
+        queryset = self._filter(model, "pk", pks)
+        self.deleted[model._meta.label] += queryset._raw_delete(self.using)
+
+
+def delete_user(user_id, using=DEFAULT_DB_ALIAS, chunk_size=CHUNK_SIZE, progress=None):
+    """Delete a user and everything cascading from it, return counts by model
+
+    The user is deactivated first, so it can't sign in while its rows are
+    deleted, and the user row itself goes last.
+    """
+    User = get_user_model()
+    user = User._base_manager.using(using).filter(pk=user_id).first()
+    if user is None:
+        return {}
+    if user.is_active:
+        user.is_active = False
+        user.save(using=using, update_fields=["is_active"])
+
+    deleter = ChunkedDeleter(using, chunk_size, progress)
+    deleter.delete_dependents(User, [user_id])
+    _, counts = user.delete(using=using)
+
+    deleted = Counter(deleter.deleted)
+    deleted.update({label: count for label, count in counts.items() if count})
+
+    return dict(deleted)
+
+
+def _mark_deleting(user_id):
+    get_user_model()._base_manager.filter(pk=user_id).update(
+        deletion_updated_at=timezone.now()
+    )
+
+
+def run_user_deletion(user_id, chunk_size=CHUNK_SIZE, progress=None):
+    """Delete a user, recording its progress for `get_deletion_progress`
+
+    Also resumes a deletion that was cut short, see `stalled_user_deletions`.
+    """
+    key = _progress_key(user_id)
+
+    def report(deleted):
+        _mark_deleting(user_id)
+        cache.set(key, {"status": "running", "deleted": deleted}, PROGRESS_TIMEOUT)
+        logger.info("deleting user %s: %s", user_id, deleted)
+        if progress:
+            progress(deleted)
+
+    _mark_deleting(user_id)
+    try:
+        deleted = delete_user(user_id, chunk_size=chunk_size, progress=report)
+    except Exception:
+        logger.exception("failed to delete user %s", user_id)
+        cache.set(key, {"status": "failed"}, PROGRESS_TIMEOUT)
+        raise
+    cache.set(key, {"status": "done", "deleted": deleted}, PROGRESS_TIMEOUT)
+
+    return deleted
+
+
+def stalled_user_deletions():
+    """Return the ids of users whose deletion made no progress for a while
+
+    These were cut short or failed, their users are inactive and partly
+    deleted until `run_user_deletion` is run for them again.
+    """
+    stalled_since = timezone.now() - timedelta(seconds=STALLED_AFTER)
+
+    return list(
+        get_user_model()
+        ._base_manager.filter(deletion_updated_at__lt=stalled_since)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def schedule_user_deletion(user):
+    """Deactivate a user and delete it in the background once committed
+
+    With `ACCOUNT_DELETION_WORKERS = 0` it is deleted in the calling thread.
+    """
+    user.is_active = False
+    user.deletion_updated_at = timezone.now()
+    user.save(update_fields=["is_active", "deletion_updated_at"])
+    cache.set(_progress_key(user.pk), {"status": "pending"}, PROGRESS_TIMEOUT)
+
+    user_id = user.pk
+    if settings.ACCOUNT_DELETION_WORKERS:
+        transaction.on_commit(
+            lambda: get_executor(
+                "account-deletion", settings.ACCOUNT_DELETION_WORKERS
+            ).submit(run_in_worker, run_user_deletion, user_id)
+        )
+    else:
+        transaction.on_commit(lambda: run_user_deletion(user_id))
@@ -0,0 +1,105 @@
+"""Password hashers running on a bounded pool of hashing threads
+
+Hashing is deliberately slow, and under bursts of logins and signups it
+would occupy every worker. The hashers here compute hashes on at most
+`PASSWORD_HASHING_WORKERS` threads, as argon2 and hashlib release the GIL
+while they work. Up to `PASSWORD_HASHING_QUEUE` more callers may wait for
+a thread. Callers beyond that, or whose hash isn't done within
+`PASSWORD_HASHING_TIMEOUT` seconds, get `HashingUnavailable` (503) instead
+of piling up.
+
+Django's `check_password()` re-encodes hashes whose algorithm isn't the
+first of `PASSWORD_HASHERS` or whose parameters are out of date, so legacy
+PBKDF2 hashes are upgraded to Argon2 as users sign in.
+"""
+
+import threading
+import time
+from concurrent import futures
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.instrumentation import phase
+
+
+class HashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _("Too many sign-ins in progress, try again shortly.")
+    default_code = "hashing_unavailable"
+
+
+class HashingPool:
+    """Runs hashing functions on `workers` threads, `queue` more may wait"""
+
+    def __init__(self, workers, queue, timeout):
+        self.timeout = timeout
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hashing"
+        )
+        self._slots = threading.BoundedSemaphore(workers + queue)
+
+    def run(self, func, *args):
+        deadline = time.monotonic() + self.timeout
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HashingUnavailable()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the hash is done, even if its caller gave up
+        future.add_done_callback(lambda future: self._slots.release())
+
+        with phase("hashing"):
+            try:
+                return future.result(timeout=max(deadline - time.monotonic(), 0))
+            except futures.TimeoutError:
+                # Dropped unless it started already
+                future.cancel()
+                raise HashingUnavailable()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide hashing pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    workers=settings.PASSWORD_HASHING_WORKERS,
+                    queue=settings.PASSWORD_HASHING_QUEUE,
+                    timeout=settings.PASSWORD_HASHING_TIMEOUT,
+                )
+
+    return _pool
+
+
+class PooledHasherMixin:
+    def encode(self, password, salt, *args):
+        return get_pool().run(super().encode, password, salt, *args)
+
+    def verify(self, password, encoded):
+        return get_pool().run(super().verify, password, encoded)
+
+    def harden_runtime(self, password, encoded):
+        return get_pool().run(super().harden_runtime, password, encoded)
+
+
+class PooledArgon2PasswordHasher(PooledHasherMixin, Argon2PasswordHasher):
+    """Argon2 with the cost parameters of `PASSWORD_ARGON2_*` settings"""
+
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class PooledPBKDF2PasswordHasher(PooledHasherMixin, PBKDF2PasswordHasher):
+    """PBKDF2, which hashed the passwords stored before Argon2 was adopted"""
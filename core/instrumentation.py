@@ -0,0 +1,184 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from core.pool import pools
+
+logger = logging.getLogger(__name__)
+
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class RequestMetrics:
+    """Query and phase timings collected for one sampled request"""
+
+    def __init__(self, slow_query_ms):
+        self.slow_query_ms = slow_query_ms
+        self.queries = 0
+        self.db_time = 0.0
+        self.phases = {}
+        self.view_started_at = None
+
+    def add_phase(self, name, duration):
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper timing every query"""
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started_at
+            self.queries += 1
+            self.db_time += duration
+            if duration * 1000 >= self.slow_query_ms:
+                logger.warning(
+                    "slow query %.1fms on %s: %s",
+                    duration * 1000,
+                    context["connection"].alias,
+                    sql,
+                )
+
+    def server_timing(self):
+        entries = [f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"']
+        entries += [
+            f"{name};dur={duration * 1000:.1f}"
+            for name, duration in self.phases.items()
+        ]
+
+        return ", ".join(entries)
+
+    def as_dict(self):
+        return {
+            "queries": self.queries,
+            "db_ms": round(self.db_time * 1000, 3),
+            **{
+                f"{name}_ms": round(duration * 1000, 3)
+                for name, duration in self.phases.items()
+            },
+        }
+
+
+@contextmanager
+def phase(name):
+    """Time a block as a phase of the current request, if it is sampled"""
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_phase(name, time.perf_counter() - started_at)
+
+
+class RequestInstrumentationMiddleware:
+    """Reports per-request query, auth, view and render timings
+
+    A share of requests set by `INSTRUMENTATION_SAMPLE_RATE` is measured and
+    gets a `Server-Timing` header plus one structured log line. Queries
+    slower than `INSTRUMENTATION_SLOW_QUERY_MS` are logged with their SQL.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "INSTRUMENTATION_SAMPLE_RATE", 0.01)
+        self.slow_query_ms = getattr(settings, "INSTRUMENTATION_SLOW_QUERY_MS", 100)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        metrics = RequestMetrics(self.slow_query_ms)
+        token = current_metrics.set(metrics)
+        started_at = time.perf_counter()
+        try:
+            with self.wrap_connections(metrics):
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+
+        return self.report(request, response, metrics, started_at)
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics(self.slow_query_ms)
+        token = current_metrics.set(metrics)
+        started_at = time.perf_counter()
+        try:
+            # Connections are per thread, so the wrappers go on the ones of
+            # the thread running this request's ORM calls
+            wrappers = await sync_to_async(self.wrap_connections)(metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(wrappers.close)()
+        finally:
+            current_metrics.reset(token)
+
+        return self.report(request, response, metrics, started_at)
+
+    def wrap_connections(self, metrics):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+
+        return stack
+
+    def report(self, request, response, metrics, started_at):
+        if metrics.view_started_at is not None and "view" not in metrics.phases:
+            metrics.add_phase("view", time.perf_counter() - metrics.view_started_at)
+        metrics.add_phase("total", time.perf_counter() - started_at)
+
+        response["Server-Timing"] = metrics.server_timing()
+        entry = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            **metrics.as_dict(),
+        }
+        if pools:
+            entry["db_pools"] = {key[0]: pool.stats() for key, pool in pools.items()}
+        logger.info(json.dumps(entry))
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics.view_started_at = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        metrics = current_metrics.get()
+        if metrics is None or metrics.view_started_at is None:
+            return response
+
+        # DRF responses are rendered after the view returns
+        render_started_at = time.perf_counter()
+        metrics.add_phase("view", render_started_at - metrics.view_started_at)
+        response.add_post_render_callback(
+            lambda response: metrics.add_phase(
+                "render", time.perf_counter() - render_started_at
+            )
+        )
+
+        return response
@@ -0,0 +1,63 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.deletion import CHUNK_SIZE, run_user_deletion, stalled_user_deletions
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete a user and everything it owns in chunks, reporting progress. "
+        "Also finishes a deletion that was cut short, --resume finishes all "
+        "of them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("email", nargs="?", help="Email of the user to delete")
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Finish the deletions that stopped making progress",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options["resume"] == bool(options["email"]):
+            raise CommandError("Give either the email of a user or --resume")
+
+        if options["resume"]:
+            user_ids = stalled_user_deletions()
+            if not user_ids:
+                self.stdout.write("No deletions to resume")
+        else:
+            try:
+                user = get_user_model().objects.get(email=options["email"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User {options['email']} does not exist")
+            user_ids = [user.pk]
+
+        for user_id in user_ids:
+            self.delete(user_id, options["chunk_size"])
+
+    def delete(self, user_id, chunk_size):
+        started_at = time.monotonic()
+        deleted = run_user_deletion(
+            user_id, chunk_size=chunk_size, progress=self.report
+        )
+
+        elapsed = time.monotonic() - started_at
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted user {user_id}: {sum(deleted.values())} rows in "
+                f"{elapsed:.1f}s ({self.describe(deleted)})"
+            )
+        )
+
+    def report(self, deleted):
+        self.stdout.write(
+            f"{sum(deleted.values())} rows deleted ({self.describe(deleted)})"
+        )
+
+    def describe(self, deleted):
+        return ", ".join(f"{count} {label}" for label, count in sorted(deleted.items()))
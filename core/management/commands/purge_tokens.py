@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.models import AuthToken
+
+
+class Command(BaseCommand):
+    help = "Delete expired API tokens in bounded batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        purged = AuthToken.objects.purge_expired(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{purged} expired tokens purged"))
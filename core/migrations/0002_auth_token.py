@@ -0,0 +1,67 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:29
+
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def copy_legacy_tokens(apps, schema_editor):
+    """Carry the never-expiring authtoken tokens over, valid for one TTL"""
+    Token = apps.get_model("authtoken", "Token")
+    AuthToken = apps.get_model("core", "AuthToken")
+    expires_at = timezone.now() + timedelta(
+        seconds=getattr(settings, "AUTH_TOKEN_TTL", 7 * 24 * 60 * 60)
+    )
+    tokens = (
+        AuthToken(
+            digest=hashlib.sha256(key.encode()).digest()[:16],
+            user_id=user_id,
+            expires_at=expires_at,
+        )
+        for key, user_id in Token.objects.values_list("key", "user_id").iterator()
+    )
+    while True:
+        batch = [token for _, token in zip(range(1000), tokens)]
+        if not batch:
+            break
+        AuthToken.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+        ("authtoken", "0003_tokenproxy"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuthToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("digest", models.BinaryField(max_length=16, unique=True)),
+                ("expires_at", models.DateTimeField(db_index=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="auth_tokens",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(copy_legacy_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 07:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_auth_token"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="deletion_updated_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -1,4 +1,10 @@
-from django.db import models
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -30,7 +36,74 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=50)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Set while the user is being deleted, see `core.deletion`
+    deletion_updated_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     objects = UserManager()
 
     USERNAME_FIELD = "email"
+
+
+class AuthTokenQuerySet(models.QuerySet):
+    def issue(self, user):
+        """Create a token for the user, its key is only set on the result"""
+        key = secrets.token_hex(20)
+        token = self.create(
+            user=user,
+            digest=AuthToken.digest_key(key),
+            expires_at=timezone.now() + timedelta(seconds=settings.AUTH_TOKEN_TTL),
+        )
+        token.key = key
+
+        return token
+
+    def rotate(self, token):
+        """Replace a token by a new one of the same user, `None` if it's gone"""
+        with transaction.atomic(using=self.db):
+            deleted, _ = self.filter(pk=token.pk).delete()
+            # Another request rotated it first
+            if not deleted:
+                return None
+
+            return self.issue(token.user)
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+    def purge_expired(self, batch_size=1000):
+        """Delete expired tokens a batch per statement, return how many"""
+        purged = 0
+        while True:
+            pks = list(
+                self.expired().order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                return purged
+            purged += self.filter(pk__in=pks)._raw_delete(self.db)
+
+
+class AuthToken(models.Model):
+    """An expiring API token, stored as a digest of its key
+
+    Keys are handed out once by `AuthTokenQuerySet.issue()`. Rows hold a
+    fixed-width 16 byte prefix of the key's SHA-256, so the lookup index
+    stays compact and a leaked table doesn't leak usable keys.
+    """
+
+    DIGEST_SIZE = 16
+
+    digest = models.BinaryField(max_length=DIGEST_SIZE, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="auth_tokens"
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = AuthTokenQuerySet.as_manager()
+
+    @classmethod
+    def digest_key(cls, key):
+        return hashlib.sha256(key.encode()).digest()[: cls.DIGEST_SIZE]
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
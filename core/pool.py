@@ -0,0 +1,209 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# Process-wide pools, see `get_pool`
+pools = {}
+_pools_lock = threading.Lock()
+
+# What `ConnectionPool._reserve()` hands out besides idle connections
+_NEW = object()
+_OVERFLOW = object()
+
+
+class ConnectionPool:
+    """Process-wide pool of open DB-API connections shared between threads
+
+    At most `max_size` pooled connections are open at once. When all of them
+    are checked out, a caller waits up to `timeout` seconds for one to come
+    back, then gets a one-off overflow connection that is closed on release
+    (or `OperationalError` with `overflow=False`) rather than queueing
+    forever. Connections idle for `check_interval` seconds are health
+    checked before reuse and are retired after `max_lifetime` seconds.
+    """
+
+    def __init__(
+        self,
+        max_size=10,
+        timeout=1.0,
+        overflow=True,
+        max_lifetime=3600,
+        check_interval=30,
+        is_usable=None,
+        reset=None,
+    ):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.overflow = overflow
+        self.max_lifetime = max_lifetime
+        self.check_interval = check_interval
+        self.is_usable = is_usable or (lambda connection: True)
+        self.reset = reset or (lambda connection: True)
+
+        self._condition = threading.Condition()
+        self._idle = deque()  # (connection, created_at, released_at)
+        self._checked_out = {}  # id(connection) -> created_at, pooled only
+        self._size = 0
+
+        self.requests = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.overflowed = 0
+        self.discarded = 0
+
+    def getconn(self, connect):
+        """Check out a connection, opening one with `connect()` if needed"""
+        while True:
+            slot = self._reserve()
+            if slot is _OVERFLOW:
+                return self._open_overflow(connect)
+            if slot is _NEW:
+                return self._open(connect)
+
+            connection, released_at = slot
+            idle_for = time.monotonic() - released_at
+            if idle_for < self.check_interval or self._is_usable(connection):
+                return connection
+            self._discard(connection)
+
+    def putconn(self, connection, discard=False):
+        """Return a connection, closing it if broken, expired or overflow"""
+        with self._condition:
+            created_at = self._checked_out.pop(id(connection), None)
+        if created_at is None:
+            self._close(connection)
+            return
+
+        expired = time.monotonic() - created_at >= self.max_lifetime
+        if discard or expired or not self._reset(connection):
+            self._discard(connection)
+            return
+
+        with self._condition:
+            self._idle.append((connection, created_at, time.monotonic()))
+            self._condition.notify()
+
+    def close_all(self):
+        """Close every idle connection, checked out ones close on release"""
+        with self._condition:
+            idle = [connection for connection, _, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for connection in idle:
+            self._close(connection)
+
+    def stats(self):
+        with self._condition:
+            in_use = len(self._checked_out)
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": in_use,
+                "idle": len(self._idle),
+                "saturation": round(in_use / self.max_size, 3),
+                "requests": self.requests,
+                "waits": self.waits,
+                "wait_ms": round(self.wait_time * 1000, 3),
+                "max_wait_ms": round(self.max_wait_time * 1000, 3),
+                "overflowed": self.overflowed,
+                "discarded": self.discarded,
+            }
+
+    def _reserve(self):
+        # Take an idle connection or a slot for a new one, waiting up to
+        # `timeout` for either before overflowing
+        started_at = time.monotonic()
+        with self._condition:
+            self.requests += 1
+            if not self._idle and self._size >= self.max_size:
+                self._condition.wait_for(
+                    lambda: self._idle or self._size < self.max_size, self.timeout
+                )
+                waited = time.monotonic() - started_at
+                self.waits += 1
+                self.wait_time += waited
+                self.max_wait_time = max(self.max_wait_time, waited)
+
+            if self._idle:
+                connection, created_at, released_at = self._idle.pop()
+                self._checked_out[id(connection)] = created_at
+                return connection, released_at
+            if self._size < self.max_size:
+                self._size += 1
+                return _NEW
+            return _OVERFLOW
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._checked_out[id(connection)] = time.monotonic()
+
+        return connection
+
+    def _open_overflow(self, connect):
+        if not self.overflow:
+            raise OperationalError(
+                f"Connection pool exhausted: {self.max_size} connections in use "
+                f"after waiting {self.timeout}s."
+            )
+        with self._condition:
+            self.overflowed += 1
+        logger.warning(
+            "connection pool exhausted after %.1fs, opening an overflow connection",
+            self.timeout,
+        )
+
+        # Not tracked, so `putconn()` closes it
+        return connect()
+
+    def _discard(self, connection):
+        with self._condition:
+            self._checked_out.pop(id(connection), None)
+            self._size -= 1
+            self.discarded += 1
+            self._condition.notify()
+        self._close(connection)
+
+    def _is_usable(self, connection):
+        try:
+            return self.is_usable(connection)
+        except Exception:
+            return False
+
+    def _reset(self, connection):
+        try:
+            return self.reset(connection)
+        except Exception:
+            return False
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            logger.debug("error closing pooled connection", exc_info=True)
+
+
+def get_pool(key, **options):
+    """Return the process-wide pool for `key`, creating it on first use"""
+    pool = pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = pools.get(key)
+            if pool is None:
+                pool = pools[key] = ConnectionPool(**options)
+
+    return pool
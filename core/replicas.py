@@ -0,0 +1,162 @@
+"""Routing of read-only requests to read replicas of the default database
+
+`DATABASE_REPLICAS` names the database aliases replicating `default`.
+Views using `ReplicaReadMixin` run the reads of their safe-method requests
+against one of them, picked at random among those less than
+`REPLICA_MAX_LAG` seconds behind. Everything else stays on `default`.
+
+Users read their own writes: successful unsafe requests of these views pin
+their user to `default` for `REPLICA_STICKY_SECONDS`. Keep that longer than
+`REPLICA_MAX_LAG` plus `REPLICA_LAG_CHECK_INTERVAL`, so the write reached
+any replica read from once the pin expires.
+
+Lag is measured at most every `REPLICA_LAG_CHECK_INTERVAL` seconds per
+process. A replica whose lag can't be measured, for instance because it is
+down, is skipped until the next check.
+"""
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+# Zero while the replica replayed everything it received, otherwise the
+# age of the last transaction it replayed
+LAG_SQL = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+_read_alias = ContextVar("replica_read_alias", default=None)
+_lags = {}  # alias -> (lag, measured_at)
+
+
+def get_replicas():
+    return settings.DATABASE_REPLICAS
+
+
+def measure_lag(alias):
+    """Return how many seconds the replica `alias` is behind `default`"""
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0.0
+
+    with connection.cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        lag = cursor.fetchone()[0]
+
+    # NULL unless the server is replaying WAL, so it can't be behind
+    return float(lag or 0)
+
+
+def replica_lag(alias):
+    """Return the last lag measured for `alias`, measuring it when due"""
+    now = time.monotonic()
+    lag, measured_at = _lags.get(alias, (None, None))
+    if measured_at is None or now - measured_at >= settings.REPLICA_LAG_CHECK_INTERVAL:
+        try:
+            lag = measure_lag(alias)
+        except DatabaseError:
+            logger.warning("failed to measure the lag of %s", alias, exc_info=True)
+            lag = float("inf")
+        _lags[alias] = (lag, now)
+
+    return lag
+
+
+def _pin_key(user_id):
+    return f"core:db-pinned:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Read the requests of a user from `default` until replicas caught up"""
+    cache.set(_pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def _fresh_replica(replicas):
+    fresh = [
+        alias for alias in replicas if replica_lag(alias) < settings.REPLICA_MAX_LAG
+    ]
+
+    return random.choice(fresh) if fresh else DEFAULT_DB_ALIAS
+
+
+def choose_database(user_id):
+    """Return the database the reads of a request by `user_id` go to"""
+    replicas = get_replicas()
+    if not replicas or cache.get(_pin_key(user_id)):
+        return DEFAULT_DB_ALIAS
+
+    return _fresh_replica(replicas)
+
+
+async def achoose_database(user_id):
+    """Async variant of `choose_database`"""
+    replicas = get_replicas()
+    if not replicas or await cache.aget(_pin_key(user_id)):
+        return DEFAULT_DB_ALIAS
+
+    return await sync_to_async(_fresh_replica)(replicas)
+
+
+@contextmanager
+def reads_from(alias):
+    """Route the reads run within the block to `alias`"""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Sends reads to the database chosen for the current request, if any"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Objects read from a replica are written back to `default`
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db in get_replicas():
+            return DEFAULT_DB_ALIAS
+
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+        return None
+
+
+class ReplicaReadMixin:
+    """Serves the safe-method requests of a DRF view from a read replica
+
+    Successful unsafe requests pin their user to `default` instead.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            alias = choose_database(request.user.pk)
+            self._read_alias_token = _read_alias.set(alias)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = self.__dict__.pop("_read_alias_token", None)
+        if token is not None:
+            _read_alias.reset(token)
+        elif request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request.user.pk)
+
+        return super().finalize_response(request, response, *args, **kwargs)
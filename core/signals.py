@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.authentication import token_cache
+from core.models import AuthToken
+
+
+@receiver(post_save, sender=AuthToken)
+@receiver(post_delete, sender=AuthToken)
+def evict_token(sender, instance, **kwargs):
+    token_cache.evict(bytes(instance.digest))
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def evict_user_tokens(sender, instance, **kwargs):
+    token_cache.evict_user(instance.pk)
@@ -0,0 +1,177 @@
+import hashlib
+from datetime import timedelta
+from io import StringIO
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.authentication import TokenCache, token_cache
+from core.models import AuthToken
+
+TAGS_URL = reverse("recipe:tag-list")
+ME_URL = reverse("accounts:me")
+TOKEN_URL = reverse("accounts:token")
+REFRESH_URL = reverse("accounts:token-refresh")
+
+
+class TokenCacheTests(TestCase):
+    """Test the bounded token cache"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.token = AuthToken.objects.issue(self.user)
+
+    def test_least_recently_used_evicted(self):
+        """Test that the least recently used entry is evicted when full"""
+        cache = TokenCache(maxsize=2, ttl=60)
+        cache.set("a", self.token)
+        cache.set("b", self.token)
+        cache.get("a")
+        cache.set("c", self.token)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_expired_entry_dropped(self):
+        """Test that entries are not served past their TTL"""
+        cache = TokenCache(maxsize=2, ttl=0)
+        cache.set("a", self.token)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating API requests through the token cache"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.token = AuthToken.objects.issue(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_token_lookup_cached(self):
+        """Test that repeated requests skip the token lookup"""
+        with self.assertNumQueries(2):
+            self.client.get(TAGS_URL)
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_deleted_token_evicted(self):
+        """Test that a deleted token is rejected immediately"""
+        self.client.get(TAGS_URL)
+        self.token.delete()
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_evicted(self):
+        """Test that a deactivated user is rejected immediately"""
+        self.client.get(TAGS_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_update_evicted(self):
+        """Test that updating the profile is reflected on the next request"""
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {"name": "New Name"})
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["name"], "New Name")
+
+    def test_expired_token_rejected(self):
+        """Test that a token is rejected once expired, even when cached"""
+        self.client.get(TAGS_URL)
+        AuthToken.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        token_cache.get(bytes(self.token.digest)).expires_at = timezone.now()
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIsNone(token_cache.get(bytes(self.token.digest)))
+
+
+class AuthTokenTests(TestCase):
+    """Test issuing, rotating and purging expiring tokens"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client = APIClient()
+
+    def test_only_digest_stored(self):
+        """Test that tokens are stored as a fixed-width digest of their key"""
+        token = AuthToken.objects.issue(self.user)
+
+        stored = bytes(AuthToken.objects.get().digest)
+        self.assertEqual(len(stored), 16)
+        self.assertEqual(stored, hashlib.sha256(token.key.encode()).digest()[:16])
+
+    def test_login_issues_token(self):
+        """Test that signing in returns an expiring token"""
+        payload = {"email": "example@email.com", "password": "testpass"}
+
+        res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("expires_at", res.data)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {res.data['token']}")
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_200_OK)
+
+    def test_rotate_token(self):
+        """Test that rotating replaces the token authenticating the request"""
+        old = AuthToken.objects.issue(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {old.key}")
+
+        res = self.client.post(REFRESH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data["token"], old.key)
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {res.data['token']}")
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_200_OK)
+
+    def test_rotated_twice_rejected(self):
+        """Test that a token can only be rotated once"""
+        token = AuthToken.objects.issue(self.user)
+        AuthToken.objects.rotate(token)
+
+        self.assertIsNone(AuthToken.objects.rotate(token))
+        self.assertEqual(AuthToken.objects.count(), 1)
+
+    def test_purge_expired(self):
+        """Test that the purge command deletes only expired tokens"""
+        for _ in range(5):
+            AuthToken.objects.issue(self.user)
+        AuthToken.objects.filter(pk__in=AuthToken.objects.values("pk")[:3]).update(
+            expires_at=timezone.now()
+        )
+        out = StringIO()
+
+        call_command("purge_tokens", "--batch-size=2", stdout=out)
+
+        self.assertIn("3 expired tokens purged", out.getvalue())
+        self.assertEqual(AuthToken.objects.count(), 2)
@@ -0,0 +1,167 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core.deletion import delete_user, get_deletion_progress, run_user_deletion
+from core.models import AuthToken
+from recipe.models import ImageBlob, Ingredient, Recipe, Tag
+
+
+def sample_user(email="example@email.com", password="testpass"):
+    return get_user_model().objects.create_user(email, password)
+
+
+def sample_catalogue(user, recipes=5):
+    tags = [Tag.objects.create(user=user, name=f"tag{i}") for i in range(3)]
+    ingredient = Ingredient.objects.create(user=user, name="salt")
+    for i in range(recipes):
+        recipe = Recipe.objects.create(
+            user=user, title=f"recipe{i}", time_minutes=5, price=10
+        )
+        recipe.tags.add(*tags)
+        recipe.ingredients.add(ingredient)
+    AuthToken.objects.issue(user)
+
+
+class DeleteUserTests(TestCase):
+    """Test the chunked deletion of users"""
+
+    def setUp(self):
+        self.user = sample_user()
+        sample_catalogue(self.user)
+
+    def test_everything_deleted(self):
+        """Test that the user and everything it owns is deleted"""
+        deleted = delete_user(self.user.pk, chunk_size=2)
+
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Tag.objects.exists())
+        self.assertFalse(Ingredient.objects.exists())
+        self.assertFalse(Recipe.tags.through.objects.exists())
+        self.assertFalse(AuthToken.objects.exists())
+        self.assertEqual(deleted["recipe.Recipe"], 5)
+        self.assertEqual(deleted["recipe.Recipe_tags"], 15)
+        self.assertEqual(deleted["core.User"], 1)
+
+    def test_other_users_untouched(self):
+        """Test that the catalogues of other users are kept"""
+        other = sample_user("other@email.com")
+        sample_catalogue(other, recipes=2)
+
+        delete_user(self.user.pk)
+
+        self.assertEqual(Recipe.objects.filter(user=other).count(), 2)
+        self.assertEqual(Recipe.tags.through.objects.count(), 6)
+        self.assertTrue(AuthToken.objects.filter(user=other).exists())
+
+    def test_deleted_in_chunks(self):
+        """Test that progress is reported after every chunk"""
+        reports = []
+
+        delete_user(self.user.pk, chunk_size=2, progress=reports.append)
+
+        recipe_counts = {report.get("recipe.Recipe") for report in reports}
+        self.assertTrue({2, 4, 5} <= recipe_counts)
+
+    def test_deactivated_first(self):
+        """Test that the user can't sign in while its rows are deleted"""
+        active = []
+
+        def progress(deleted):
+            active.append(get_user_model().objects.get(pk=self.user.pk).is_active)
+
+        delete_user(self.user.pk, progress=progress)
+
+        self.assertEqual(set(active), {False})
+
+    def test_image_references_released(self):
+        """Test that deleted recipes release their images"""
+        blob = ImageBlob.objects.create(digest="a" * 64, name="a.jpg", size=1)
+        other = sample_user("other@email.com")
+        for user in (self.user, self.user, other):
+            Recipe.objects.create(
+                user=user, title="r", time_minutes=1, price=1, image_blob=blob
+            )
+        ImageBlob.objects.update(ref_count=3)
+
+        delete_user(self.user.pk, chunk_size=1)
+
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+
+    def test_other_users_counts_released(self):
+        """Test that recipe counts of tags owned by others are decremented"""
+        other = sample_user("other@email.com")
+        tag = Tag.objects.create(user=other, name="shared")
+        Recipe.objects.get(title="recipe0").tags.add(tag)
+
+        delete_user(self.user.pk)
+
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 0)
+
+    def test_delete_account_command(self):
+        """Test that the command deletes the user and reports progress"""
+        out = StringIO()
+
+        call_command("delete_account", self.user.email, "--chunk-size=2", stdout=out)
+
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertIn("5 recipe.Recipe", out.getvalue())
+        self.assertIn("rows deleted", out.getvalue())
+
+    def test_deletion_stamped_while_running(self):
+        """Test that running deletions stamp the user after every chunk"""
+        stamps = []
+
+        def progress(deleted):
+            user = get_user_model().objects.get(pk=self.user.pk)
+            stamps.append(user.deletion_updated_at)
+
+        run_user_deletion(self.user.pk, chunk_size=2, progress=progress)
+
+        self.assertNotIn(None, stamps)
+        self.assertEqual(stamps, sorted(stamps))
+        self.assertEqual(get_deletion_progress(self.user.pk)["status"], "done")
+
+    def test_resume_stalled_deletions(self):
+        """Test that --resume finishes only the deletions that stalled"""
+        User = get_user_model()
+        stalled_at = timezone.now() - timedelta(days=1)
+        # Cut short halfway through its recipes
+        Recipe.objects.filter(user=self.user, title__in=["recipe0", "recipe1"]).delete()
+        User.objects.filter(pk=self.user.pk).update(
+            is_active=False, deletion_updated_at=stalled_at
+        )
+        running = sample_user("running@email.com")
+        User.objects.filter(pk=running.pk).update(
+            is_active=False, deletion_updated_at=timezone.now()
+        )
+        deactivated = sample_user("deactivated@email.com")
+        User.objects.filter(pk=deactivated.pk).update(is_active=False)
+        out = StringIO()
+
+        call_command("delete_account", "--resume", stdout=out)
+
+        self.assertEqual(
+            set(User.objects.values_list("pk", flat=True)),
+            {running.pk, deactivated.pk},
+        )
+        self.assertFalse(Recipe.objects.exists())
+        self.assertIn(f"Deleted user {self.user.pk}", out.getvalue())
+
+        call_command("delete_account", "--resume", stdout=out)
+
+        self.assertIn("No deletions to resume", out.getvalue())
+
+    def test_delete_account_needs_one_target(self):
+        """Test that the command takes either an email or --resume"""
+        with self.assertRaises(CommandError):
+            call_command("delete_account")
+        with self.assertRaises(CommandError):
+            call_command("delete_account", self.user.email, "--resume")
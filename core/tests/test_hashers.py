@@ -0,0 +1,117 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.test import SimpleTestCase, TestCase
+
+from core.hashers import HashingPool, HashingUnavailable
+
+
+def run_in_thread(pool, func):
+    """Start `pool.run(func)` on a thread, recording the errors it raises"""
+    errors = []
+
+    def target():
+        try:
+            pool.run(func)
+        except HashingUnavailable as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=target)
+    thread.start()
+
+    return thread, errors
+
+
+class HashingPoolTests(SimpleTestCase):
+    """Test the bounded pool hashing passwords"""
+
+    def test_runs_on_pool_thread(self):
+        """Test that functions run on a hashing thread"""
+        pool = HashingPool(workers=1, queue=0, timeout=1)
+
+        name = pool.run(lambda: threading.current_thread().name)
+
+        self.assertTrue(name.startswith("password-hashing"))
+
+    def test_rejects_when_full(self):
+        """Test that callers beyond the workers and queue are rejected"""
+        pool = HashingPool(workers=1, queue=0, timeout=0.01)
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait()
+
+        busy, errors = run_in_thread(pool, block)
+        started.wait()
+        try:
+            with self.assertRaises(HashingUnavailable):
+                pool.run(lambda: None)
+        finally:
+            # The blocked caller gives up after the timeout, release after
+            busy.join()
+            release.set()
+
+        self.assertEqual(len(errors), 1)
+        self.assertIsNone(pool.run(lambda: None))
+
+    def test_queued_callers_time_out(self):
+        """Test that callers waiting for their hash give up after the timeout"""
+        pool = HashingPool(workers=1, queue=1, timeout=0.05)
+        started, release = threading.Event(), threading.Event()
+        queued = []
+
+        def block():
+            started.set()
+            release.wait()
+
+        busy, errors = run_in_thread(pool, block)
+        started.wait()
+        # Unblocks the pool should callers wait regardless of the timeout
+        safeguard = threading.Timer(5, release.set)
+        safeguard.start()
+        try:
+            with self.assertRaises(HashingUnavailable):
+                pool.run(queued.append, "hash")
+        finally:
+            safeguard.cancel()
+            busy.join()
+            release.set()
+
+        self.assertEqual(len(errors), 1)
+        self.assertIsNone(pool.run(lambda: None))
+        # The queued hash was dropped rather than computed for nobody
+        self.assertEqual(queued, [])
+
+
+class PasswordHashingTests(TestCase):
+    """Test the password hashing policy"""
+
+    def test_new_passwords_use_argon2(self):
+        """Test that new passwords are hashed with Argon2"""
+        user = get_user_model().objects.create_user("example@email.com", "testpass")
+
+        self.assertTrue(user.password.startswith("argon2$"))
+        self.assertTrue(user.check_password("testpass"))
+
+    def test_legacy_hash_upgraded(self):
+        """Test that PBKDF2 hashes are rehashed with Argon2 on sign-in"""
+        user = get_user_model().objects.create_user("example@email.com")
+        user.password = make_password("testpass", hasher="pbkdf2_sha256")
+        user.save()
+
+        self.assertTrue(user.check_password("testpass"))
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("argon2$"))
+
+    def test_hashing_offloaded(self):
+        """Test that hashes are computed through the hashing pool"""
+        with patch("core.hashers.get_pool") as get_pool:
+            get_pool.return_value.run.return_value = "argon2$hash"
+            user = get_user_model().objects.create_user("example@email.com", "pw")
+
+        get_pool.return_value.run.assert_called_once()
+        self.assertEqual(user.password, "argon2$hash")
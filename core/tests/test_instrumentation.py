@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.authentication import token_cache
+from core.models import AuthToken
+
+TAGS_URL = reverse("recipe:tag-list")
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1)
+class RequestInstrumentationTests(TestCase):
+    """Test the request instrumentation middleware"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.token = AuthToken.objects.issue(self.user)
+
+    def get_client(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+        return client
+
+    def test_server_timing_header(self):
+        """Test that sampled requests report their phases"""
+        with self.assertLogs("core.instrumentation", "INFO") as logs:
+            res = self.get_client().get(TAGS_URL)
+
+        timing = res["Server-Timing"]
+        for name in ("db", "auth", "view", "render", "total"):
+            self.assertIn(f"{name};dur=", timing)
+        self.assertIn('desc="2 queries"', timing)
+        self.assertIn('"queries": 2', logs.output[-1])
+        self.assertIn('"status": 200', logs.output[-1])
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_unsampled_request(self):
+        """Test that requests outside the sample are not instrumented"""
+        res = self.get_client().get(TAGS_URL)
+
+        self.assertFalse(res.has_header("Server-Timing"))
+
+    @override_settings(INSTRUMENTATION_SLOW_QUERY_MS=0)
+    def test_slow_query_logged(self):
+        """Test that queries over the threshold are logged with their SQL"""
+        with self.assertLogs("core.instrumentation", "WARNING") as logs:
+            self.get_client().get(TAGS_URL)
+
+        self.assertTrue(any("recipe_tag" in line for line in logs.output))
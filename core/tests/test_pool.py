@@ -0,0 +1,162 @@
+import threading
+import time
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TransactionTestCase
+
+from core.pool import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test the process-wide connection pool"""
+
+    def setUp(self):
+        self.opened = []
+
+    def connect(self):
+        connection = FakeConnection()
+        self.opened.append(connection)
+
+        return connection
+
+    def test_reuses_connections(self):
+        """Test that returned connections are handed out again"""
+        pool = ConnectionPool(max_size=2)
+        first = pool.getconn(self.connect)
+        pool.putconn(first)
+
+        self.assertIs(pool.getconn(self.connect), first)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_overflow_when_exhausted(self):
+        """Test that an exhausted pool falls back to a one-off connection"""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pooled = pool.getconn(self.connect)
+
+        with self.assertLogs("core.pool", "WARNING"):
+            overflow = pool.getconn(self.connect)
+        pool.putconn(overflow)
+
+        self.assertIsNot(overflow, pooled)
+        self.assertTrue(overflow.closed)
+        stats = pool.stats()
+        self.assertEqual(stats["overflowed"], 1)
+        self.assertEqual(stats["waits"], 1)
+        self.assertEqual(stats["saturation"], 1)
+
+    def test_exhausted_without_overflow(self):
+        """Test that disabling overflow raises once the wait times out"""
+        pool = ConnectionPool(max_size=1, timeout=0.01, overflow=False)
+        pool.getconn(self.connect)
+
+        with self.assertRaises(OperationalError):
+            pool.getconn(self.connect)
+
+    def test_waiter_gets_released_connection(self):
+        """Test that a waiting caller gets the next returned connection"""
+        pool = ConnectionPool(max_size=1, timeout=5)
+        pooled = pool.getconn(self.connect)
+        received = []
+
+        waiter = threading.Thread(
+            target=lambda: received.append(pool.getconn(self.connect))
+        )
+        waiter.start()
+        time.sleep(0.05)
+        pool.putconn(pooled)
+        waiter.join()
+
+        self.assertEqual(received, [pooled])
+        self.assertEqual(pool.stats()["overflowed"], 0)
+        self.assertGreater(pool.stats()["max_wait_ms"], 0)
+
+    def test_unhealthy_connection_replaced(self):
+        """Test that idle connections failing the health check are dropped"""
+        pool = ConnectionPool(
+            max_size=1, check_interval=0, is_usable=lambda connection: False
+        )
+        stale = pool.getconn(self.connect)
+        pool.putconn(stale)
+
+        fresh = pool.getconn(self.connect)
+
+        self.assertIsNot(fresh, stale)
+        self.assertTrue(stale.closed)
+        self.assertEqual(pool.stats()["discarded"], 1)
+
+    def test_failed_reset_discards(self):
+        """Test that connections which can't be reset are not pooled"""
+
+        def reset(connection):
+            raise RuntimeError("connection lost")
+
+        pool = ConnectionPool(max_size=1, reset=reset)
+        broken = pool.getconn(self.connect)
+        pool.putconn(broken)
+
+        self.assertTrue(broken.closed)
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_expired_connection_closed(self):
+        """Test that connections past their lifetime are closed on release"""
+        pool = ConnectionPool(max_size=1, max_lifetime=0)
+        expired = pool.getconn(self.connect)
+        pool.putconn(expired)
+
+        self.assertTrue(expired.closed)
+        self.assertEqual(pool.stats()["idle"], 0)
+
+    def test_failed_connect_frees_slot(self):
+        """Test that a failing connect doesn't leak a pool slot"""
+
+        def connect():
+            raise OperationalError("could not connect")
+
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        with self.assertRaises(OperationalError):
+            pool.getconn(connect)
+
+        self.assertIsNotNone(pool.getconn(self.connect))
+        self.assertEqual(pool.stats()["overflowed"], 0)
+
+    def test_close_all(self):
+        """Test that idle connections are closed"""
+        pool = ConnectionPool(max_size=2)
+        idle = pool.getconn(self.connect)
+        pool.putconn(idle)
+
+        pool.close_all()
+
+        self.assertTrue(idle.closed)
+        self.assertEqual(pool.stats()["size"], 0)
+
+
+@skipUnless(
+    connection.settings_dict["ENGINE"] == "core.backends.postgresql",
+    "Requires the pooled PostgreSQL backend",
+)
+class PooledBackendTests(TransactionTestCase):
+    """Test the pooled PostgreSQL backend"""
+
+    def test_connection_returned_on_close(self):
+        """Test that closing a connection returns it to the pool"""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        in_use = connection.pool.stats()["in_use"]
+        raw = connection.connection
+
+        connection.close()
+        connection.ensure_connection()
+
+        self.assertIs(connection.connection, raw)
+        self.assertEqual(connection.pool.stats()["in_use"], in_use)
@@ -0,0 +1,109 @@
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from core.replicas import ReplicaRouter, reads_from
+from recipe.models import Tag
+from recipe.views import TagViewSet
+
+TAGS_URL = reverse("recipe:tag-list")
+ME_URL = reverse("accounts:me")
+
+
+@skipUnless(
+    "replica" in settings.DATABASES,
+    "needs a second database, see recipe_app_api/test_settings.py",
+)
+@override_settings(DATABASE_REPLICAS=["replica"], REPLICA_LAG_CHECK_INTERVAL=0)
+class ReplicaRoutingTests(TestCase):
+    """Test routing the reads of safe-method requests to a replica"""
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        # Users pinned by earlier tests would read from the primary
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        # The replica isn't replicating, rows only there tell where reads went
+        get_user_model().objects.using("replica").create(
+            id=self.user.id, email=self.user.email
+        )
+        Tag.objects.create(user=self.user, name="primary")
+        Tag.objects.using("replica").create(user_id=self.user.id, name="replica")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tag_names(self):
+        res = self.client.get(TAGS_URL)
+
+        return [tag["name"] for tag in res.data["results"]]
+
+    def test_reads_from_replica(self):
+        """Test that safe-method requests read from the replica"""
+        self.assertEqual(self.tag_names(), ["replica"])
+
+    def test_drf_route_reads_from_replica(self):
+        """Test that requests served by the DRF views read from the replica"""
+        request = APIRequestFactory().get(TAGS_URL)
+        force_authenticate(request, self.user)
+
+        res = TagViewSet.as_view({"get": "list"})(request)
+
+        self.assertEqual([tag["name"] for tag in res.data["results"]], ["replica"])
+
+    def test_writes_pin_user_to_primary(self):
+        """Test that users read from the primary right after writing"""
+        res = self.client.post(TAGS_URL, {"name": "new"})
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(self.tag_names(), ["primary", "new"])
+
+    def test_user_update_pins_to_primary(self):
+        """Test that updating the profile pins the user too"""
+        self.client.patch(ME_URL, {"name": "new name"})
+
+        self.assertEqual(self.tag_names(), ["primary"])
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_pin_expires(self):
+        """Test that reads go back to the replica once the pin expired"""
+        self.client.post(TAGS_URL, {"name": "new"})
+
+        self.assertEqual(self.tag_names(), ["replica"])
+
+    def test_failed_writes_not_pinned(self):
+        """Test that rejected writes don't pin the user"""
+        self.client.post(TAGS_URL, {"name": ""})
+
+        self.assertEqual(self.tag_names(), ["replica"])
+
+    def test_lagging_replica_skipped(self):
+        """Test that reads fall back to the primary while replicas lag"""
+        with patch("core.replicas.measure_lag", return_value=60):
+            self.assertEqual(self.tag_names(), ["primary"])
+
+        self.assertEqual(self.tag_names(), ["replica"])
+
+    def test_unreachable_replica_skipped(self):
+        """Test that reads fall back to the primary if a replica is down"""
+        with patch("core.replicas.measure_lag", side_effect=OperationalError):
+            with self.assertLogs("core.replicas", "WARNING"):
+                self.assertEqual(self.tag_names(), ["primary"])
+
+    def test_replica_objects_written_to_primary(self):
+        """Test that objects read from a replica are saved to the primary"""
+        with reads_from("replica"):
+            tag = Tag.objects.get()
+
+        self.assertEqual(tag._state.db, "replica")
+        self.assertEqual(ReplicaRouter().db_for_write(Tag, instance=tag), "default")
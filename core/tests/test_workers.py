@@ -0,0 +1,35 @@
+import threading
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core import workers
+
+
+class WorkerPoolTests(SimpleTestCase):
+    """Test the process-wide background worker pools"""
+
+    def setUp(self):
+        patcher = patch.dict(workers.executors, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pools_shared_by_name(self):
+        """Test that a pool is created once per name and named after it"""
+        executor = workers.get_executor("test-workers", 1)
+        self.addCleanup(executor.shutdown)
+
+        self.assertIs(workers.get_executor("test-workers", 1), executor)
+        self.assertIsNot(workers.get_executor("other-workers", 1), executor)
+        workers.executors["other-workers"].shutdown()
+        name = executor.submit(lambda: threading.current_thread().name).result()
+        self.assertTrue(name.startswith("test-workers"))
+
+    def test_run_in_worker_closes_connections(self):
+        """Test that connections are closed after the task, even if it fails"""
+        with patch.object(workers.connections, "close_all") as close_all:
+            self.assertEqual(workers.run_in_worker(sum, [1, 2]), 3)
+            with self.assertRaises(ZeroDivisionError):
+                workers.run_in_worker(divmod, 1, 0)
+
+        self.assertEqual(close_all.call_count, 2)
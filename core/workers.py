@@ -0,0 +1,37 @@
+"""Process-wide thread pools running background work off the request thread
+
+Pools are created on first use and shared by name. Their threads outlive
+requests, so tasks are run through `run_in_worker`, which gives the
+thread's database connections back once the task is done.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+
+# Process-wide pools by name, see `get_executor`
+executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name, workers):
+    """Return the pool `name`, creating it with `workers` threads on first use"""
+    executor = executors.get(name)
+    if executor is None:
+        with _executors_lock:
+            executor = executors.get(name)
+            if executor is None:
+                executor = executors[name] = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix=name
+                )
+
+    return executor
+
+
+def run_in_worker(func, *args):
+    """Call `func(*args)`, then close the calling thread's connections"""
+    try:
+        return func(*args)
+    finally:
+        connections.close_all()
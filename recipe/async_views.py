@@ -0,0 +1,101 @@
+"""Async read endpoints for recipes, tags and ingredients
+
+JSON GETs of the list and detail routes are served by the viewsets' async
+actions (`alist`, `aretrieve`) through Django's async ORM, so under ASGI a
+request waiting on the database doesn't hold up the worker. Their reads
+go to a replica as chosen by `core.replicas`. Requests are authenticated,
+negotiated, permitted and throttled as by the viewsets' DRF views. Any
+other request, including writes and the browsable API, goes to the DRF
+route.
+"""
+
+from asgiref.sync import sync_to_async
+from django.utils.cache import patch_vary_headers
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import exception_handler
+
+from core.replicas import achoose_database, reads_from
+
+_AUTH_ERRORS = (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+
+
+def _wants_json(request):
+    accept = request.headers.get("Accept", "")
+
+    return "format" not in request.GET and "text/html" not in accept
+
+
+async def _authenticate(request):
+    # `Request._authenticate()`, awaiting the authenticators that can be,
+    # forced authentication of tests included
+    for authenticator in request.authenticators:
+        aauthenticate = getattr(authenticator, "aauthenticate", None)
+        if aauthenticate is None:
+            aauthenticate = sync_to_async(authenticator.authenticate)
+        result = await aauthenticate(request)
+        if result is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = result
+            return
+
+    request._not_authenticated()
+
+
+def _check_access(view, request):
+    # Permissions and throttles may read the database or the cache
+    view.check_permissions(request)
+    view.check_throttles(request)
+
+
+def _finalize(response, request, view):
+    if isinstance(response, Response):
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = view.get_renderer_context()
+    patch_vary_headers(response, ("Accept",))
+
+    return response
+
+
+async def _serve(viewset, action, request, kwargs):
+    view = viewset(
+        action_map={"get": action}, args=(), kwargs=kwargs, format_kwarg=None
+    )
+    view.headers = {}
+    view.request = request = view.initialize_request(request)
+    # Errors of the negotiation itself are rendered as JSON, as DRF does
+    request.accepted_renderer = JSONRenderer()
+    request.accepted_media_type = JSONRenderer.media_type
+
+    try:
+        negotiated = view.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = negotiated
+        await _authenticate(request)
+        await sync_to_async(_check_access)(view, request)
+        with reads_from(await achoose_database(request.user.pk)):
+            response = await getattr(view, f"a{action}")()
+    except Exception as exc:
+        if isinstance(exc, _AUTH_ERRORS):
+            exc.auth_header = view.get_authenticate_header(request)
+        response = exception_handler(exc, view.get_exception_handler_context())
+        if response is None:
+            raise
+
+    return _finalize(response, request, view)
+
+
+def async_route(viewset, action, fallback):
+    """Serve JSON GETs with `viewset`'s async `action`, the rest with `fallback`"""
+    fallback = sync_to_async(fallback)
+
+    async def view(request, *args, **kwargs):
+        if request.method == "GET" and _wants_json(request):
+            return await _serve(viewset, action, request, kwargs)
+
+        return await fallback(request, *args, **kwargs)
+
+    view.csrf_exempt = True
+
+    return view
@@ -0,0 +1,230 @@
+"""Content-addressed, deduplicated storage of recipe images
+
+Uploads are hashed while they are spooled to disk and stored once per
+distinct content as an `ImageBlob`, whatever the number of recipes using
+them. Each recipe holds a reference counted in `ImageBlob.ref_count`:
+taken by `attach_image` and released when the image is replaced or the
+recipe deleted, cascades from users included. Blobs are only deleted by
+`collect_garbage`, once unreferenced for a grace period, so an identical
+upload arriving meanwhile revives the blob instead of storing it again.
+"""
+
+import hashlib
+import os
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from recipe.images import delete_image, schedule_variants
+from recipe.models import ImageBlob, Recipe
+
+ROOT = "blobs"
+BATCH_SIZE = 1000
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """Spools uploads to a temporary file, hashing them on the way"""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hash = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hash.update(raw_data)
+
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.hash.hexdigest()
+
+        return file
+
+
+def file_digest(file):
+    """Return the SHA-256 of a file, computed while uploading if possible"""
+    digest = getattr(file, "sha256", None)
+    if digest is None:
+        hash = hashlib.sha256()
+        for chunk in file.chunks():
+            hash.update(chunk)
+        digest = hash.hexdigest()
+
+    return digest
+
+
+def blob_name(digest, ext):
+    # Two levels of fan-out keep directories small
+    return os.path.join(ROOT, digest[:2], digest[2:4], f"{digest}{ext}")
+
+
+def acquire(file):
+    """Return the blob holding `file`'s content, taking a reference to it"""
+    digest = file_digest(file)
+    if ImageBlob.objects.filter(digest=digest).update(ref_count=F("ref_count") + 1):
+        return ImageBlob.objects.get(digest=digest)
+
+    # Storage picks a free name if the blob's file is still around, e.g.
+    # while being collected, so a blob never shares a file it didn't write
+    ext = os.path.splitext(file.name)[1].lower()
+    name = default_storage.save(blob_name(digest, ext), file)
+    blob, created = ImageBlob.objects.get_or_create(
+        digest=digest, defaults={"name": name, "size": file.size, "ref_count": 1}
+    )
+    if not created:
+        # Lost a race against an identical upload
+        default_storage.delete(name)
+        ImageBlob.objects.filter(digest=digest).update(ref_count=F("ref_count") + 1)
+        blob.refresh_from_db()
+
+    return blob
+
+
+def release_blobs(references):
+    """Drop `references[digest]` references of each blob"""
+    digests_by_count = defaultdict(list)
+    for digest, count in references.items():
+        if digest and count:
+            digests_by_count[count].append(digest)
+
+    for count, digests in digests_by_count.items():
+        ImageBlob.objects.filter(digest__in=digests).update(
+            ref_count=Greatest(F("ref_count") - count, Value(0)),
+            released_at=timezone.now(),
+        )
+
+
+def attach_image(recipe, file):
+    """Point the recipe at the blob holding `file`, releasing its previous one
+
+    Variants already rendered for the blob are reused, otherwise they are
+    rendered once the transaction commits.
+    """
+    with transaction.atomic():
+        previous = recipe.image_blob_id
+        blob = acquire(file)
+        recipe.image_blob = blob
+        recipe.image = blob.name
+        recipe.image_variants = blob.variants
+        recipe.save()
+        if previous:
+            release_blobs({previous: 1})
+
+    if not blob.variants:
+        schedule_variants(blob.digest)
+
+    return blob
+
+
+def actual_ref_count():
+    return Coalesce(
+        Subquery(
+            Recipe.objects.filter(image_blob=OuterRef("pk"))
+            .values("image_blob")
+            .annotate(rows=Count("pk"))
+            .values("rows")
+        ),
+        0,
+    )
+
+
+def reconcile_ref_counts(dry_run=False):
+    """Recount the blobs whose `ref_count` drifted, return how many"""
+    actual = actual_ref_count()
+    drifted = list(
+        ImageBlob.objects.annotate(actual=actual)
+        .exclude(ref_count=F("actual"))
+        .values_list("pk", flat=True)
+    )
+    if not dry_run:
+        for start in range(0, len(drifted), BATCH_SIZE):
+            batch = drifted[start : start + BATCH_SIZE]
+            ImageBlob.objects.filter(pk__in=batch).update(
+                ref_count=actual, released_at=timezone.now()
+            )
+
+    return len(drifted)
+
+
+def unreferenced_blobs(min_age):
+    cutoff = timezone.now() - timedelta(seconds=min_age)
+
+    return ImageBlob.objects.filter(ref_count=0, released_at__lte=cutoff).exclude(
+        Exists(Recipe.objects.filter(image_blob=OuterRef("pk")))
+    )
+
+
+def collect_garbage(min_age, dry_run=False):
+    """Delete blobs unreferenced for `min_age` seconds and their files
+
+    Returns how many blobs were collected.
+    """
+    if dry_run:
+        return unreferenced_blobs(min_age).count()
+
+    collected = 0
+    while True:
+        with transaction.atomic():
+            # Locked, so a concurrent upload of the same content waits and
+            # then stores a new blob rather than reviving a deleted one
+            batch = list(
+                unreferenced_blobs(min_age)
+                .select_for_update(skip_locked=True)
+                .values_list("digest", "name", "variants")[:BATCH_SIZE]
+            )
+            ImageBlob.objects.filter(digest__in=[row[0] for row in batch]).delete()
+        for _, name, variants in batch:
+            delete_image(name, variants)
+        collected += len(batch)
+        if len(batch) < BATCH_SIZE:
+            return collected
+
+
+def _blob_files(name, variants):
+    names = {name}
+    for formats in variants.values():
+        names.update(formats.values())
+
+    return names
+
+
+def collect_orphans(min_age, dry_run=False):
+    """Delete files under the blob root that no blob refers to
+
+    These are left behind by uploads whose transaction rolled back. Files
+    younger than `min_age` seconds may belong to uploads still in flight
+    and are kept. Returns how many files were (or would be) deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=min_age)
+    orphans = 0
+    for first in _listdirs(ROOT):
+        for second in _listdirs(os.path.join(ROOT, first)):
+            directory = os.path.join(ROOT, first, second)
+            known = set()
+            for name, variants in ImageBlob.objects.filter(
+                digest__startswith=first + second
+            ).values_list("name", "variants"):
+                known |= _blob_files(name, variants)
+
+            for file in default_storage.listdir(directory)[1]:
+                name = os.path.join(directory, file)
+                if name in known or default_storage.get_modified_time(name) > cutoff:
+                    continue
+                orphans += 1
+                if not dry_run:
+                    default_storage.delete(name)
+
+    return orphans
+
+
+def _listdirs(path):
+    if not default_storage.exists(path):
+        return []
+
+    return default_storage.listdir(path)[0]
@@ -0,0 +1,213 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Value
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from recipe.cache import bump_catalogue_version_on_commit
+from recipe.cards import refresh_recipe_cards
+from recipe.counters import adjust_recipe_counts, related_counts
+from recipe.filters import ID_MAX, ID_MIN
+from recipe.models import Ingredient, Recipe, Tag
+from recipe.search import update_recipe_search_vectors
+from recipe.serializers import RecipeBulkSerializer
+
+RELATED_MODELS = {"tags": Tag, "ingredients": Ingredient}
+BATCH_SIZE = 1000
+_id = serializers.IntegerField(min_value=ID_MIN, max_value=ID_MAX)
+
+
+def owned_related_ids(user, items):
+    """Return the requested tag and ingredient ids owned by `user` in one query"""
+    owned = {field: set() for field in RELATED_MODELS}
+    querysets = []
+    for field, model in RELATED_MODELS.items():
+        requested = {pk for item in items for pk in item.get(field, ())}
+        if requested:
+            querysets.append(
+                model.objects.filter(user=user, id__in=requested)
+                .annotate(field=Value(field))
+                .values_list("field", "id")
+            )
+
+    if querysets:
+        for field, pk in querysets[0].union(*querysets[1:], all=True):
+            owned[field].add(pk)
+
+    return owned
+
+
+def related_errors(data, owned):
+    errors = {}
+    for field in RELATED_MODELS:
+        missing = sorted(set(data.get(field, ())) - owned[field])
+        if missing:
+            errors[field] = [
+                f'Invalid pk "{pk}" - object does not exist.' for pk in missing
+            ]
+
+    return errors
+
+
+def write_related(pairs, replace=False):
+    """Bulk insert M2M through rows for `(recipe, validated_data)` pairs"""
+    for field, model in RELATED_MODELS.items():
+        through = getattr(Recipe, field).through
+        column = f"{model._meta.model_name}_id"
+        pairs_with_field = [(recipe, data) for recipe, data in pairs if field in data]
+        deltas = Counter()
+        if replace and pairs_with_field:
+            recipe_ids = [recipe.id for recipe, _ in pairs_with_field]
+            deltas.subtract(related_counts(through, column, recipe_ids))
+            through.objects.filter(recipe_id__in=recipe_ids).delete()
+        rows = through.objects.bulk_create(
+            [
+                through(recipe_id=recipe.id, **{column: pk})
+                for recipe, data in pairs_with_field
+                for pk in dict.fromkeys(data[field])
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        # Bulk writes skip m2m_changed, keep the counters in step here
+        deltas.update(getattr(row, column) for row in rows)
+        adjust_recipe_counts(model, deltas)
+
+
+def _recipe_fields(data):
+    return {key: value for key, value in data.items() if key not in RELATED_MODELS}
+
+
+def _validate_related(user, validated, results):
+    owned = owned_related_ids(user, [data for _, _, data in validated])
+    accepted = []
+    for index, instance, data in validated:
+        errors = related_errors(data, owned)
+        if errors:
+            results[index] = {"errors": errors}
+        else:
+            accepted.append((index, instance, data))
+
+    return accepted
+
+
+def create_recipes(user, items):
+    """Create recipes for `user`, returning one result per item"""
+    results = [None] * len(items)
+    validated = []
+    for index, item in enumerate(items):
+        serializer = RecipeBulkSerializer(data=item)
+        if serializer.is_valid():
+            validated.append((index, None, serializer.validated_data))
+        else:
+            results[index] = {"errors": serializer.errors}
+
+    accepted = _validate_related(user, validated, results)
+    with transaction.atomic():
+        recipes = Recipe.objects.bulk_create(
+            [Recipe(user=user, **_recipe_fields(data)) for _, _, data in accepted],
+            batch_size=BATCH_SIZE,
+        )
+        write_related(
+            [(recipe, data) for recipe, (_, _, data) in zip(recipes, accepted)]
+        )
+        recipe_ids = [recipe.id for recipe in recipes]
+        update_recipe_search_vectors(recipe_ids)
+        refresh_recipe_cards(recipe_ids)
+        bump_catalogue_version_on_commit(user.pk)
+
+    for recipe, (index, _, _) in zip(recipes, accepted):
+        results[index] = {"id": recipe.id}
+
+    return results
+
+
+def _item_ids(items, results):
+    ids = {}
+    seen = set()
+    for index, item in enumerate(items):
+        try:
+            pk = _id.run_validation(item["id"])
+        except (TypeError, KeyError):
+            results[index] = {"errors": {"id": ["A valid integer is required."]}}
+            continue
+        except ValidationError as exc:
+            results[index] = {"errors": {"id": exc.detail}}
+            continue
+        if pk in seen:
+            results[index] = {"errors": {"id": ["Duplicate item in payload."]}}
+            continue
+        seen.add(pk)
+        ids[index] = pk
+
+    return ids
+
+
+def update_recipes(user, items):
+    """Partially update recipes of `user`, returning one result per item"""
+    results = [None] * len(items)
+    ids = _item_ids(items, results)
+    recipes = Recipe.objects.filter(user=user).in_bulk(ids.values())
+
+    validated = []
+    for index, pk in ids.items():
+        recipe = recipes.get(pk)
+        if recipe is None:
+            results[index] = {"errors": {"id": ["Not found."]}}
+            continue
+        serializer = RecipeBulkSerializer(recipe, data=items[index], partial=True)
+        if serializer.is_valid():
+            validated.append((index, recipe, serializer.validated_data))
+        else:
+            results[index] = {"errors": serializer.errors}
+
+    accepted = _validate_related(user, validated, results)
+    # bulk_update() bypasses auto_now, stamp the rows explicitly
+    updated_at = timezone.now()
+    fields = {"updated_at"}
+    for _, recipe, data in accepted:
+        for key, value in _recipe_fields(data).items():
+            setattr(recipe, key, value)
+            fields.add(key)
+        recipe.updated_at = updated_at
+
+    with transaction.atomic():
+        if accepted:
+            Recipe.objects.bulk_update(
+                [recipe for _, recipe, _ in accepted],
+                sorted(fields),
+                batch_size=BATCH_SIZE,
+            )
+        write_related([(recipe, data) for _, recipe, data in accepted], replace=True)
+        recipe_ids = [recipe.id for _, recipe, _ in accepted]
+        update_recipe_search_vectors(recipe_ids)
+        refresh_recipe_cards(recipe_ids)
+        bump_catalogue_version_on_commit(user.pk)
+
+    for index, recipe, _ in accepted:
+        results[index] = {"id": recipe.id}
+
+    return results
+
+
+def delete_recipes(user, items):
+    """Delete recipes of `user` by id, returning one result per item"""
+    results = [None] * len(items)
+    ids = _item_ids([{"id": item} for item in items], results)
+    existing = set(
+        Recipe.objects.filter(user=user, id__in=ids.values()).values_list(
+            "id", flat=True
+        )
+    )
+
+    with transaction.atomic():
+        Recipe.objects.filter(id__in=existing).delete()
+
+    for index, pk in ids.items():
+        if pk in existing:
+            results[index] = {"id": pk}
+        else:
+            results[index] = {"errors": {"id": ["Not found."]}}
+
+    return results
@@ -0,0 +1,141 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+
+RESPONSE_CACHE_TIMEOUT = getattr(settings, "RECIPE_RESPONSE_CACHE_TIMEOUT", 300)
+
+
+def _version_key(user_id):
+    return f"recipe:catalogue-version:{user_id}"
+
+
+def get_catalogue_version(user_id):
+    """Return the version of a user's catalogue, used to key cached responses"""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter can't restart at a
+        # version that still has responses cached under it
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+
+    return version
+
+
+async def aget_catalogue_version(user_id):
+    """Async variant of `get_catalogue_version`"""
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+
+    return version
+
+
+def bump_catalogue_version(user_id):
+    """Invalidate every cached response of a user"""
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def bump_catalogue_version_on_commit(user_id):
+    """Invalidate every cached response of a user once the writes commit
+
+    Bumping before the commit would let a concurrent read cache the rows
+    as they were before under the new version.
+    """
+    transaction.on_commit(lambda: bump_catalogue_version(user_id))
+
+
+def make_etag(*parts):
+    """Return a strong ETag for the given version stamps"""
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+
+    return f'"{digest}"'
+
+
+def _cached(content, content_type, etag):
+    response = HttpResponse(content, content_type=content_type)
+    response["ETag"] = etag
+
+    return response
+
+
+def _response_key(request, version):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+
+    return f"recipe:response:{request.user.pk}:{version}:{path}"
+
+
+def _from_cache(request, cached):
+    content, content_type, etag = cached
+
+    return get_conditional_response(request, etag=etag) or _cached(
+        content, content_type, etag
+    )
+
+
+def _cache_on_render(response, key, etag, cacheable, timeout):
+    if response.status_code == 200 and etag is not None:
+        response["ETag"] = etag
+        if cacheable:
+            response.add_post_render_callback(
+                lambda response: cache.set(
+                    key, (response.content, response["Content-Type"], etag), timeout
+                )
+            )
+
+    return response
+
+
+def cached_response(request, get_response, get_etag, timeout=RESPONSE_CACHE_TIMEOUT):
+    """Serve a GET response conditionally and from the requesting user's cache
+
+    `get_etag` computes the ETag from cheap version stamps, so unchanged
+    resources are answered with 304 before anything is serialized. Only
+    JSON responses are cached.
+    """
+    key = None
+    cacheable = request.accepted_renderer.format == "json"
+    if cacheable:
+        key = _response_key(request, get_catalogue_version(request.user.pk))
+        cached = cache.get(key)
+        if cached is not None:
+            return _from_cache(request, cached)
+
+    etag = get_etag()
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    return _cache_on_render(get_response(), key, etag, cacheable, timeout)
+
+
+async def acached_response(
+    request, get_response, get_etag, timeout=RESPONSE_CACHE_TIMEOUT
+):
+    """Async variant of `cached_response` taking coroutine functions"""
+    key = None
+    cacheable = request.accepted_renderer.format == "json"
+    if cacheable:
+        version = await aget_catalogue_version(request.user.pk)
+        key = _response_key(request, version)
+        cached = await cache.aget(key)
+        if cached is not None:
+            return _from_cache(request, cached)
+
+    etag = await get_etag()
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    return _cache_on_render(await get_response(), key, etag, cacheable, timeout)
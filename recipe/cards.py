@@ -0,0 +1,110 @@
+"""Recipe cards, the detail payload of each recipe stored on its own row
+
+Serializing recipes joins them with two through tables and the tags and
+ingredients these point at. The `card` column holds the finished
+`RecipeDetailSerializer` payload instead, so `ReciepViewSet` lists and
+retrieves recipes by reading nothing but recipe rows, through the same
+`(user, id)` index and filters as before. `recipe.fieldsets` cuts the
+payloads served out of the cards.
+
+Cards are rebuilt by `refresh_recipe_cards` wherever a payload changes:
+recipe saves, M2M changes and renamed or deleted tags and ingredients
+through signals, the bulk writers, the importer and shared image variants.
+Recipe API writes rebuild each card once, see `recipe.signals.touching_once`.
+Cards found missing when read are built then, and the `check_recipe_cards`
+command compares every card with the source tables.
+"""
+
+from asgiref.sync import sync_to_async
+
+from recipe import fast_serializers
+from recipe.models import Recipe
+
+BATCH_SIZE = 1000
+
+
+def _batches(recipe_ids):
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        yield recipe_ids[start : start + BATCH_SIZE]
+
+
+def build_cards(recipe_ids):
+    """Return `{recipe id: card}` built from the source tables"""
+    rows = Recipe.objects.filter(id__in=list(recipe_ids)).values(
+        *fast_serializers.DETAIL_FIELDS
+    )
+
+    return {card["id"]: card for card in fast_serializers.serialize_details(rows)}
+
+
+def _store(cards):
+    # bulk_update() leaves `updated_at` alone, cards aren't edits
+    Recipe.objects.bulk_update(
+        [Recipe(id=pk, card=card) for pk, card in cards.items()],
+        ["card"],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def refresh_recipe_cards(recipe_ids):
+    """Rebuild and store the cards of `recipe_ids`, return them by recipe id"""
+    cards = {}
+    for batch in _batches(recipe_ids):
+        built = build_cards(batch)
+        _store(built)
+        cards.update(built)
+
+    return cards
+
+
+def check_cards(fix=False):
+    """Compare every card with the source tables, return how many are stale
+
+    Stale and missing cards are rebuilt if `fix` is set.
+    """
+    stale = 0
+    last_id = 0
+    while True:
+        rows = list(
+            Recipe.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "card")[:BATCH_SIZE]
+        )
+        if not rows:
+            return stale
+
+        last_id = rows[-1][0]
+        expected = build_cards(pk for pk, _ in rows)
+        drifted = {
+            pk: expected[pk]
+            for pk, card in rows
+            if pk in expected and card != expected[pk]
+        }
+        if fix:
+            _store(drifted)
+        stale += len(drifted)
+
+
+def _missing_ids(rows):
+    return [row["id"] for row in rows if row["card"] is None]
+
+
+def _fill(rows, built):
+    return [row["card"] or built.get(row["id"]) for row in rows]
+
+
+def fill_cards(rows):
+    """Return the card of each `.values()` row, building the missing ones
+
+    Recipes deleted before their missing card was built get `None`.
+    """
+    return _fill(rows, refresh_recipe_cards(_missing_ids(rows)))
+
+
+async def afill_cards(rows):
+    """Async variant of `fill_cards`"""
+    missing = _missing_ids(rows)
+    built = await sync_to_async(refresh_recipe_cards)(missing) if missing else {}
+
+    return _fill(rows, built)
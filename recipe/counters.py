@@ -0,0 +1,82 @@
+"""Maintenance of the denormalized `recipe_count` of tags and ingredients
+
+The counters are adjusted with `F()` expressions wherever through rows are
+written: M2M signals, the bulk writers and recipe deletes. Anything else
+that slips through is fixed by `reconcile_recipe_counts`.
+"""
+
+from collections import defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+RELATED_FIELDS = ("tags", "ingredients")
+BATCH_SIZE = 1000
+
+
+def related_through(recipe_model, field):
+    """Return the through model, related model and column of an M2M field"""
+    m2m = recipe_model._meta.get_field(field)
+
+    return m2m.remote_field.through, m2m.related_model, m2m.m2m_reverse_name()
+
+
+def adjust_recipe_counts(model, deltas):
+    """Add `deltas[pk]` to `recipe_count`, one UPDATE per distinct delta"""
+    pks_by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            pks_by_delta[delta].append(pk)
+
+    for delta, pks in pks_by_delta.items():
+        # Never below zero, drift is left to the reconcile command
+        model.objects.filter(pk__in=pks).update(
+            recipe_count=Greatest(F("recipe_count") + delta, Value(0))
+        )
+
+
+def related_counts(through, column, recipe_ids):
+    """Return `{related pk: rows}` of the through rows of `recipe_ids`"""
+    return dict(
+        through.objects.filter(recipe_id__in=recipe_ids)
+        .values(column)
+        .annotate(rows=Count("pk"))
+        .values_list(column, "rows")
+    )
+
+
+def release_recipes(recipe_model, recipe_ids):
+    """Decrement the counters of everything related to `recipe_ids`"""
+    for field in RELATED_FIELDS:
+        through, model, column = related_through(recipe_model, field)
+        counts = related_counts(through, column, recipe_ids)
+        adjust_recipe_counts(model, {pk: -rows for pk, rows in counts.items()})
+
+
+def actual_recipe_count(through, column):
+    return Coalesce(
+        Subquery(
+            through.objects.filter(**{column: OuterRef("pk")})
+            .values(column)
+            .annotate(rows=Count("pk"))
+            .values("rows")
+        ),
+        0,
+    )
+
+
+def reconcile_recipe_counts(recipe_model, field, dry_run=False):
+    """Recount the objects of `field` whose counter drifted, return how many"""
+    through, model, column = related_through(recipe_model, field)
+    actual = actual_recipe_count(through, column)
+    drifted = list(
+        model.objects.annotate(actual=actual)
+        .exclude(recipe_count=F("actual"))
+        .values_list("pk", flat=True)
+    )
+    if not dry_run:
+        for start in range(0, len(drifted), BATCH_SIZE):
+            batch = drifted[start : start + BATCH_SIZE]
+            model.objects.filter(pk__in=batch).update(recipe_count=actual)
+
+    return len(drifted)
@@ -0,0 +1,38 @@
+from itertools import islice
+
+from django.db.models import Prefetch, prefetch_related_objects
+from rest_framework.utils.encoders import JSONEncoder
+
+from recipe.models import Ingredient, Tag
+from recipe.serializers import RecipeDetailSerializer
+
+CHUNK_SIZE = 500
+
+
+def iter_chunks(queryset, chunk_size=CHUNK_SIZE):
+    """Yield lists of recipes read through a server-side cursor
+
+    `QuerySet.iterator()` ignores `prefetch_related()`, so tags and
+    ingredients are prefetched for each chunk instead.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        prefetch_related_objects(
+            chunk,
+            Prefetch("tags", queryset=Tag.objects.order_by("id")),
+            Prefetch("ingredients", queryset=Ingredient.objects.order_by("id")),
+        )
+        yield chunk
+
+
+def iter_ndjson(queryset, chunk_size=CHUNK_SIZE):
+    """Yield one JSON encoded `RecipeDetailSerializer` payload per line"""
+    encoder = JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    for chunk in iter_chunks(queryset, chunk_size):
+        yield "".join(
+            encoder.encode(RecipeDetailSerializer(recipe).data) + "\n"
+            for recipe in chunk
+        )
@@ -0,0 +1,64 @@
+"""Read-only serialization of recipes straight from `.values()` rows
+
+These build the exact payloads of `RecipeDetailSerializer` without model
+instances or per-field serializer machinery, which is how `recipe.cards`
+builds the cards list and detail payloads are cut from. Related objects
+are always ordered by id.
+"""
+
+from collections import defaultdict
+
+from recipe.images import image_urls, variant_urls
+from recipe.models import Recipe
+from recipe.serializers import RecipeSerializer
+
+FIELDS = ("id", "title", "time_minutes", "price", "link", "image_variants")
+DETAIL_FIELDS = FIELDS + ("image",)
+RELATED = {
+    "tags": ("tag_id", "tag__name"),
+    "ingredients": ("ingredient_id", "ingredient__name"),
+}
+
+_price = RecipeSerializer().fields["price"].to_representation
+
+
+def _related_rows(field, recipe_ids):
+    through = getattr(Recipe, field).through
+    column, name = RELATED[field]
+
+    return (
+        through.objects.filter(recipe_id__in=recipe_ids)
+        .order_by(column)
+        .values_list("recipe_id", column, name)
+    )
+
+
+def _detail_payload(row, related):
+    data = {
+        "id": row["id"],
+        "title": row["title"],
+        "time_minutes": row["time_minutes"],
+        "price": _price(row["price"]),
+        "link": row["link"],
+    }
+    for field in RELATED:
+        data[field] = [{"id": pk, "name": name} for _, pk, name in related[field]]
+    data["thumbnail"] = variant_urls(row["image_variants"], "thumbnail")
+    data["image"] = image_urls(row["image"], row["image_variants"])
+
+    return data
+
+
+def serialize_details(rows):
+    """Build the detail payloads of `.values()` rows, fetching related rows once"""
+    rows = list(rows)
+    ids = [row["id"] for row in rows]
+    grouped = {field: defaultdict(list) for field in RELATED}
+    for field in RELATED:
+        for item in _related_rows(field, ids):
+            grouped[field][item[0]].append(item)
+
+    return [
+        _detail_payload(row, {field: grouped[field][row["id"]] for field in RELATED})
+        for row in rows
+    ]
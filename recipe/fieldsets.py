@@ -0,0 +1,141 @@
+"""Recipe payloads cut down to the fields and relations a client asks for
+
+`?fields=title,thumbnail` limits payloads to the listed fields, `id` is
+always included. `?expand=tags,ingredients` renders those relations of
+list payloads as `{"id", "name"}` objects instead of ids, as detail
+payloads always do, and adds them to the fields.
+
+Reads follow the fields too. Payloads with relations are cut from the
+stored cards, see `recipe.cards`, which already hold related names, so
+expanding costs no query. Payloads without relations read only the
+columns of their fields.
+"""
+
+from rest_framework.exceptions import ValidationError
+
+from recipe import cards
+from recipe.fast_serializers import RELATED
+from recipe.images import image_urls, variant_urls
+from recipe.serializers import RecipeSerializer
+
+LIST_FIELDS = (
+    "id",
+    "title",
+    "time_minutes",
+    "price",
+    "link",
+    "tags",
+    "ingredients",
+    "thumbnail",
+)
+DETAIL_FIELDS = LIST_FIELDS + ("image",)
+# Columns read to render each field without the card
+COLUMNS = {
+    "id": ("id",),
+    "title": ("title",),
+    "time_minutes": ("time_minutes",),
+    "price": ("price",),
+    "link": ("link",),
+    "thumbnail": ("image_variants",),
+    "image": ("image", "image_variants"),
+}
+
+_price = RecipeSerializer().fields["price"].to_representation
+
+
+def _parse(param, value, choices):
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    invalid = sorted(names.difference(choices))
+    if invalid:
+        raise ValidationError(
+            {param: [f'"{name}" is not a valid choice.' for name in invalid]}
+        )
+
+    return names
+
+
+def _render_column(field, row):
+    if field == "price":
+        return _price(row["price"])
+    if field == "thumbnail":
+        return variant_urls(row["image_variants"], "thumbnail")
+    if field == "image":
+        return image_urls(row["image"], row["image_variants"])
+
+    return row[field]
+
+
+class Fieldset:
+    """The fields of recipe payloads and the relations they expand"""
+
+    def __init__(self, fields, expand=()):
+        self.fields = tuple(fields)
+        self.expand = frozenset(expand)
+        self.uses_cards = any(field in RELATED for field in self.fields)
+
+    @classmethod
+    def from_params(cls, params, detail=False):
+        """Return the fieldset requested by `?fields=` and `?expand=`"""
+        choices = DETAIL_FIELDS if detail else LIST_FIELDS
+        expand = _parse("expand", params.get("expand", ""), RELATED)
+        fields = params.get("fields")
+        requested = _parse("fields", fields, choices) if fields else set(choices)
+        requested |= expand | {"id"}
+
+        return cls(
+            [field for field in choices if field in requested],
+            RELATED if detail else expand,
+        )
+
+    @property
+    def key(self):
+        """Identifies the fieldset in ETags"""
+        return self.fields, tuple(sorted(self.expand))
+
+    def values(self, queryset):
+        """Return `queryset` as the rows needed by `serialize`"""
+        if self.uses_cards:
+            columns = ("id", "card")
+        else:
+            columns = tuple(
+                dict.fromkeys(
+                    column for field in self.fields for column in COLUMNS[field]
+                )
+            )
+        ranked = tuple(
+            name for name in ("search_rank",) if name in queryset.query.annotations
+        )
+
+        return queryset.values(*columns, *ranked)
+
+    def _cut(self, card):
+        payload = {}
+        for field in self.fields:
+            value = card[field]
+            if field in RELATED and field not in self.expand:
+                value = [related["id"] for related in value]
+            payload[field] = value
+
+        return payload
+
+    def _render(self, row):
+        return {field: _render_column(field, row) for field in self.fields}
+
+    def serialize(self, rows):
+        """Build the payloads of rows of `values`
+
+        Recipes deleted before their missing card was built are left out.
+        """
+        rows = list(rows)
+        if not self.uses_cards:
+            return [self._render(row) for row in rows]
+
+        return [self._cut(card) for card in cards.fill_cards(rows) if card]
+
+    async def aserialize(self, rows):
+        """Async variant of `serialize`"""
+        rows = list(rows)
+        if not self.uses_cards:
+            return [self._render(row) for row in rows]
+
+        return [self._cut(card) for card in await cards.afill_cards(rows) if card]
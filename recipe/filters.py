@@ -0,0 +1,94 @@
+from django.db.backends.base.operations import BaseDatabaseOperations
+from django.db.models import Count
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from recipe.models import Recipe
+
+# Bounds of the columns filtered on, drivers overflow on larger numbers
+# and SQLite doesn't report any bounds
+ID_MIN, ID_MAX = BaseDatabaseOperations.integer_field_ranges["BigAutoField"]
+INT_MIN, INT_MAX = BaseDatabaseOperations.integer_field_ranges["IntegerField"]
+_price_column = Recipe._meta.get_field("price")
+
+RELATED_FILTERS = {"tags": "tag_id", "ingredients": "ingredient_id"}
+_minutes = serializers.IntegerField(min_value=INT_MIN, max_value=INT_MAX)
+_price = serializers.DecimalField(
+    max_digits=_price_column.max_digits, decimal_places=_price_column.decimal_places
+)
+RANGE_FILTERS = {
+    "time_minutes_min": ("time_minutes__gte", _minutes),
+    "time_minutes_max": ("time_minutes__lte", _minutes),
+    "price_min": ("price__gte", _price),
+    "price_max": ("price__lte", _price),
+}
+MATCH_CHOICES = ("any", "all")
+
+
+def _parse_ids(param, value):
+    try:
+        ids = {int(pk) for pk in value.split(",") if pk.strip()}
+    except ValueError:
+        ids = None
+    if ids is None or not all(ID_MIN <= pk <= ID_MAX for pk in ids):
+        raise ValidationError({param: ["Expected a comma separated list of ids."]})
+
+    return ids
+
+
+def _related_filter(field, ids, match):
+    """Return recipe ids related to any or all of `ids` through `field`
+
+    Reads only the through table, so it is served by its reverse index.
+    """
+    through = getattr(Recipe, field).through
+    column = RELATED_FILTERS[field]
+    rows = through.objects.filter(**{f"{column}__in": ids})
+    if match == "all":
+        rows = (
+            rows.values("recipe_id")
+            .annotate(matched=Count(column))
+            .filter(matched=len(ids))
+        )
+
+    return rows.values("recipe_id")
+
+
+def filter_recipes(queryset, params):
+    """Apply the related and range filters found in `params` to recipes"""
+    match = params.get("match", "any")
+    if match not in MATCH_CHOICES:
+        raise ValidationError({"match": [f'"{match}" is not a valid choice.']})
+
+    for field in RELATED_FILTERS:
+        value = params.get(field)
+        if value:
+            ids = _parse_ids(field, value)
+            queryset = queryset.filter(id__in=_related_filter(field, ids, match))
+
+    for param, (lookup, field) in RANGE_FILTERS.items():
+        value = params.get(param)
+        if value is None:
+            continue
+        try:
+            value = field.run_validation(value)
+        except ValidationError as exc:
+            raise ValidationError({param: exc.detail})
+        queryset = queryset.filter(**{lookup: value})
+
+    return queryset
+
+
+def filter_assigned(queryset, params):
+    """Keep the tags or ingredients used by a recipe on `assigned_only=1`
+
+    Reads the maintained `recipe_count` instead of probing the through table.
+    """
+    value = params.get("assigned_only", "0")
+    if value not in ("0", "1"):
+        raise ValidationError({"assigned_only": [f'"{value}" is not a valid choice.']})
+
+    if value == "1":
+        queryset = queryset.filter(recipe_count__gt=0)
+
+    return queryset
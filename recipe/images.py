@@ -0,0 +1,142 @@
+"""Resized and WebP variants of recipe images
+
+Uploads are stored as is, see `recipe.blobs`, their variants are rendered
+by a pool of worker threads once the upload's transaction commits, so
+requests never wait on image processing. Variants are rendered once per
+distinct image and copied onto every recipe using it. Until they are
+ready, `image_variants` is empty and payloads carry no thumbnail.
+
+Pillow releases the GIL while it decodes, resizes and encodes, so threads
+keep the CPU busy without the start-up cost and pickling of a process
+pool.
+"""
+
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.workers import get_executor, run_in_worker
+from recipe.cache import bump_catalogue_version_on_commit
+from recipe.models import ImageBlob, Recipe
+
+logger = logging.getLogger(__name__)
+
+# Sent with `sender=Recipe, recipe_ids=[...]` once recipes got new variants
+variants_shared = Signal()
+
+# Longest side in pixels of each variant, each rendered in every format
+SIZES = getattr(settings, "RECIPE_IMAGE_SIZES", {"thumbnail": 320, "medium": 1024})
+FORMATS = {"jpeg": "jpg", "webp": "webp"}
+QUALITY = 85
+
+
+def variant_name(name, variant, format):
+    stem = os.path.splitext(name)[0]
+
+    return f"{stem}_{variant}.{FORMATS[format]}"
+
+
+def variant_urls(variants, variant):
+    """Return `{format: url}` of one variant, `None` until it's rendered"""
+    names = variants.get(variant) if variants else None
+    if not names:
+        return None
+
+    return {format: default_storage.url(name) for format, name in names.items()}
+
+
+def image_urls(name, variants):
+    """Return the URLs of an image and of all its variants"""
+    if not name:
+        return None
+
+    return {
+        "original": default_storage.url(name),
+        **{variant: variant_urls(variants, variant) for variant in SIZES},
+    }
+
+
+def render_variants(name):
+    """Write every variant of the stored image `name`, return their names"""
+    variants = {}
+    with default_storage.open(name) as file, Image.open(file) as image:
+        # Let the JPEG decoder downscale while decoding, far cheaper than
+        # decoding at full size and resizing afterwards
+        largest = max(SIZES.values())
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+
+        for variant, size in sorted(SIZES.items(), key=lambda item: -item[1]):
+            image.thumbnail((size, size))
+            variants[variant] = {}
+            for format in FORMATS:
+                buffer = BytesIO()
+                image.save(buffer, format=format, quality=QUALITY)
+                variants[variant][format] = default_storage.save(
+                    variant_name(name, variant, format), ContentFile(buffer.getvalue())
+                )
+
+    return variants
+
+
+def delete_image(name, variants):
+    """Delete an image and its variants from storage"""
+    names = [name] if name else []
+    for formats in (variants or {}).values():
+        names.extend(formats.values())
+    for name in names:
+        default_storage.delete(name)
+
+
+def share_variants(digest, variants):
+    """Copy a blob's variants onto the recipes using it"""
+    recipes = Recipe.objects.filter(image_blob_id=digest)
+    rows = list(recipes.values_list("id", "user_id"))
+    recipes.update(image_variants=variants, updated_at=timezone.now())
+    variants_shared.send(sender=Recipe, recipe_ids=[pk for pk, _ in rows])
+    for user_id in {user_id for _, user_id in rows}:
+        bump_catalogue_version_on_commit(user_id)
+
+
+def generate_variants(digest):
+    """Render the variants of an image blob and share them with its recipes
+
+    Rendering is skipped if an earlier run already did it.
+    """
+    blob = ImageBlob.objects.filter(digest=digest).first()
+    if blob is None:
+        return
+
+    variants = blob.variants
+    if not variants:
+        try:
+            variants = render_variants(blob.name)
+        except Exception:
+            logger.exception("failed to render the variants of %s", blob.name)
+            return
+        ImageBlob.objects.filter(digest=digest).update(variants=variants)
+
+    share_variants(digest, variants)
+
+
+def schedule_variants(digest):
+    """Render the variants of a blob once the transaction commits
+
+    With `RECIPE_IMAGE_WORKERS = 0` they are rendered in the calling thread.
+    """
+    if settings.RECIPE_IMAGE_WORKERS:
+        transaction.on_commit(
+            lambda: get_executor("recipe-images", settings.RECIPE_IMAGE_WORKERS).submit(
+                run_in_worker, generate_variants, digest
+            )
+        )
+    else:
+        transaction.on_commit(lambda: generate_variants(digest))
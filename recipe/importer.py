@@ -0,0 +1,176 @@
+import csv
+import json
+import time
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
+from rest_framework.exceptions import ValidationError
+
+from recipe.bulk import BATCH_SIZE, RELATED_MODELS, write_related
+from recipe.cache import bump_catalogue_version_on_commit
+from recipe.cards import refresh_recipe_cards
+from recipe.models import Recipe
+from recipe.search import update_recipe_search_vectors
+from recipe.serializers import RecipeImportSerializer
+
+FORMATS = ("ndjson", "csv")
+CSV_LIST_SEPARATOR = ";"
+# Raised while reading files that aren't UTF-8 text or well-formed CSV
+READ_ERRORS = (UnicodeDecodeError, csv.Error)
+
+
+def guess_format(filename):
+    return "csv" if filename.lower().endswith(".csv") else "ndjson"
+
+
+def _parse_ndjson(stream):
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            yield ValidationError({"non_field_errors": [f"Invalid JSON: {exc}"]})
+
+
+def _parse_csv(stream):
+    for row in csv.DictReader(stream):
+        for field in RELATED_MODELS:
+            value = row.get(field)
+            if value is None:
+                continue
+            row[field] = [
+                name.strip() for name in value.split(CSV_LIST_SEPARATOR) if name.strip()
+            ]
+        yield row
+
+
+def parse_records(stream, format):
+    """Yield one dict per record of a text stream in `format`"""
+    if format == "csv":
+        return _parse_csv(stream)
+    return _parse_ndjson(stream)
+
+
+class RecipeImporter:
+    """Imports recipe records for a user in batches
+
+    Tag and ingredient names are resolved with one lookup and one bulk
+    insert per batch, and remembered for the rest of the import.
+    """
+
+    max_errors = 100
+
+    def __init__(self, user, batch_size=BATCH_SIZE, progress=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.progress = progress
+        self.ids_by_name = {field: {} for field in RELATED_MODELS}
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.started_at = None
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started_at if self.started_at else 0.0
+
+    @property
+    def rate(self):
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+    def run(self, records):
+        self.started_at = time.monotonic()
+        records = enumerate(records, start=1)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+            self._import_batch(batch)
+            if self.progress is not None:
+                self.progress(self)
+
+        return self
+
+    def _add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "errors": errors})
+
+    def _import_batch(self, batch):
+        serializer = RecipeImportSerializer()
+        valid = []
+        for line, record in batch:
+            try:
+                if isinstance(record, ValidationError):
+                    raise record
+                valid.append(serializer.run_validation(record))
+            except ValidationError as exc:
+                self._add_error(line, exc.detail)
+
+        with transaction.atomic():
+            for field in RELATED_MODELS:
+                self._resolve_names(field, valid)
+            recipes = Recipe.objects.bulk_create(
+                [
+                    Recipe(
+                        user=self.user,
+                        **{k: v for k, v in data.items() if k not in RELATED_MODELS},
+                    )
+                    for data in valid
+                ],
+                batch_size=self.batch_size,
+            )
+            write_related(
+                [
+                    (recipe, self._related_ids(data))
+                    for recipe, data in zip(recipes, valid)
+                ]
+            )
+            recipe_ids = [recipe.id for recipe in recipes]
+            update_recipe_search_vectors(recipe_ids)
+            refresh_recipe_cards(recipe_ids)
+            bump_catalogue_version_on_commit(self.user.pk)
+
+        self.created += len(recipes)
+
+    def _resolve_names(self, field, valid):
+        """Get or create the tags or ingredients named in a batch
+
+        Names are matched case-insensitively, like the unique constraint.
+        """
+        model = RELATED_MODELS[field]
+        known = self.ids_by_name[field]
+        missing = {}
+        for data in valid:
+            for name in data.get(field, ()):
+                if name.lower() not in known:
+                    missing.setdefault(name.lower(), name)
+        if not missing:
+            return
+
+        # Rows created concurrently are skipped here and read back below
+        model.objects.bulk_create(
+            [model(user=self.user, name=name) for name in missing.values()],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        existing = (
+            model.objects.filter(user=self.user)
+            .alias(lower_name=Lower("name"))
+            .filter(lower_name__in=[Lower(Value(name)) for name in missing.values()])
+            .values_list("id", "name")
+        )
+        for pk, name in existing:
+            known[name.lower()] = pk
+
+    def _related_ids(self, data):
+        related = {}
+        for field in RELATED_MODELS:
+            if field in data:
+                ids = self.ids_by_name[field]
+                related[field] = [ids[name.lower()] for name in data[field]]
+
+        return related
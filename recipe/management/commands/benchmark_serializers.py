@@ -0,0 +1,67 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from benchmarks.generators import create_catalogue
+from recipe.cards import refresh_recipe_cards
+from recipe.fieldsets import Fieldset
+from recipe.models import Ingredient, Recipe, Tag
+from recipe.serializers import RecipeSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare RecipeSerializer with listing from the stored cards"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        # Synthetic rows are rolled back once measured
+        with transaction.atomic():
+            user = get_user_model().objects.create_user("benchmark@example.com")
+            created = 0
+            for rows in sorted(options["rows"]):
+                create_catalogue(user, rows - created)
+                created = rows
+                self.compare(user, rows, options["repeat"])
+            transaction.set_rollback(True)
+
+    def time(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started_at
+            best = elapsed if best is None else min(best, elapsed)
+
+        return best
+
+    def compare(self, user, rows, repeat):
+        queryset = Recipe.objects.filter(user=user).order_by("id")
+        # Bulk created rows have no cards yet, build them outside the timings
+        refresh_recipe_cards(list(queryset.values_list("id", flat=True)))
+        fieldset = Fieldset.from_params({})
+
+        def serializer():
+            recipes = queryset.prefetch_related(
+                Prefetch("tags", queryset=Tag.objects.only("id").order_by("id")),
+                Prefetch(
+                    "ingredients",
+                    queryset=Ingredient.objects.only("id").order_by("id"),
+                ),
+            )
+            return RecipeSerializer(recipes, many=True).data
+
+        def cards():
+            return fieldset.serialize(fieldset.values(queryset))
+
+        slow = self.time(serializer, repeat)
+        fast = self.time(cards, repeat)
+        self.stdout.write(
+            f"{rows} rows: RecipeSerializer {slow * 1000:.1f}ms, "
+            f"cards {fast * 1000:.1f}ms, {slow / fast:.1f}x faster"
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.cards import check_cards
+
+
+class Command(BaseCommand):
+    help = "Verify the stored recipe cards against the recipes they describe"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Rebuild the stale and missing cards found",
+        )
+
+    def handle(self, *args, **options):
+        stale = check_cards(options["fix"])
+        if options["fix"]:
+            self.stdout.write(self.style.SUCCESS(f"{stale} recipe cards rebuilt"))
+        elif stale:
+            raise CommandError(f"{stale} recipe cards are stale, rerun with --fix")
+        else:
+            self.stdout.write(self.style.SUCCESS("All recipe cards are up to date"))
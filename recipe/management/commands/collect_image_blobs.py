@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from recipe.blobs import collect_garbage, collect_orphans, reconcile_ref_counts
+
+
+class Command(BaseCommand):
+    help = "Delete recipe images no recipe has used for a while"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=24 * 60 * 60,
+            help="Seconds an image must have been unused, defaults to a day",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be deleted",
+        )
+
+    def handle(self, *args, **options):
+        min_age, dry_run = options["min_age"], options["dry_run"]
+        verb = "to collect" if dry_run else "collected"
+
+        drifted = reconcile_ref_counts(dry_run)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{drifted} reference counts {'drifted' if dry_run else 'fixed'}"
+            )
+        )
+        blobs = collect_garbage(min_age, dry_run)
+        self.stdout.write(self.style.SUCCESS(f"{blobs} image blobs {verb}"))
+        orphans = collect_orphans(min_age, dry_run)
+        self.stdout.write(self.style.SUCCESS(f"{orphans} orphaned files {verb}"))
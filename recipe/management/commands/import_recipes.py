@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.bulk import BATCH_SIZE
+from recipe.importer import (
+    FORMATS,
+    READ_ERRORS,
+    RecipeImporter,
+    guess_format,
+    parse_records,
+)
+
+
+class Command(BaseCommand):
+    help = "Import recipes for a user from an NDJSON or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("email", help="Email of the user owning the recipes")
+        parser.add_argument("path", help="File to import")
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options["email"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['email']} does not exist")
+
+        format = options["format"] or guess_format(options["path"])
+        importer = RecipeImporter(
+            user, batch_size=options["batch_size"], progress=self.report
+        )
+        with open(options["path"], newline="", encoding="utf-8") as stream:
+            try:
+                importer.run(parse_records(stream, format))
+            except READ_ERRORS as exc:
+                raise CommandError(
+                    f"{options['path']} can't be read after {importer.created} "
+                    f"recipes were imported: {exc}"
+                )
+
+        for error in importer.errors:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {importer.created} recipes, {importer.failed} failed "
+                f"in {importer.elapsed:.1f}s ({importer.rate:.0f} recipes/s)"
+            )
+        )
+
+    def report(self, importer):
+        self.stdout.write(
+            f"{importer.created} imported, {importer.failed} failed, "
+            f"{importer.rate:.0f} recipes/s"
+        )
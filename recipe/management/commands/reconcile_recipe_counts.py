@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from recipe.counters import RELATED_FIELDS, reconcile_recipe_counts
+from recipe.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Recount the recipe_count of tags and ingredients that drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many counters drifted",
+        )
+
+    def handle(self, *args, **options):
+        verb = "drifted" if options["dry_run"] else "fixed"
+        for field in RELATED_FIELDS:
+            drifted = reconcile_recipe_counts(Recipe, field, options["dry_run"])
+            self.stdout.write(self.style.SUCCESS(f"{drifted} {field} counts {verb}"))
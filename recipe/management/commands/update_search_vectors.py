@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.models import Recipe
+from recipe.search import BATCH_SIZE, is_supported, update_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Backfill the full-text search vector of existing recipes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="Only update recipes without a search vector",
+        )
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            raise CommandError("Full-text search requires a Postgres database")
+
+        queryset = Recipe.objects.all()
+        if options["missing_only"]:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        # Walk id ranges so each UPDATE touches a bounded number of rows
+        updated = 0
+        last_id = 0
+        while True:
+            ids = list(
+                queryset.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[: options["batch_size"]]
+            )
+            if not ids:
+                break
+            updated += update_search_vectors(Recipe.objects.filter(id__in=ids))
+            last_id = ids[-1]
+            self.stdout.write(f"{updated} recipes updated")
+
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} recipes"))
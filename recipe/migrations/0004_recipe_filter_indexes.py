@@ -0,0 +1,37 @@
+# Generated by Django 4.0.3 on 2026-10-18 05:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0003_recipe'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'name'], name='ingredient_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'id'], name='recipe_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'name'], name='tag_user_name_idx'),
+        ),
+        # Auto-created M2M tables only index (recipe_id, <related>_id), add
+        # the reverse order so filtering recipes by related ids is index-only
+        migrations.RunSQL(
+            'CREATE INDEX recipe_tags_reverse_idx '
+            'ON recipe_recipe_tags (tag_id, recipe_id)',
+            'DROP INDEX recipe_tags_reverse_idx',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX recipe_ingredients_reverse_idx '
+            'ON recipe_recipe_ingredients (ingredient_id, recipe_id)',
+            'DROP INDEX recipe_ingredients_reverse_idx',
+        ),
+    ]
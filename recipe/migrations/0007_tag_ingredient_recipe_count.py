@@ -0,0 +1,51 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:07
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_recipes(apps, schema_editor):
+    Recipe = apps.get_model("recipe", "Recipe")
+    for field, column in (("tags", "tag_id"), ("ingredients", "ingredient_id")):
+        m2m = Recipe._meta.get_field(field)
+        rows = (
+            m2m.remote_field.through.objects.filter(**{column: OuterRef("pk")})
+            .values(column)
+            .annotate(rows=Count("pk"))
+            .values("rows")
+        )
+        m2m.related_model.objects.update(recipe_count=Coalesce(Subquery(rows), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0006_recipe_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingredient",
+            name="recipe_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="tag",
+            name="recipe_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(
+                fields=["user", "-recipe_count", "id"], name="ingredient_user_count_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tag",
+            index=models.Index(
+                fields=["user", "-recipe_count", "id"], name="tag_user_count_idx"
+            ),
+        ),
+        migrations.RunPython(count_recipes, migrations.RunPython.noop),
+    ]
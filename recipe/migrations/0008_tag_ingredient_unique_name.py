@@ -0,0 +1,86 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:12
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Lower
+from django.utils import timezone
+import django.db.models.functions.text
+
+
+def merge_duplicates(apps, schema_editor):
+    """Fold tags and ingredients differing only in case into the oldest one"""
+    Recipe = apps.get_model("recipe", "Recipe")
+    for field, column in (("tags", "tag_id"), ("ingredients", "ingredient_id")):
+        m2m = Recipe._meta.get_field(field)
+        model, through = m2m.related_model, m2m.remote_field.through
+        groups = (
+            model.objects.annotate(lower_name=Lower("name"))
+            .values("user_id", "lower_name")
+            .annotate(keep=Min("id"), rows=Count("id"))
+            .filter(rows__gt=1)
+        )
+        touched = set()
+        for group in groups:
+            duplicates = list(
+                model.objects.annotate(lower_name=Lower("name"))
+                .filter(user_id=group["user_id"], lower_name=group["lower_name"])
+                .exclude(id=group["keep"])
+                .values_list("id", flat=True)
+            )
+            # Re-point one through row per recipe, drop the ones the kept
+            # object already has
+            linked = set(
+                through.objects.filter(**{column: group["keep"]}).values_list(
+                    "recipe_id", flat=True
+                )
+            )
+            repoint, drop = [], []
+            rows = through.objects.filter(**{f"{column}__in": duplicates})
+            for row_id, recipe_id in rows.values_list("id", "recipe_id"):
+                (drop if recipe_id in linked else repoint).append(row_id)
+                linked.add(recipe_id)
+                touched.add(recipe_id)
+            through.objects.filter(id__in=drop).delete()
+            through.objects.filter(id__in=repoint).update(**{column: group["keep"]})
+            model.objects.filter(id__in=duplicates).delete()
+
+        rows = (
+            through.objects.filter(**{column: OuterRef("pk")})
+            .values(column)
+            .annotate(rows=Count("pk"))
+            .values("rows")
+        )
+        model.objects.update(recipe_count=Coalesce(Subquery(rows), 0))
+        # Their payloads changed, so must their ETags
+        Recipe.objects.filter(id__in=touched).update(updated_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+    # Postgres won't create the unique indexes in the transaction deleting
+    # the duplicates, their foreign key triggers are still pending. The
+    # merge commits on its own first.
+    atomic = False
+
+    dependencies = [
+        ("recipe", "0007_tag_ingredient_recipe_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop, atomic=True),
+        migrations.AddConstraint(
+            model_name="ingredient",
+            constraint=models.UniqueConstraint(
+                models.F("user"),
+                django.db.models.functions.text.Lower("name"),
+                name="ingredient_user_lower_name_uniq",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="tag",
+            constraint=models.UniqueConstraint(
+                models.F("user"),
+                django.db.models.functions.text.Lower("name"),
+                name="tag_user_lower_name_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:16
+
+from django.db import migrations, models
+import recipe.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0008_tag_ingredient_unique_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="image",
+            field=models.ImageField(
+                blank=True, null=True, upload_to=recipe.models.recipe_image_file_path
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
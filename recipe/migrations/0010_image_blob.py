@@ -0,0 +1,115 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:21
+
+import hashlib
+import os
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models, transaction
+import django.db.models.deletion
+
+
+def delete_files(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+def move_to_blobs(apps, schema_editor):
+    """Store the images uploaded so far as content-addressed blobs
+
+    The files moved are only deleted once the migration committed, rows
+    rolled back keep pointing at them.
+    """
+    Recipe = apps.get_model("recipe", "Recipe")
+    ImageBlob = apps.get_model("recipe", "ImageBlob")
+    names = (
+        Recipe.objects.exclude(image__isnull=True)
+        .exclude(image="")
+        .values_list("image", flat=True)
+        .distinct()
+    )
+    moved = []
+    for name in list(names):
+        if not default_storage.exists(name):
+            continue
+        hash = hashlib.sha256()
+        with default_storage.open(name) as file:
+            for chunk in file.chunks():
+                hash.update(chunk)
+        digest = hash.hexdigest()
+
+        recipes = Recipe.objects.filter(image=name)
+        blob = ImageBlob.objects.filter(digest=digest).first()
+        if blob is None:
+            ext = os.path.splitext(name)[1].lower()
+            blob_name = os.path.join("blobs", digest[:2], digest[2:4], f"{digest}{ext}")
+            with default_storage.open(name) as file:
+                blob_name = default_storage.save(blob_name, file)
+            blob = ImageBlob.objects.create(
+                digest=digest,
+                name=blob_name,
+                size=default_storage.size(name),
+                variants=recipes.values_list("image_variants", flat=True).first(),
+            )
+        else:
+            # A duplicate, its variants go along with its file
+            variants = recipes.values_list("image_variants", flat=True).first()
+            for formats in variants.values():
+                moved.extend(formats.values())
+        count = recipes.update(
+            image=blob.name, image_blob=blob, image_variants=blob.variants
+        )
+        ImageBlob.objects.filter(digest=digest).update(
+            ref_count=models.F("ref_count") + count
+        )
+        moved.append(name)
+
+    transaction.on_commit(
+        lambda: delete_files(moved), using=schema_editor.connection.alias
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0009_recipe_image"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImageBlob",
+            fields=[
+                (
+                    "digest",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("name", models.CharField(max_length=255)),
+                ("size", models.PositiveBigIntegerField()),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("released_at", models.DateTimeField(blank=True, null=True)),
+                ("variants", models.JSONField(blank=True, default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("ref_count", 0)),
+                        fields=["released_at"],
+                        name="imageblob_unreferenced_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="image_blob",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="recipes",
+                to="recipe.imageblob",
+            ),
+        ),
+        migrations.RunPython(move_to_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0010_image_blob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="card",
+            field=models.JSONField(editable=False, null=True),
+        ),
+    ]
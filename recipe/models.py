@@ -1,23 +1,170 @@
-from django.db import models
+import os
+import uuid
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models, transaction
+from django.db.models.functions import Lower
+from django.db.models.signals import post_save
 from django.conf import settings
 
+from recipe.counters import release_recipes
+
+
+def recipe_image_file_path(instance, filename):
+    """Generate a unique path for an uploaded recipe image"""
+    ext = os.path.splitext(filename)[1].lower()
+
+    return os.path.join("uploads", "recipe", f"{uuid.uuid4()}{ext}")
+
+
+class UserNamedQuerySet(models.QuerySet):
+    def get_or_create_by_name(self, user, name):
+        """Return `(object, created)` for the user's object of `name` in any case
+
+        A single `INSERT ... ON CONFLICT DO NOTHING` against the unique
+        `(user, lower(name))` constraint either creates the row or leaves
+        the existing one, which is then read. Concurrent creates can't
+        race into duplicates or errors.
+        """
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        sql = (
+            f"INSERT INTO {quote(self.model._meta.db_table)} "
+            f"({quote('user_id')}, {quote('name')}, {quote('recipe_count')}) "
+            f"VALUES (%s, %s, 0) ON CONFLICT DO NOTHING RETURNING {quote('id')}"
+        )
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [user.pk, name])
+                row = cursor.fetchone()
+            if row is not None:
+                obj = self.model(id=row[0], user=user, name=name, recipe_count=0)
+                post_save.send(
+                    sender=self.model,
+                    instance=obj,
+                    created=True,
+                    update_fields=None,
+                    raw=False,
+                    using=self.db,
+                )
+                return obj, True
+
+            existing = (
+                self.alias(lower_name=Lower("name"))
+                .filter(user=user, lower_name=Lower(models.Value(name)))
+                .first()
+            )
+            # Unless it was deleted in the meantime, then insert again
+            if existing is not None:
+                return existing, False
 
-class Tag(models.Model):
+
+class RecipeCountedMixin:
+    """Keeps saves of existing rows from writing `recipe_count` back
+
+    The counter is adjusted in the database by `recipe.counters`, the value
+    loaded with an instance is stale as soon as a recipe links to it.
+    """
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "recipe_count"
+            ]
+        super().save(*args, **kwargs)
+
+
+class Tag(RecipeCountedMixin, models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     name = models.CharField(max_length=50)
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = UserNamedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                "user", Lower("name"), name="tag_user_lower_name_uniq"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["user", "name"], name="tag_user_name_idx"),
+            models.Index(
+                fields=["user", "-recipe_count", "id"], name="tag_user_count_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Ingredient(models.Model):
+class Ingredient(RecipeCountedMixin, models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     name = models.CharField(max_length=50)
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = UserNamedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                "user", Lower("name"), name="ingredient_user_lower_name_uniq"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["user", "name"], name="ingredient_user_name_idx"),
+            models.Index(
+                fields=["user", "-recipe_count", "id"],
+                name="ingredient_user_count_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class ImageBlob(models.Model):
+    """An uploaded image stored once, under the SHA-256 of its content
+
+    `ref_count` is the number of recipes using the image, maintained by
+    `recipe.blobs`. Blobs unreferenced for long enough are deleted along
+    with their files by the `collect_image_blobs` command.
+    """
+
+    digest = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    released_at = models.DateTimeField(null=True, blank=True)
+    # Resized copies by size and format, rendered once per blob
+    variants = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["released_at"],
+                condition=models.Q(ref_count=0),
+                name="imageblob_unreferenced_idx",
+            )
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class RecipeQuerySet(models.QuerySet):
+    def delete(self):
+        # Deleting recipes drops their through rows without m2m_changed,
+        # so the counters of their tags and ingredients are released here
+        with transaction.atomic(using=self.db, savepoint=False):
+            release_recipes(self.model, self.values("pk"))
+            return super().delete()
+
+
 class Recipe(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     title = models.CharField(max_length=100)
@@ -26,6 +173,34 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField(Tag)
     ingredients = models.ManyToManyField(Ingredient)
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    image = models.ImageField(null=True, blank=True, upload_to=recipe_image_file_path)
+    # Copies of the blob's name and variants, so payloads need no join
+    image_blob = models.ForeignKey(
+        ImageBlob,
+        null=True,
+        blank=True,
+        editable=False,
+        on_delete=models.PROTECT,
+        related_name="recipes",
+    )
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # The detail payload, maintained by `recipe.cards` and served as is
+    card = models.JSONField(null=True, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "id"], name="recipe_user_id_idx"),
+            GinIndex(fields=["search_vector"], name="recipe_search_vector_idx"),
+        ]
 
     def __str__(self):
         return self.title
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+            release_recipes(type(self), [self.pk])
+            return super().delete(*args, **kwargs)
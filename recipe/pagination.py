@@ -0,0 +1,120 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class IdCursorPagination(CursorPagination):
+    """Keyset pagination over the primary key, so every page costs the same"""
+
+    ordering = "id"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering_param = "ordering"
+
+    def get_ordering(self, request, queryset, view):
+        # Ranked search results are paged by rank, ties broken by id
+        if "search_rank" in queryset.query.annotations:
+            return ("-search_rank", "id")
+
+        # Views list the fields they allow in `ordering_fields`, ties
+        # broken by id as well
+        ordering = request.query_params.get(self.ordering_param)
+        if ordering:
+            if ordering.lstrip("-") not in getattr(view, "ordering_fields", ()):
+                msg = f'"{ordering}" is not a valid choice.'
+                raise ValidationError({self.ordering_param: [msg]})
+            return (ordering, "id")
+
+        return super().get_ordering(request, queryset, view)
+
+    # `CursorPagination.paginate_queryset` split around the one query it
+    # runs, so the async views can fetch the page with the async ORM
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+
+        return self.set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+
+        return self.set_page([row async for row in page_queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """Return the unevaluated slice holding the requested page"""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = (0, False, None)
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            order = self.ordering[0]
+            is_reversed = order.startswith("-")
+            order_attr = order.lstrip("-")
+
+            if self.cursor.reverse != is_reversed:
+                kwargs = {order_attr + "__lt": current_position}
+            else:
+                kwargs = {order_attr + "__gt": current_position}
+
+            queryset = queryset.filter(**kwargs)
+
+        # One extra row tells whether a following page exists
+        return queryset[offset : offset + self.page_size + 1]
+
+    def set_page(self, results):
+        """Derive the page and its cursors from the fetched slice"""
+        if self.cursor is None:
+            offset, reverse, current_position = (0, False, None)
+        else:
+            offset, reverse, current_position = self.cursor
+
+        self.page = list(results[: self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
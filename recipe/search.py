@@ -0,0 +1,74 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import F, FloatField, OuterRef, Q, Subquery
+from django.db.models.functions import Cast
+
+from recipe.models import Recipe
+
+SEARCH_CONFIG = "english"
+BATCH_SIZE = 1000
+
+
+def is_supported(using=None):
+    """Full-text search columns are only maintained on Postgres"""
+    return connections[using or Recipe.objects.db].vendor == "postgresql"
+
+
+def _related_names(field, name):
+    through = getattr(Recipe, field).through
+
+    return Subquery(
+        through.objects.filter(recipe_id=OuterRef("pk"))
+        .values("recipe_id")
+        .annotate(names=StringAgg(name, " "))
+        .values("names")
+    )
+
+
+def search_vector():
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(
+            _related_names("tags", "tag__name"), weight="B", config=SEARCH_CONFIG
+        )
+        + SearchVector(
+            _related_names("ingredients", "ingredient__name"),
+            weight="C",
+            config=SEARCH_CONFIG,
+        )
+    )
+
+
+def update_search_vectors(queryset):
+    """Recompute the stored search vector of recipes in one UPDATE"""
+    if not is_supported(queryset.db):
+        return 0
+
+    return queryset.update(search_vector=search_vector())
+
+
+def update_recipe_search_vectors(recipe_ids):
+    return update_search_vectors(Recipe.objects.filter(id__in=list(recipe_ids)))
+
+
+def search_recipes(queryset, text):
+    """Filter recipes matching `text` across titles, tags and ingredients
+
+    On Postgres matches use the indexed search vector and are annotated
+    with `search_rank`. Other databases fall back to an unranked scan.
+    """
+    if is_supported(queryset.db):
+        query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+        # ts_rank returns a real, cast it so cursors round-trip exactly
+        rank = Cast(SearchRank(F("search_vector"), query), FloatField())
+
+        return queryset.filter(search_vector=query).annotate(search_rank=rank)
+
+    matches = Recipe.objects.filter(
+        Q(title__icontains=text)
+        | Q(tags__name__icontains=text)
+        | Q(ingredients__name__icontains=text)
+    )
+
+    return queryset.filter(id__in=matches.values("id"))
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from recipe.filters import ID_MAX, ID_MIN
+from recipe.images import image_urls, variant_urls
 from recipe.models import Ingredient, Recipe, Tag
 
 
@@ -17,18 +19,87 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ("id",)
 
 
+class TagUsageSerializer(TagSerializer):
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ("recipe_count",)
+        read_only_fields = ("id", "recipe_count")
+
+
+class IngredientUsageSerializer(IngredientSerializer):
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ("recipe_count",)
+        read_only_fields = ("id", "recipe_count")
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     tags = serializers.PrimaryKeyRelatedField(queryset=Tag.objects.all(), many=True)
     ingredients = serializers.PrimaryKeyRelatedField(
         queryset=Ingredient.objects.all(), many=True
     )
+    thumbnail = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ("id", "title", "time_minutes", "price", "link", "tags", "ingredients")
+        fields = (
+            "id",
+            "title",
+            "time_minutes",
+            "price",
+            "link",
+            "tags",
+            "ingredients",
+            "thumbnail",
+        )
         read_only_fields = ("id",)
 
+    def get_thumbnail(self, recipe):
+        return variant_urls(recipe.image_variants, "thumbnail")
+
 
 class RecipeDetailSerializer(RecipeSerializer):
     tags = TagSerializer(many=True, read_only=True)
     ingredients = IngredientSerializer(many=True, read_only=True)
+    image = serializers.SerializerMethodField()
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ("image",)
+
+    def get_image(self, recipe):
+        return image_urls(recipe.image.name, recipe.image_variants)
+
+
+class RecipeImageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Recipe
+        fields = ("id", "image")
+        read_only_fields = ("id",)
+        extra_kwargs = {"image": {"required": True, "allow_null": False}}
+
+
+class RecipeBulkSerializer(serializers.ModelSerializer):
+    """Validates one item of a bulk payload, related ids are checked in bulk"""
+
+    tags = serializers.ListField(
+        child=serializers.IntegerField(min_value=ID_MIN, max_value=ID_MAX),
+        required=False,
+    )
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=ID_MIN, max_value=ID_MAX),
+        required=False,
+    )
+
+    class Meta:
+        model = Recipe
+        fields = ("id", "title", "time_minutes", "price", "link", "tags", "ingredients")
+        read_only_fields = ("id",)
+
+
+class RecipeImportSerializer(RecipeBulkSerializer):
+    """Validates one imported record, related objects are given by name"""
+
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=50), required=False
+    )
+    ingredients = serializers.ListField(
+        child=serializers.CharField(max_length=50), required=False
+    )
@@ -0,0 +1,187 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.deletion import pre_chunk_delete
+from recipe.blobs import release_blobs
+from recipe.cache import bump_catalogue_version, bump_catalogue_version_on_commit
+from recipe.cards import refresh_recipe_cards
+from recipe.counters import adjust_recipe_counts, release_recipes
+from recipe.images import variants_shared
+from recipe.models import Ingredient, Recipe, Tag
+from recipe.search import is_supported, search_vector, update_recipe_search_vectors
+
+_pending = ContextVar("pending_recipe_touches", default=None)
+
+
+def touch_recipes(recipe_ids):
+    """Stamp recipes whose payload changed, recompute their vectors and cards"""
+    pending = _pending.get()
+    if pending is not None:
+        pending.update(recipe_ids)
+        return
+
+    recipe_ids = list(recipe_ids)
+    fields = {"updated_at": timezone.now()}
+    if is_supported():
+        fields["search_vector"] = search_vector()
+    Recipe.objects.filter(id__in=recipe_ids).update(**fields)
+    refresh_recipe_cards(recipe_ids)
+
+
+@contextmanager
+def touching_once():
+    """Touch the recipes written within the block once, as it ends
+
+    Saving a recipe and each change of its tags and ingredients touch it
+    otherwise, rebuilding its vector and card every time. Enter it within
+    the transaction of the writes, so the touch commits along with them.
+    """
+    if _pending.get() is not None:
+        yield
+        return
+
+    pending = set()
+    token = _pending.set(pending)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+    if pending:
+        touch_recipes(pending)
+
+
+def _related_recipe_ids(instance):
+    field = "tags" if isinstance(instance, Tag) else "ingredients"
+
+    return list(Recipe.objects.filter(**{field: instance}).values_list("id", flat=True))
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_saved_recipe(sender, instance, **kwargs):
+    pending = _pending.get()
+    if pending is not None:
+        pending.add(instance.pk)
+        return
+
+    update_recipe_search_vectors([instance.pk])
+    refresh_recipe_cards([instance.pk])
+
+
+@receiver(variants_shared, sender=Recipe)
+def refresh_cards_with_variants(sender, recipe_ids, **kwargs):
+    refresh_recipe_cards(recipe_ids)
+
+
+# Sent for every recipe, also when deleted along with their user
+@receiver(post_delete, sender=Recipe)
+def release_recipe_image(sender, instance, **kwargs):
+    release_blobs({instance.image_blob_id: 1})
+
+
+@receiver(pre_chunk_delete, sender=Recipe)
+def release_deleted_recipes(sender, pks, using, **kwargs):
+    recipes = Recipe.objects.using(using).filter(pk__in=pks)
+    release_recipes(Recipe, pks)
+    release_blobs(
+        Counter(recipes.exclude(image_blob=None).values_list("image_blob", flat=True))
+    )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def touch_renamed_recipes(sender, instance, created, **kwargs):
+    if not created:
+        touch_recipes(_related_recipe_ids(instance))
+
+
+# Deleting a tag or ingredient drops its M2M rows without m2m_changed, so
+# the affected recipes are collected up front and touched afterwards
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def collect_deleted_recipes(sender, instance, **kwargs):
+    instance._touched_recipe_ids = _related_recipe_ids(instance)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def touch_deleted_recipes(sender, instance, **kwargs):
+    touch_recipes(instance.__dict__.pop("_touched_recipe_ids", ()))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_related_recipes(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            touch_recipes([instance.pk])
+        return
+
+    # Clearing from the tag or ingredient side doesn't report the recipes
+    if action == "pre_clear":
+        instance._touched_recipe_ids = _related_recipe_ids(instance)
+    elif action == "post_clear":
+        touch_recipes(instance.__dict__.pop("_touched_recipe_ids", ()))
+    elif action in ("post_add", "post_remove"):
+        touch_recipes(pk_set)
+
+
+THROUGH_COLUMNS = {
+    Recipe.tags.through: "tag_id",
+    Recipe.ingredients.through: "ingredient_id",
+}
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def count_related_recipes(sender, instance, action, reverse, model, pk_set, **kwargs):
+    own, other = ("recipe_id", THROUGH_COLUMNS[sender])
+    if reverse:
+        own, other = other, own
+
+    # Only rows that exist are removed, collect them before they go
+    if action in ("pre_remove", "pre_clear"):
+        rows = sender.objects.filter(**{own: instance.pk})
+        if action == "pre_remove":
+            rows = rows.filter(**{f"{other}__in": pk_set})
+        instance._released_ids = list(rows.values_list(other, flat=True))
+        return
+
+    if action == "post_add":
+        linked, delta = pk_set, 1
+    elif action in ("post_remove", "post_clear"):
+        linked, delta = instance.__dict__.pop("_released_ids", ()), -1
+    else:
+        return
+
+    if reverse:
+        adjust_recipe_counts(type(instance), {instance.pk: delta * len(linked)})
+    else:
+        adjust_recipe_counts(model, {pk: delta for pk in linked})
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_catalogue(sender, instance, action=None, **kwargs):
+    if action is None or action.startswith("post_"):
+        bump_catalogue_version_on_commit(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def reset_catalogue(sender, instance, created, **kwargs):
+    # Primary keys may be reused, never serve a new user an old catalogue.
+    # Nobody reads the catalogue of a user before it exists, no need to wait
+    # for the commit.
+    if created:
+        bump_catalogue_version(instance.pk)
@@ -0,0 +1,206 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.test import APIClient
+from rest_framework.throttling import UserRateThrottle
+
+from core.authentication import token_cache
+from core.models import AuthToken
+from recipe.models import Ingredient, Recipe, Tag
+from recipe.serializers import RecipeDetailSerializer, RecipeSerializer
+from recipe.views import ReciepViewSet, TagViewSet
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+INGREDIENTS_URL = reverse("recipe:ingredient-list")
+
+
+def detail_url(recipe_id):
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+class OncePerMinuteThrottle(UserRateThrottle):
+    rate = "1/min"
+
+
+def sample_recipe(user, **params):
+    default = {"title": "recipe1", "time_minutes": 5, "price": 20.00}
+    default.update(params)
+
+    return Recipe.objects.create(user=user, **default)
+
+
+class AsyncReadViewTests(TestCase):
+    """Test the async list and retrieve endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.token = AuthToken.objects.issue(self.user)
+        self.client = AsyncClient()
+        self.headers = {"Authorization": f"Token {self.token.key}"}
+
+        self.recipe = sample_recipe(self.user)
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name="Vegan"))
+        self.recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name="Salt")
+        )
+        # Serializers read related objects synchronously
+        self.list_data = RecipeSerializer(self.recipe).data
+        self.detail_data = RecipeDetailSerializer(self.recipe).data
+
+    async def test_list_recipes(self):
+        """Test that the async list matches the serializer payload"""
+        res = await self.client.get(RECIPES_URL, headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["results"], [self.list_data])
+        self.assertIn("ETag", res)
+
+    async def test_retrieve_recipe(self):
+        """Test that the async detail matches the serializer payload"""
+        res = await self.client.get(detail_url(self.recipe.id), headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), self.detail_data)
+
+    async def test_retrieve_other_users_recipe(self):
+        """Test that recipes of other users are not found"""
+        other = await get_user_model().objects.acreate(email="example2@email.com")
+        recipe = await Recipe.objects.acreate(
+            user=other, title="recipe2", time_minutes=5, price=10
+        )
+
+        res = await self.client.get(detail_url(recipe.id), headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_not_modified(self):
+        """Test that the async path answers conditional requests"""
+        etag = (await self.client.get(RECIPES_URL, headers=self.headers))["ETag"]
+
+        res = await self.client.get(
+            RECIPES_URL, headers={**self.headers, "If-None-Match": etag}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_invalid_filter(self):
+        """Test that invalid filters are rejected"""
+        res = await self.client.get(RECIPES_URL, {"tags": "x"}, headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_login_required(self):
+        """Test that unauthenticated requests are rejected"""
+        res = await self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res["WWW-Authenticate"], "Token")
+
+    async def test_invalid_token(self):
+        """Test that unknown tokens are rejected"""
+        res = await self.client.get(
+            RECIPES_URL, headers={"Authorization": "Token invalid"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res.json(), {"detail": "Invalid token."})
+
+    async def test_token_cached(self):
+        """Test that the async token lookup fills the token cache"""
+        await self.client.get(TAGS_URL, headers=self.headers)
+
+        self.assertIsNotNone(token_cache.get(bytes(self.token.digest)))
+
+    async def test_list_tags_and_ingredients(self):
+        """Test that tags and ingredients are listed asynchronously"""
+        tags = await self.client.get(TAGS_URL, headers=self.headers)
+        ingredients = await self.client.get(INGREDIENTS_URL, headers=self.headers)
+
+        self.assertEqual([tag["name"] for tag in tags.json()["results"]], ["Vegan"])
+        self.assertEqual(
+            [ingredient["name"] for ingredient in ingredients.json()["results"]],
+            ["Salt"],
+        )
+
+    async def test_retrieve_tag(self):
+        """Test that a single tag is retrieved"""
+        tag = await Tag.objects.aget(name="Vegan")
+
+        res = await self.client.get(
+            reverse("recipe:tag-detail", args=[tag.id]), headers=self.headers
+        )
+
+        self.assertEqual(res.json(), {"id": tag.id, "name": "Vegan", "recipe_count": 1})
+
+    async def test_writes_use_viewset(self):
+        """Test that other methods still reach the DRF viewset"""
+        res = await self.client.post(
+            TAGS_URL,
+            {"name": "Dessert"},
+            content_type="application/json",
+            headers=self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(await Tag.objects.filter(name="Dessert").aexists())
+
+    async def test_browsable_api_uses_viewset(self):
+        """Test that HTML requests are rendered by the browsable API"""
+        res = await self.client.get(
+            RECIPES_URL, headers={**self.headers, "Accept": "text/html"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("text/html", res["Content-Type"])
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=1)
+    async def test_instrumented(self):
+        """Test that queries of the async path are instrumented"""
+        res = await self.client.get(RECIPES_URL, headers=self.headers)
+
+        self.assertRegex(res["Server-Timing"], r'desc="[1-9]\d* queries"')
+
+    async def test_permissions_checked(self):
+        """Test that the viewsets' permission classes apply"""
+        with patch.object(TagViewSet, "permission_classes", (IsAdminUser,)):
+            res = await self.client.get(TAGS_URL, headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_throttles_checked(self):
+        """Test that the viewsets' throttles apply"""
+        throttles = (OncePerMinuteThrottle,)
+        with patch.object(ReciepViewSet, "throttle_classes", throttles):
+            await self.client.get(RECIPES_URL, headers=self.headers)
+            res = await self.client.get(RECIPES_URL, headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+
+    async def test_unacceptable_media_type(self):
+        """Test that content negotiation runs"""
+        res = await self.client.get(
+            RECIPES_URL, headers={**self.headers, "Accept": "application/xml"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+
+    def test_forced_authentication(self):
+        """Test that users forced by DRF's test client are authenticated"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [self.list_data])
@@ -0,0 +1,306 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipe import blobs
+from recipe.models import ImageBlob, Recipe
+
+
+def image_upload_url(recipe_id):
+    return reverse("recipe:recipe-upload-image", args=[recipe_id])
+
+
+def image_content(color=(200, 80, 40)):
+    file = BytesIO()
+    Image.new("RGB", (600, 400), color).save(file, format="JPEG")
+
+    return file.getvalue()
+
+
+def sample_file(content=None, name="sample.jpg"):
+    return SimpleUploadedFile(name, content or image_content())
+
+
+class MediaRootMixin:
+    def use_media_root(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root, RECIPE_IMAGE_WORKERS=0)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, file), self.media_root)
+            for root, _, files in os.walk(self.media_root)
+            for file in files
+        )
+
+
+class ImageBlobTests(MediaRootMixin, TestCase):
+    """Test the content-addressed storage of recipe images"""
+
+    def setUp(self):
+        self.use_media_root()
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sample_recipe(self, user=None):
+        return Recipe.objects.create(
+            user=user or self.user, title="recipe1", time_minutes=5, price=20
+        )
+
+    def attach(self, *recipes, content=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            for recipe in recipes:
+                blobs.attach_image(recipe, sample_file(content))
+        for recipe in recipes:
+            recipe.refresh_from_db()
+
+    def test_upload_hashed_while_streaming(self):
+        """Test that uploads are stored under the SHA-256 of their content"""
+        content = image_content()
+        recipe = self.sample_recipe()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                image_upload_url(recipe.id),
+                {"image": sample_file(content)},
+                format="multipart",
+            )
+
+        digest = hashlib.sha256(content).hexdigest()
+        blob = ImageBlob.objects.get()
+        self.assertEqual(blob.digest, digest)
+        self.assertEqual(blob.name, f"blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpg")
+        self.assertEqual(blob.size, len(content))
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_blob, blob)
+
+    def test_duplicates_share_blob(self):
+        """Test that identical uploads of different users share one file"""
+        other = get_user_model().objects.create_user("other@email.com", "testpass")
+        recipes = [self.sample_recipe(), self.sample_recipe(other)]
+
+        self.attach(*recipes)
+
+        blob = ImageBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual({recipe.image.name for recipe in recipes}, {blob.name})
+        originals = [name for name in self.stored_files() if "_" not in name]
+        self.assertEqual(originals, [blob.name])
+
+    def test_distinct_images_not_shared(self):
+        """Test that different images are stored separately"""
+        self.attach(self.sample_recipe())
+        self.attach(self.sample_recipe(), content=image_content((0, 0, 255)))
+
+        self.assertEqual(ImageBlob.objects.count(), 2)
+
+    def test_variants_rendered_once(self):
+        """Test that duplicates reuse the variants rendered for the blob"""
+        first, second = self.sample_recipe(), self.sample_recipe()
+        self.attach(first)
+
+        with patch("recipe.images.render_variants") as render:
+            self.attach(second)
+
+        render.assert_not_called()
+        self.assertEqual(second.image_variants, first.image_variants)
+        self.assertTrue(second.image_variants)
+
+    def test_variants_shared_with_pending_recipes(self):
+        """Test that variants reach every recipe attached before rendering"""
+        recipes = [self.sample_recipe(), self.sample_recipe()]
+
+        variants = {"thumbnail": {"webp": "t.webp"}}
+        with patch("recipe.images.render_variants", return_value=variants) as render:
+            self.attach(*recipes)
+
+        render.assert_called_once()
+        for recipe in recipes:
+            self.assertEqual(recipe.image_variants, variants)
+
+    def test_recipe_delete_releases(self):
+        """Test that deleting recipes releases their images"""
+        recipes = [self.sample_recipe(), self.sample_recipe()]
+        self.attach(*recipes)
+
+        recipes[0].delete()
+        self.assertEqual(ImageBlob.objects.get().ref_count, 1)
+        Recipe.objects.all().delete()
+        self.assertEqual(ImageBlob.objects.get().ref_count, 0)
+
+    def test_user_delete_releases(self):
+        """Test that recipes deleted along with their user release images"""
+        other = get_user_model().objects.create_user("other@email.com", "testpass")
+        self.attach(self.sample_recipe(), self.sample_recipe(other))
+
+        other.delete()
+
+        blob = ImageBlob.objects.get()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertIsNotNone(blob.released_at)
+
+    def test_collect_unreferenced(self):
+        """Test that blobs unused for long enough are deleted with their files"""
+        kept, dropped = self.sample_recipe(), self.sample_recipe()
+        self.attach(kept)
+        self.attach(dropped, content=image_content((0, 0, 255)))
+        dropped.delete()
+        ImageBlob.objects.filter(ref_count=0).update(
+            released_at=timezone.now() - timedelta(days=2)
+        )
+        files = self.stored_files()
+
+        out = StringIO()
+        call_command("collect_image_blobs", stdout=out)
+
+        self.assertIn("1 image blobs collected", out.getvalue())
+        self.assertEqual(list(ImageBlob.objects.all()), [kept.image_blob])
+        removed = set(files) - set(self.stored_files())
+        self.assertEqual(len(removed), 5)
+        self.assertTrue(all(dropped.image_blob_id in name for name in removed))
+
+    def test_recently_released_kept(self):
+        """Test that blobs released within the grace period are kept"""
+        recipe = self.sample_recipe()
+        self.attach(recipe)
+        recipe.delete()
+
+        call_command("collect_image_blobs", stdout=StringIO())
+
+        self.assertEqual(ImageBlob.objects.count(), 1)
+
+    def test_released_blob_revived(self):
+        """Test that uploading a released image reuses its blob"""
+        recipe = self.sample_recipe()
+        self.attach(recipe)
+        recipe.delete()
+
+        self.attach(self.sample_recipe())
+
+        self.assertEqual(ImageBlob.objects.get().ref_count, 1)
+
+    def test_drifted_ref_count_fixed(self):
+        """Test that collecting garbage recounts drifted references first"""
+        recipe = self.sample_recipe()
+        self.attach(recipe)
+        ImageBlob.objects.update(ref_count=0, released_at=timezone.now())
+
+        out = StringIO()
+        call_command("collect_image_blobs", "--min-age=0", stdout=out)
+
+        self.assertIn("1 reference counts fixed", out.getvalue())
+        self.assertEqual(ImageBlob.objects.get().ref_count, 1)
+
+    def test_orphaned_files_collected(self):
+        """Test that blob files without a blob are deleted"""
+        self.attach(self.sample_recipe())
+        orphan = default_storage.save(blobs.blob_name("ab" * 32, ".jpg"), sample_file())
+        files = self.stored_files()
+
+        out = StringIO()
+        call_command("collect_image_blobs", "--min-age=0", stdout=out)
+
+        self.assertIn("1 orphaned files collected", out.getvalue())
+        self.assertEqual(set(files) - set(self.stored_files()), {orphan})
+
+    def test_dry_run(self):
+        """Test that a dry run deletes nothing"""
+        recipe = self.sample_recipe()
+        self.attach(recipe)
+        recipe.delete()
+        files = self.stored_files()
+
+        out = StringIO()
+        call_command("collect_image_blobs", "--min-age=0", "--dry-run", stdout=out)
+
+        self.assertIn("1 image blobs to collect", out.getvalue())
+        self.assertEqual(ImageBlob.objects.count(), 1)
+        self.assertEqual(self.stored_files(), files)
+
+
+class MoveToBlobsMigrationTests(MediaRootMixin, TransactionTestCase):
+    """Test the migration moving uploaded images into blobs"""
+
+    before = [("recipe", "0009_recipe_image")]
+    after = [("recipe", "0010_image_blob")]
+
+    def setUp(self):
+        self.use_media_root()
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def upload_images(self, files):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        User = apps.get_model("core", "User")
+        Recipe = apps.get_model("recipe", "Recipe")
+
+        user = User.objects.create(email="example@email.com")
+        for name, content in files.items():
+            default_storage.save(name, sample_file(content))
+            Recipe.objects.create(
+                user=user, title="r", time_minutes=1, price=1, image=name
+            )
+
+    def test_images_deduplicated(self):
+        """Test that identical uploads end up sharing one blob"""
+        content = image_content()
+        self.upload_images(
+            {"uploads/recipe/a.jpg": content, "uploads/recipe/b.jpg": content}
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        apps = executor.loader.project_state(self.after).apps
+        ImageBlob = apps.get_model("recipe", "ImageBlob")
+        Recipe = apps.get_model("recipe", "Recipe")
+
+        digest = hashlib.sha256(content).hexdigest()
+        blob = ImageBlob.objects.get()
+        self.assertEqual(blob.digest, digest)
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(
+            set(Recipe.objects.values_list("image", flat=True)), {blob.name}
+        )
+        self.assertEqual(self.stored_files(), [blob.name])
+
+    def test_images_kept_on_rollback(self):
+        """Test that uploads survive a migration rolled back"""
+        files = {
+            "uploads/recipe/a.jpg": image_content(color="red"),
+            "uploads/recipe/b.jpg": image_content(color="blue"),
+        }
+        self.upload_images(files)
+
+        # Fails on the second image, after the first was moved
+        with patch.object(default_storage, "size", side_effect=[1, OSError]):
+            with self.assertRaises(OSError):
+                MigrationExecutor(connection).migrate(self.after)
+
+        # Blobs saved meanwhile are left to collect_orphans()
+        self.assertLessEqual(set(files), set(self.stored_files()))
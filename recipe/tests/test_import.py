@@ -0,0 +1,157 @@
+import csv
+import io
+import json
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe.importer import RecipeImporter, parse_records
+from recipe.models import Ingredient, Recipe, Tag
+
+IMPORT_URL = reverse("recipe:recipe-import-file")
+
+NDJSON = "\n".join(
+    json.dumps(record)
+    for record in [
+        {
+            "title": "recipe1",
+            "time_minutes": 5,
+            "price": "10.00",
+            "tags": ["vegan", "quick"],
+            "ingredients": ["salt"],
+        },
+        {"title": "recipe2", "time_minutes": 10, "price": "5.50", "tags": ["vegan"]},
+        {"title": "", "time_minutes": 10, "price": "5.50"},
+    ]
+)
+
+CSV = """title,time_minutes,price,link,tags,ingredients
+recipe1,5,10.00,,vegan;quick,salt
+recipe2,10,5.50,http://example.com,vegan,
+"""
+
+
+class RecipeImporterTests(TestCase):
+    """Test importing recipe records"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+
+    def test_import_ndjson(self):
+        """Test importing NDJSON records with related names"""
+        Tag.objects.create(user=self.user, name="vegan")
+
+        importer = RecipeImporter(self.user).run(
+            parse_records(io.StringIO(NDJSON), "ndjson")
+        )
+
+        self.assertEqual(importer.created, 2)
+        self.assertEqual(importer.failed, 1)
+        self.assertEqual(importer.errors[0]["line"], 3)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        recipe = Recipe.objects.get(title="recipe1")
+        self.assertEqual(
+            sorted(recipe.tags.values_list("name", flat=True)), ["quick", "vegan"]
+        )
+        self.assertEqual(
+            list(recipe.ingredients.values_list("name", flat=True)), ["salt"]
+        )
+
+    def test_import_csv(self):
+        """Test importing CSV records with separated related names"""
+        importer = RecipeImporter(self.user).run(parse_records(io.StringIO(CSV), "csv"))
+
+        self.assertEqual(importer.created, 2)
+        self.assertEqual(importer.failed, 0)
+        recipe = Recipe.objects.get(title="recipe2")
+        self.assertEqual(recipe.link, "http://example.com")
+        self.assertEqual(list(recipe.tags.values_list("name", flat=True)), ["vegan"])
+        self.assertEqual(recipe.ingredients.count(), 0)
+
+    def test_names_resolved_once_per_import(self):
+        """Test that known names are not looked up again in later batches"""
+        records = [
+            {"title": f"r{i}", "time_minutes": 1, "price": "1.00", "tags": ["vegan"]}
+            for i in range(4)
+        ]
+        importer = RecipeImporter(self.user, batch_size=2)
+
+        importer.run(records[:2])
+        # savepoint pair, recipes insert, tags through insert, the tags
+        # recipe_count update and the three reads and one write of the cards
+        with self.assertNumQueries(9):
+            importer.run(records[2:])
+
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Ingredient.objects.count(), 0)
+
+    def test_import_command(self):
+        """Test the import_recipes management command"""
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write(CSV)
+            file.flush()
+            out = io.StringIO()
+            call_command("import_recipes", self.user.email, file.name, stdout=out)
+
+        self.assertIn("Imported 2 recipes, 0 failed", out.getvalue())
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+
+class RecipeImportApiTests(TestCase):
+    """Test the recipe upload import endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_upload_import(self):
+        """Test importing an uploaded NDJSON file"""
+        upload = SimpleUploadedFile("recipes.ndjson", NDJSON.encode())
+
+        res = self.client.post(IMPORT_URL, {"file": upload}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(res.data["failed"], 1)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def test_upload_not_utf8(self):
+        """Test that files that aren't UTF-8 are rejected, importing nothing"""
+        for name, content in (
+            ("recipes.csv", b"\xff\xfetitle,time_minutes,price\n"),
+            ("recipes.ndjson", NDJSON.encode() + "caf\u00e9\n".encode("latin-1")),
+        ):
+            upload = SimpleUploadedFile(name, content)
+
+            res = self.client.post(IMPORT_URL, {"file": upload}, format="multipart")
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("file", res.data)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_upload_malformed_csv(self):
+        """Test that CSV files the reader chokes on are rejected"""
+        field = b"x" * (csv.field_size_limit() + 1)
+        upload = SimpleUploadedFile("recipes.csv", b"title,time_minutes\n" + field)
+
+        res = self.client.post(IMPORT_URL, {"file": upload}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("file", res.data)
+
+    def test_upload_requires_file(self):
+        """Test that importing without a file fails"""
+        res = self.client.post(IMPORT_URL, {}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
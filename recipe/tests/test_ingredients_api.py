@@ -5,7 +5,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from recipe.models import Ingredient
-from recipe.serializers import IngredientSerializer
+from recipe.serializers import IngredientUsageSerializer
 
 INGREDIENTS_URL = reverse("recipe:ingredient-list")
 
@@ -40,10 +40,10 @@ class PrivateIngredientApiTests(TestCase):
 
         res = self.client.get(INGREDIENTS_URL)
         ingredients = Ingredient.objects.all()
-        serializer = IngredientSerializer(ingredients, many=True)
+        serializer = IngredientUsageSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test that ingredients are limited to a user"""
@@ -54,8 +54,8 @@ class PrivateIngredientApiTests(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]["name"], ingredient.name)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["name"], ingredient.name)
 
     def test_creating_ingredient_successful(self):
         """Test that creating a new ingredient is successful"""
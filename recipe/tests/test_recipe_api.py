@@ -1,13 +1,20 @@
+import json
+from unittest.mock import patch
+
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from recipe.export import iter_ndjson
 from recipe.models import Ingredient, Recipe, Tag
+from recipe.pagination import IdCursorPagination
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 RECIPES_URL = reverse("recipe:recipe-list")
+BULK_URL = reverse("recipe:recipe-bulk")
+EXPORT_URL = reverse("recipe:recipe-export")
 
 
 def detail_url(recipe_id):
@@ -61,7 +68,7 @@ class AuthenticatedRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_recipes_limited_to_user(self):
         """Test that recipes are limited to user"""
@@ -74,8 +81,8 @@ class AuthenticatedRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_view_recipe_detail(self):
         """Test viewing recipe details"""
@@ -91,6 +98,17 @@ class AuthenticatedRecipeApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_invalid_recipe_ids_not_found(self):
+        """Test that ids that aren't numbers or overflow them give a 404"""
+        for pk in ("abc", "9" * 23):
+            for method in ("get", "patch", "delete"):
+                res = getattr(self.client, method)(detail_url(pk))
+
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(reverse("recipe:tag-detail", args=["9" * 23]))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_create_recipe(self):
         """Test creating a new recipe"""
         payload = {"title": "recipe1", "time_minutes": 5, "price": 84.00}
@@ -171,3 +189,242 @@ class AuthenticatedRecipeApiTests(TestCase):
         self.assertEqual(recipe.title, payload["title"])
         self.assertEqual(recipe.time_minutes, payload["time_minutes"])
         self.assertEqual(recipe.price, payload["price"])
+
+    def test_recipes_paginated_by_cursor(self):
+        """Test that recipes are paginated with a cursor in id order"""
+        recipes = [sample_recipe(user=self.user, title=f"r{i}") for i in range(5)]
+
+        res = self.client.get(RECIPES_URL, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(res.data["previous"])
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]],
+            [recipe.id for recipe in recipes[:2]],
+        )
+
+        seen = []
+        next_url = res.data["next"]
+        while next_url:
+            res = self.client.get(next_url)
+            seen.extend(item["id"] for item in res.data["results"])
+            next_url = res.data["next"]
+
+        self.assertEqual(seen, [recipe.id for recipe in recipes[2:]])
+
+    def test_recipes_page_size_capped(self):
+        """Test that the requested page size cannot exceed the maximum"""
+        with patch.object(IdCursorPagination, "max_page_size", 3):
+            for i in range(5):
+                sample_recipe(user=self.user, title=f"r{i}")
+
+            res = self.client.get(RECIPES_URL, {"page_size": 1000})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertIsNotNone(res.data["next"])
+
+
+class BulkRecipeApiTests(TestCase):
+    """Test the bulk recipe endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_recipes(self):
+        """Test creating several recipes with related objects at once"""
+        tag = sample_tag(user=self.user)
+        ingredient = sample_ingredient(user=self.user)
+        payload = [
+            {"title": "recipe1", "time_minutes": 5, "price": "10.00"},
+            {
+                "title": "recipe2",
+                "time_minutes": 10,
+                "price": "12.50",
+                "tags": [tag.id],
+                "ingredients": [ingredient.id],
+            },
+        ]
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [item["id"] for item in res.data["results"]]
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+        recipe = Recipe.objects.get(id=ids[1])
+        self.assertEqual(list(recipe.tags.all()), [tag])
+        self.assertEqual(list(recipe.ingredients.all()), [ingredient])
+
+    def test_bulk_create_reports_item_errors(self):
+        """Test that invalid items are reported without aborting the batch"""
+        user2 = get_user_model().objects.create_user("example2@email.com", "testpass")
+        other_tag = sample_tag(user=user2)
+        payload = [
+            {"title": "recipe1", "time_minutes": 5, "price": "10.00"},
+            {"title": "", "time_minutes": 5, "price": "10.00"},
+            {
+                "title": "recipe3",
+                "time_minutes": 5,
+                "price": "10.00",
+                "tags": [other_tag.id],
+            },
+        ]
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        results = res.data["results"]
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("id", results[0])
+        self.assertIn("title", results[1]["errors"])
+        self.assertIn("tags", results[2]["errors"])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_create_query_count(self):
+        """Test that bulk create cost does not grow with the batch size"""
+        tag = sample_tag(user=self.user)
+        ingredient = sample_ingredient(user=self.user)
+        payload = [
+            {
+                "title": f"recipe{i}",
+                "time_minutes": 5,
+                "price": "10.00",
+                "tags": [tag.id],
+                "ingredients": [ingredient.id],
+            }
+            for i in range(20)
+        ]
+
+        # ownership check, recipes insert, two through table inserts, their
+        # two recipe_count updates, the three reads and one write of the
+        # recipe cards and the transaction savepoint pair
+        with self.assertNumQueries(12):
+            res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(len(res.data["results"]), 20)
+        self.assertEqual(Recipe.tags.through.objects.count(), 20)
+
+    def test_bulk_update_recipes(self):
+        """Test partially updating several recipes at once"""
+        recipe1 = sample_recipe(user=self.user)
+        recipe2 = sample_recipe(user=self.user)
+        tag = sample_tag(user=self.user)
+        recipe2.tags.add(sample_tag(user=self.user, name="old"))
+        payload = [
+            {"id": recipe1.id, "title": "renamed"},
+            {"id": recipe2.id, "tags": [tag.id]},
+            {"id": 0, "title": "missing"},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format="json")
+
+        results = res.data["results"]
+        self.assertEqual(results[0], {"id": recipe1.id})
+        self.assertEqual(results[1], {"id": recipe2.id})
+        self.assertIn("id", results[2]["errors"])
+        recipe1.refresh_from_db()
+        self.assertEqual(recipe1.title, "renamed")
+        self.assertEqual(list(recipe2.tags.all()), [tag])
+
+    def test_bulk_delete_recipes(self):
+        """Test deleting several recipes at once, limited to the user"""
+        user2 = get_user_model().objects.create_user("example2@email.com", "testpass")
+        recipe = sample_recipe(user=self.user)
+        other = sample_recipe(user=user2)
+
+        res = self.client.delete(BULK_URL, [recipe.id, other.id], format="json")
+
+        results = res.data["results"]
+        self.assertEqual(results[0], {"id": recipe.id})
+        self.assertIn("id", results[1]["errors"])
+        self.assertFalse(Recipe.objects.filter(id=recipe.id).exists())
+        self.assertTrue(Recipe.objects.filter(id=other.id).exists())
+
+    def test_bulk_reports_out_of_range_ids(self):
+        """Test that ids beyond the id column are item errors, not overflows"""
+        recipe = sample_recipe(user=self.user)
+        huge = 2**63
+
+        res = self.client.post(
+            BULK_URL,
+            [
+                {"title": "recipe1", "time_minutes": 5, "price": "10.00"},
+                {"title": "r", "time_minutes": 5, "price": "1", "tags": [huge]},
+                {"title": "r", "time_minutes": 5, "price": "1", "ingredients": [-huge]},
+            ],
+            format="json",
+        )
+
+        results = res.data["results"]
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("id", results[0])
+        self.assertIn("tags", results[1]["errors"])
+        self.assertIn("ingredients", results[2]["errors"])
+
+        res = self.client.patch(
+            BULK_URL,
+            [{"id": recipe.id, "title": "renamed"}, {"id": huge, "title": "x"}],
+            format="json",
+        )
+
+        results = res.data["results"]
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(results[0], {"id": recipe.id})
+        self.assertIn("id", results[1]["errors"])
+
+        res = self.client.delete(BULK_URL, [huge, recipe.id], format="json")
+
+        results = res.data["results"]
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("id", results[0]["errors"])
+        self.assertEqual(results[1], {"id": recipe.id})
+
+    def test_bulk_requires_list(self):
+        """Test that the bulk endpoint rejects a non-list payload"""
+        res = self.client.post(BULK_URL, {"title": "recipe1"}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExportRecipeApiTests(TestCase):
+    """Test the streaming recipe export"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_export_recipes(self):
+        """Test that the export streams one detail payload per line"""
+        user2 = get_user_model().objects.create_user("example2@email.com", "testpass")
+        sample_recipe(user=user2)
+        recipe1 = sample_recipe(user=self.user)
+        recipe2 = sample_recipe(user=self.user, title="recipe2")
+        recipe2.tags.add(sample_tag(user=self.user))
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        expected = [
+            RecipeDetailSerializer(recipe).data for recipe in (recipe1, recipe2)
+        ]
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_export_prefetches_per_chunk(self):
+        """Test that related objects are fetched once per chunk"""
+        for i in range(5):
+            sample_recipe(user=self.user, title=f"r{i}")
+        queryset = Recipe.objects.filter(user=self.user).order_by("id")
+
+        # one recipe query plus tags and ingredients for each of 3 chunks
+        with self.assertNumQueries(7):
+            lines = "".join(iter_ndjson(queryset, chunk_size=2)).splitlines()
+
+        self.assertEqual(len(lines), 5)
@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe.cache import get_catalogue_version
+from recipe.models import Recipe, Tag
+
+RECIPES_URL = reverse("recipe:recipe-list")
+BULK_URL = reverse("recipe:recipe-bulk")
+
+
+def detail_url(recipe_id):
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def sample_recipe(user, **params):
+    default = {"title": "recipe1", "time_minutes": 5, "price": 20.00}
+    default.update(params)
+
+    return Recipe.objects.create(user=user, **default)
+
+
+class RecipeResponseCacheTests(TestCase):
+    """Test caching of recipe list and detail responses"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(self.user)
+
+    def test_list_served_from_cache(self):
+        """Test that a repeated list request runs no queries"""
+        res1 = self.client.get(RECIPES_URL)
+        with self.assertNumQueries(0):
+            res2 = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res2.status_code, status.HTTP_200_OK)
+        self.assertEqual(res2.content, res1.content)
+
+    def test_detail_invalidated_by_update(self):
+        """Test that updating a recipe invalidates its cached detail"""
+        self.client.get(detail_url(self.recipe.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(detail_url(self.recipe.id), {"title": "recipe2"})
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.data["title"], "recipe2")
+
+    def test_list_invalidated_by_related_changes(self):
+        """Test that tag renames and M2M changes invalidate cached lists"""
+        tag = Tag.objects.create(user=self.user, name="vegan")
+        self.client.get(detail_url(self.recipe.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.tags.add(tag)
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertEqual(res.data["tags"][0]["name"], "vegan")
+
+        tag.name = "vegetarian"
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.save()
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertEqual(res.data["tags"][0]["name"], "vegetarian")
+
+    def test_bulk_write_invalidates(self):
+        """Test that bulk writes invalidate cached responses"""
+        version = get_catalogue_version(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(BULK_URL, [self.recipe.id], format="json")
+
+        self.assertNotEqual(get_catalogue_version(self.user.pk), version)
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.data["results"], [])
+
+    def test_other_users_unaffected(self):
+        """Test that writes of one user keep other users' caches"""
+        user2 = get_user_model().objects.create_user("example2@email.com", "testpass")
+        version = get_catalogue_version(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sample_recipe(user2)
+
+        self.assertEqual(get_catalogue_version(self.user.pk), version)
+
+    def test_invalidated_after_commit(self):
+        """Test that cached responses are invalidated once writes commit
+
+        Reads racing the transaction would otherwise cache the rows from
+        before it under the new version.
+        """
+        version = get_catalogue_version(self.user.pk)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.patch(detail_url(self.recipe.id), {"title": "recipe2"})
+            self.assertEqual(get_catalogue_version(self.user.pk), version)
+
+        self.assertTrue(callbacks)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_catalogue_version(self.user.pk), version)
@@ -0,0 +1,181 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Prefetch
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from recipe import bulk
+from recipe.cards import build_cards
+from recipe.images import share_variants
+from recipe.models import ImageBlob, Ingredient, Recipe, Tag
+from recipe.serializers import RecipeDetailSerializer, RecipeSerializer
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def detail_url(recipe_id):
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def stored_card(recipe):
+    return Recipe.objects.values_list("card", flat=True).get(pk=recipe.pk)
+
+
+class RecipeCardTests(TestCase):
+    """Test the recipe cards stored on recipe rows"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name="vegan")
+        self.recipe = Recipe.objects.create(
+            user=self.user, title="curry", time_minutes=30, price="7.5"
+        )
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name="rice")
+        )
+
+    def assertCardCurrent(self, recipe):
+        self.assertEqual(stored_card(recipe), build_cards([recipe.pk])[recipe.pk])
+
+    def test_payloads_match_serializers(self):
+        """Test that cards render to the same bytes as the serializers"""
+        recipe = Recipe.objects.prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.order_by("id")),
+            Prefetch("ingredients", queryset=Ingredient.objects.order_by("id")),
+        ).get()
+        render = JSONRenderer().render
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT="application/json")
+        self.assertEqual(
+            render(res.data["results"]),
+            render(RecipeSerializer([recipe], many=True).data),
+        )
+        res = self.client.get(detail_url(recipe.id), HTTP_ACCEPT="application/json")
+        self.assertEqual(render(res.data), render(RecipeDetailSerializer(recipe).data))
+
+    def test_served_without_related_tables(self):
+        """Test that lists and details read recipe rows only"""
+        for url in (RECIPES_URL, detail_url(self.recipe.id)):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+
+            sql = " ".join(query["sql"] for query in queries.captured_queries)
+            self.assertNotIn("recipe_recipe_tags", sql)
+            self.assertNotIn("recipe_ingredient", sql)
+
+    def test_follows_recipe_changes(self):
+        """Test that saving a recipe and changing its relations rebuild its card"""
+        self.recipe.title = "green curry"
+        self.recipe.save()
+        self.assertEqual(stored_card(self.recipe)["title"], "green curry")
+
+        other = Tag.objects.create(user=self.user, name="spicy")
+        self.recipe.tags.add(other)
+        self.assertCardCurrent(self.recipe)
+        self.recipe.ingredients.clear()
+        self.assertEqual(stored_card(self.recipe)["ingredients"], [])
+
+    def test_write_builds_card_once(self):
+        """Test that creating a recipe with relations touches it once"""
+        payload = {
+            "title": "stew",
+            "time_minutes": 60,
+            "price": "9.00",
+            "tags": [self.tag.id, Tag.objects.create(user=self.user, name="hot").id],
+            "ingredients": list(Ingredient.objects.values_list("id", flat=True)),
+        }
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(RECIPES_URL, payload, format="json")
+
+        writes = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("UPDATE") and "recipe_recipe" in query["sql"]
+        ]
+        self.assertEqual(len([sql for sql in writes if '"card"' in sql]), 1)
+        self.assertEqual(len([sql for sql in writes if '"updated_at"' in sql]), 1)
+        self.assertCardCurrent(Recipe.objects.get(pk=res.data["id"]))
+
+    def test_write_atomic(self):
+        """Test that a recipe isn't created if touching it fails"""
+        with patch("recipe.signals.refresh_recipe_cards", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(
+                    RECIPES_URL,
+                    {
+                        "title": "stew",
+                        "time_minutes": 1,
+                        "price": "1.00",
+                        "tags": [self.tag.id],
+                        "ingredients": [],
+                    },
+                    format="json",
+                )
+
+        self.assertFalse(Recipe.objects.filter(title="stew").exists())
+
+    def test_follows_tag_changes(self):
+        """Test that renamed, cleared and deleted tags rebuild the cards"""
+        self.tag.name = "plant based"
+        self.tag.save()
+        self.assertEqual(stored_card(self.recipe)["tags"][0]["name"], "plant based")
+
+        self.tag.recipe_set.clear()
+        self.assertEqual(stored_card(self.recipe)["tags"], [])
+
+        self.recipe.tags.add(self.tag)
+        self.tag.delete()
+        self.assertEqual(stored_card(self.recipe)["tags"], [])
+
+    def test_follows_bulk_updates(self):
+        """Test that bulk updates rebuild the cards of the recipes written"""
+        bulk.update_recipes(self.user, [{"id": self.recipe.id, "tags": []}])
+
+        self.assertEqual(stored_card(self.recipe)["tags"], [])
+
+    def test_follows_shared_variants(self):
+        """Test that image variants copied onto recipes rebuild their cards"""
+        blob = ImageBlob.objects.create(digest="a" * 64, name="blobs/a.jpg", size=1)
+        Recipe.objects.update(image_blob=blob, image=blob.name)
+
+        share_variants(blob.digest, {"thumbnail": {"jpeg": "t.jpg", "webp": "t.webp"}})
+
+        self.assertCardCurrent(self.recipe)
+        self.assertTrue(stored_card(self.recipe)["thumbnail"])
+
+    def test_missing_card_built_on_read(self):
+        """Test that recipes without a card get one when read"""
+        Recipe.objects.update(card=None)
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.data["title"], "curry")
+        self.assertCardCurrent(self.recipe)
+
+    def test_check_command(self):
+        """Test that the check command finds stale cards and fixes them"""
+        call_command("check_recipe_cards", stdout=StringIO())
+        Recipe.objects.update(title="stale")
+        Recipe.objects.create(user=self.user, title="r", time_minutes=1, price=1)
+        Recipe.objects.filter(title="r").update(card=None)
+
+        with self.assertRaisesMessage(CommandError, "2 recipe cards are stale"):
+            call_command("check_recipe_cards", stdout=StringIO())
+
+        out = StringIO()
+        call_command("check_recipe_cards", "--fix", stdout=out)
+        self.assertIn("2 recipe cards rebuilt", out.getvalue())
+        self.assertCardCurrent(self.recipe)
+        call_command("check_recipe_cards", stdout=StringIO())
@@ -0,0 +1,200 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe.bulk import create_recipes, delete_recipes, update_recipes
+from recipe.models import Ingredient, Recipe, Tag
+
+TAGS_URL = reverse("recipe:tag-list")
+INGREDIENTS_URL = reverse("recipe:ingredient-list")
+
+
+def sample_recipe(user, **params):
+    default = {"title": "recipe1", "time_minutes": 5, "price": 20.00}
+    default.update(params)
+
+    return Recipe.objects.create(user=user, **default)
+
+
+class RecipeCountTests(TestCase):
+    """Test the maintained recipe_count of tags and ingredients"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.vegan = Tag.objects.create(user=self.user, name="Vegan")
+        self.dessert = Tag.objects.create(user=self.user, name="Dessert")
+        self.salt = Ingredient.objects.create(user=self.user, name="Salt")
+
+    def assertCounts(self, **expected):
+        for name, count in expected.items():
+            obj = getattr(self, name)
+            obj.refresh_from_db()
+            self.assertEqual(obj.recipe_count, count, name)
+
+    def test_add_and_remove(self):
+        """Test that adding and removing relations adjusts the counters"""
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(self.vegan, self.dessert)
+        recipe.tags.add(self.vegan)
+        recipe.ingredients.add(self.salt)
+        self.assertCounts(vegan=1, dessert=1, salt=1)
+
+        recipe.tags.remove(self.vegan)
+        recipe.tags.remove(self.vegan)
+        self.assertCounts(vegan=0, dessert=1)
+
+    def test_rename_keeps_count(self):
+        """Test that saving a tag loaded before recipes linked it keeps the count"""
+        stale = Tag.objects.get(pk=self.vegan.pk)
+        sample_recipe(self.user).tags.add(self.vegan)
+
+        stale.name = "Plant based"
+        stale.save()
+
+        self.assertCounts(vegan=1)
+        self.assertEqual(stale.name, Tag.objects.get(pk=stale.pk).name)
+
+    def test_set_and_clear(self):
+        """Test that replacing and clearing relations adjusts the counters"""
+        recipe = sample_recipe(self.user)
+        recipe.tags.set([self.vegan])
+        recipe.tags.set([self.dessert])
+        self.assertCounts(vegan=0, dessert=1)
+
+        recipe.tags.clear()
+        self.assertCounts(dessert=0)
+
+    def test_reverse_relations(self):
+        """Test that changes from the tag side adjust its counter"""
+        recipes = [sample_recipe(self.user, title=f"r{i}") for i in range(3)]
+        self.vegan.recipe_set.add(*recipes)
+        self.assertCounts(vegan=3)
+
+        self.vegan.recipe_set.remove(recipes[0])
+        self.assertCounts(vegan=2)
+
+        self.vegan.recipe_set.clear()
+        self.assertCounts(vegan=0)
+
+    def test_recipe_deleted(self):
+        """Test that deleting recipes releases their relations"""
+        first = sample_recipe(self.user)
+        second = sample_recipe(self.user)
+        for recipe in (first, second):
+            recipe.tags.add(self.vegan)
+            recipe.ingredients.add(self.salt)
+
+        first.delete()
+        self.assertCounts(vegan=1, salt=1)
+
+        Recipe.objects.filter(user=self.user).delete()
+        self.assertCounts(vegan=0, salt=0)
+
+    def test_bulk_writes(self):
+        """Test that the bulk endpoints keep the counters in step"""
+        payload = {"title": "r", "time_minutes": 5, "price": "1.00"}
+        results = create_recipes(
+            self.user,
+            [{**payload, "tags": [self.vegan.id], "ingredients": [self.salt.id]}] * 2,
+        )
+        self.assertCounts(vegan=2, salt=2)
+
+        update_recipes(self.user, [{"id": results[0]["id"], "tags": [self.dessert.id]}])
+        self.assertCounts(vegan=1, dessert=1, salt=2)
+
+        delete_recipes(self.user, [result["id"] for result in results])
+        self.assertCounts(vegan=0, dessert=0, salt=0)
+
+    def test_reconcile_command(self):
+        """Test that drifted counters are recounted"""
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(self.vegan)
+        Tag.objects.update(recipe_count=7)
+
+        out = StringIO()
+        call_command("reconcile_recipe_counts", stdout=out)
+
+        self.assertIn("2 tags counts fixed", out.getvalue())
+        self.assertIn("0 ingredients counts fixed", out.getvalue())
+        self.assertCounts(vegan=1, dessert=0)
+
+    def test_reconcile_dry_run(self):
+        """Test that a dry run only reports drift"""
+        Tag.objects.update(recipe_count=7)
+
+        call_command("reconcile_recipe_counts", "--dry-run", stdout=StringIO())
+
+        self.assertCounts(vegan=7)
+
+
+class RecipeCountApiTests(TestCase):
+    """Test ordering and filtering tags and ingredients by usage"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.unused = Tag.objects.create(user=self.user, name="Unused")
+        self.popular = Tag.objects.create(user=self.user, name="Popular")
+        self.rare = Tag.objects.create(user=self.user, name="Rare")
+        for i in range(3):
+            sample_recipe(self.user, title=f"r{i}").tags.add(self.popular)
+        sample_recipe(self.user).tags.add(self.rare)
+
+    def test_order_by_recipe_count(self):
+        """Test listing tags by how many recipes use them"""
+        res = self.client.get(TAGS_URL, {"ordering": "-recipe_count"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(tag["name"], tag["recipe_count"]) for tag in res.data["results"]],
+            [("Popular", 3), ("Rare", 1), ("Unused", 0)],
+        )
+
+    def test_order_by_recipe_count_paginated(self):
+        """Test that the cursor follows the count ordering across pages"""
+        res = self.client.get(TAGS_URL, {"ordering": "-recipe_count", "page_size": 2})
+        following = self.client.get(res.data["next"])
+
+        names = [tag["name"] for tag in res.data["results"]]
+        names += [tag["name"] for tag in following.data["results"]]
+        self.assertEqual(names, ["Popular", "Rare", "Unused"])
+
+    def test_invalid_ordering(self):
+        """Test that unsupported orderings are rejected"""
+        res = self.client.get(TAGS_URL, {"ordering": "name"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_assigned_only(self):
+        """Test filtering tags assigned to at least one recipe"""
+        res = self.client.get(TAGS_URL, {"assigned_only": "1"})
+
+        names = {tag["name"] for tag in res.data["results"]}
+        self.assertEqual(names, {"Popular", "Rare"})
+
+    def test_assigned_only_ingredients(self):
+        """Test filtering ingredients assigned to at least one recipe"""
+        salt = Ingredient.objects.create(user=self.user, name="Salt")
+        Ingredient.objects.create(user=self.user, name="Pepper")
+        sample_recipe(self.user).ingredients.add(salt)
+
+        res = self.client.get(INGREDIENTS_URL, {"assigned_only": "1"})
+
+        self.assertEqual([item["name"] for item in res.data["results"]], ["Salt"])
+
+    def test_assigned_only_invalid(self):
+        """Test that invalid assigned_only values are rejected"""
+        res = self.client.get(TAGS_URL, {"assigned_only": "yes"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
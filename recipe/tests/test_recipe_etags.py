@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe.models import Recipe, Tag
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def detail_url(recipe_id):
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def sample_recipe(user, **params):
+    default = {"title": "recipe1", "time_minutes": 5, "price": 20.00}
+    default.update(params)
+
+    return Recipe.objects.create(user=user, **default)
+
+
+class RecipeETagTests(TestCase):
+    """Test conditional GET support on recipe endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(self.user)
+
+    def test_detail_not_modified(self):
+        """Test that a matching If-None-Match returns 304"""
+        etag = self.client.get(detail_url(self.recipe.id))["ETag"]
+
+        cache.clear()
+        with self.assertNumQueries(1):
+            res = self.client.get(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+
+    def test_detail_not_modified_from_cache(self):
+        """Test that cached responses answer conditional requests"""
+        etag = self.client.get(detail_url(self.recipe.id))["ETag"]
+
+        with self.assertNumQueries(0):
+            res = self.client.get(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_etag_changes_with_tags(self):
+        """Test that changing a recipe's tags changes its ETag"""
+        etag = self.client.get(detail_url(self.recipe.id))["ETag"]
+        tag = Tag.objects.create(user=self.user, name="vegan")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.tags.add(tag)
+
+        res = self.client.get(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+        etag = res["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.delete()
+        res = self.client.get(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["tags"], [])
+
+    def test_list_etag_changes_on_delete(self):
+        """Test that deleting a listed recipe changes the list ETag"""
+        sample_recipe(self.user, title="recipe2")
+        etag = self.client.get(RECIPES_URL)["ETag"]
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.delete()
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_missing_recipe_has_no_etag(self):
+        """Test that a missing recipe is still a 404"""
+        res = self.client.get(detail_url(0), HTTP_IF_NONE_MATCH="*")
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe.models import Ingredient, Recipe, Tag
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def detail_url(recipe_id):
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+class RecipeFieldsetTests(TestCase):
+    """Test the fields and expand parameters of the recipe endpoints"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name="vegan")
+        self.ingredient = Ingredient.objects.create(user=self.user, name="rice")
+        self.recipe = Recipe.objects.create(
+            user=self.user, title="curry", time_minutes=30, price="7.5", link="x"
+        )
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(self.ingredient)
+
+    def list_recipes(self, **params):
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res.data["results"]
+
+    def test_sparse_list(self):
+        """Test that only the requested fields and the id are listed"""
+        full = self.list_recipes()[0]
+
+        results = self.list_recipes(fields="title,price,thumbnail")
+
+        self.assertEqual(
+            results,
+            [{key: full[key] for key in ("id", "title", "price", "thumbnail")}],
+        )
+
+    def test_sparse_list_reads_requested_columns(self):
+        """Test that payloads without relations read neither card nor others"""
+        with CaptureQueriesContext(connection) as queries:
+            self.list_recipes(fields="title")
+
+        page_query = queries.captured_queries[-1]["sql"]
+        self.assertIn('"title"', page_query)
+        self.assertNotIn('"card"', page_query)
+        self.assertNotIn('"price"', page_query)
+
+    def test_expand_list(self):
+        """Test that expanded relations are listed with their names"""
+        with self.assertNumQueries(2):
+            results = self.list_recipes(expand="tags")
+
+        self.assertEqual(results[0]["tags"], [{"id": self.tag.id, "name": "vegan"}])
+        self.assertEqual(results[0]["ingredients"], [self.ingredient.id])
+
+    def test_expand_adds_field(self):
+        """Test that expanding a relation adds it to a sparse fieldset"""
+        results = self.list_recipes(fields="title", expand="ingredients")
+
+        self.assertEqual(
+            results,
+            [
+                {
+                    "id": self.recipe.id,
+                    "title": "curry",
+                    "ingredients": [{"id": self.ingredient.id, "name": "rice"}],
+                }
+            ],
+        )
+
+    def test_sparse_detail(self):
+        """Test that details are cut down to the requested fields"""
+        res = self.client.get(detail_url(self.recipe.id), {"fields": "tags,image"})
+
+        self.assertEqual(
+            res.data,
+            {
+                "id": self.recipe.id,
+                "tags": [{"id": self.tag.id, "name": "vegan"}],
+                "image": None,
+            },
+        )
+
+    def test_detail_etag_per_fieldset(self):
+        """Test that each fieldset of a recipe has its own ETag"""
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)["ETag"]
+
+        res = self.client.get(url, {"fields": "title"}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"id": self.recipe.id, "title": "curry"})
+
+    def test_invalid_fields_rejected(self):
+        """Test that unknown fields and relations are rejected"""
+        res = self.client.get(RECIPES_URL, {"fields": "title,image"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["fields"], ['"image" is not a valid choice.'])
+
+        res = self.client.get(detail_url(self.recipe.id), {"expand": "user"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("expand", res.data)
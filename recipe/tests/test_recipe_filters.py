@@ -0,0 +1,143 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe.filters import filter_recipes
+from recipe.models import Ingredient, Recipe, Tag
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def sample_recipe(user, **params):
+    default = {"title": "recipe1", "time_minutes": 5, "price": 20.00}
+    default.update(params)
+
+    return Recipe.objects.create(user=user, **default)
+
+
+class RecipeFilterApiTests(TestCase):
+    """Test filtering the recipe list"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.tag1 = Tag.objects.create(user=self.user, name="vegan")
+        self.tag2 = Tag.objects.create(user=self.user, name="quick")
+        self.ingredient = Ingredient.objects.create(user=self.user, name="salt")
+        self.recipe1 = sample_recipe(self.user, time_minutes=5, price=5)
+        self.recipe1.tags.add(self.tag1, self.tag2)
+        self.recipe2 = sample_recipe(self.user, time_minutes=30, price=15)
+        self.recipe2.tags.add(self.tag1)
+        self.recipe2.ingredients.add(self.ingredient)
+        self.recipe3 = sample_recipe(self.user, time_minutes=60, price=25)
+
+    def get_ids(self, params):
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item["id"] for item in res.data["results"]]
+
+    def test_filter_by_any_tags(self):
+        """Test filtering recipes having any of the given tags"""
+        ids = self.get_ids({"tags": f"{self.tag1.id},{self.tag2.id}"})
+
+        self.assertEqual(ids, [self.recipe1.id, self.recipe2.id])
+
+    def test_filter_by_all_tags(self):
+        """Test filtering recipes having all of the given tags"""
+        ids = self.get_ids({"tags": f"{self.tag1.id},{self.tag2.id}", "match": "all"})
+
+        self.assertEqual(ids, [self.recipe1.id])
+
+    def test_filter_by_tags_and_ingredients(self):
+        """Test combining tag and ingredient filters"""
+        ids = self.get_ids(
+            {"tags": str(self.tag1.id), "ingredients": str(self.ingredient.id)}
+        )
+
+        self.assertEqual(ids, [self.recipe2.id])
+
+    def test_filter_by_ranges(self):
+        """Test filtering recipes by time and price ranges"""
+        ids = self.get_ids({"time_minutes_min": 10, "price_max": "20.00"})
+
+        self.assertEqual(ids, [self.recipe2.id])
+
+    def test_invalid_filters(self):
+        """Test that malformed filter values are rejected"""
+        for params in ({"tags": "a,b"}, {"price_min": "cheap"}, {"match": "some"}):
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_out_of_range_filters(self):
+        """Test that non-finite and oversized numbers are rejected"""
+        huge = "9" * 23
+        for params in (
+            {"price_min": "NaN"},
+            {"price_max": "Infinity"},
+            {"price_max": "-Infinity"},
+            {"price_min": "123456789"},
+            {"time_minutes_min": huge},
+            {"tags": huge},
+        ):
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), res.data)
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN plans checked on Postgres")
+class RecipeFilterIndexTests(TestCase):
+    """Test that recipe filters are served by indexes"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+    def assertIndexScan(self, queryset):
+        plan = queryset.explain()
+
+        self.assertIn("Index", plan)
+        self.assertNotIn("Seq Scan", plan)
+
+    def test_recipe_list_uses_index(self):
+        """Test that listing a user's recipes scans an index"""
+        queryset = Recipe.objects.filter(user=self.user).order_by("id")
+
+        self.assertIndexScan(queryset)
+
+    def test_tag_filter_uses_index(self):
+        """Test that filtering by tags scans an index"""
+        queryset = filter_recipes(Recipe.objects.all(), {"tags": "1,2"})
+
+        self.assertIndexScan(queryset)
+
+    def test_ingredient_filter_uses_index(self):
+        """Test that filtering by ingredients scans an index"""
+        queryset = filter_recipes(
+            Recipe.objects.all(), {"ingredients": "1", "match": "all"}
+        )
+
+        self.assertIndexScan(queryset)
+
+    def test_name_lookup_uses_index(self):
+        """Test that looking up a tag by name scans an index"""
+        queryset = Tag.objects.filter(user=self.user, name="vegan")
+
+        self.assertIndexScan(queryset)
@@ -0,0 +1,154 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe.blobs import HashingUploadHandler
+from recipe.models import Recipe
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def image_upload_url(recipe_id):
+    return reverse("recipe:recipe-upload-image", args=[recipe_id])
+
+
+def detail_url(recipe_id):
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def sample_image(size=(1200, 800), format="JPEG", name="sample.jpg"):
+    file = BytesIO()
+    Image.new("RGB", size, (200, 80, 40)).save(file, format=format)
+    file.name = name
+    file.seek(0)
+
+    return file
+
+
+class RecipeImageTests(TestCase):
+    """Test uploading recipe images and rendering their variants"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root, RECIPE_IMAGE_WORKERS=0)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title="recipe1", time_minutes=5, price=20
+        )
+
+    def upload(self, image=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                image_upload_url(self.recipe.id),
+                {"image": image or sample_image()},
+                format="multipart",
+            )
+        self.recipe.refresh_from_db()
+
+        return res
+
+    def stored(self, name):
+        return os.path.join(self.media_root, name)
+
+    def test_upload_image(self):
+        """Test that an uploaded image is stored on the recipe"""
+        res = self.upload()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("image", res.data)
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+
+    def test_upload_spooled_to_disk(self):
+        """Test that uploads are streamed to a temporary file"""
+        with patch(
+            "recipe.blobs.HashingUploadHandler", wraps=HashingUploadHandler
+        ) as handler:
+            self.upload()
+
+        handler.assert_called_once()
+
+    def test_upload_invalid_image(self):
+        """Test that uploading something other than an image fails"""
+        file = BytesIO(b"not an image")
+        file.name = "sample.jpg"
+
+        res = self.upload(file)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.recipe.image)
+
+    def test_variants_rendered(self):
+        """Test that resized JPEG and WebP variants are rendered"""
+        self.upload()
+
+        variants = self.recipe.image_variants
+        self.assertEqual(set(variants), {"thumbnail", "medium"})
+        for variant, size in (("thumbnail", 320), ("medium", 1024)):
+            for format in ("jpeg", "webp"):
+                with Image.open(self.stored(variants[variant][format])) as image:
+                    self.assertEqual(image.format, format.upper())
+                    self.assertEqual(max(image.size), size)
+
+    def test_small_image_not_upscaled(self):
+        """Test that variants are never larger than the original"""
+        self.upload(sample_image(size=(200, 100)))
+
+        thumbnail = self.recipe.image_variants["thumbnail"]["webp"]
+        with Image.open(self.stored(thumbnail)) as image:
+            self.assertEqual(image.size, (200, 100))
+
+    def test_list_includes_thumbnail(self):
+        """Test that listed recipes link to their thumbnails"""
+        self.upload()
+
+        res = self.client.get(RECIPES_URL)
+
+        thumbnail = res.data["results"][0]["thumbnail"]
+        names = self.recipe.image_variants["thumbnail"]
+        self.assertEqual(thumbnail["webp"], f"/media/{names['webp']}")
+        self.assertEqual(thumbnail["jpeg"], f"/media/{names['jpeg']}")
+
+    def test_list_without_image(self):
+        """Test that recipes without rendered variants have no thumbnail"""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertIsNone(res.data["results"][0]["thumbnail"])
+
+    def test_detail_includes_variants(self):
+        """Test that a recipe links to its original image and variants"""
+        self.upload()
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        image = res.data["image"]
+        self.assertEqual(image["original"], f"/media/{self.recipe.image.name}")
+        self.assertEqual(set(image), {"original", "thumbnail", "medium"})
+
+    def test_replaced_image_released(self):
+        """Test that replacing an image releases the old one"""
+        self.upload()
+        old = self.recipe.image_blob
+
+        self.upload(sample_image(size=(640, 480)))
+
+        old.refresh_from_db()
+        self.assertEqual(old.ref_count, 0)
+        self.assertNotEqual(self.recipe.image_blob, old)
+        self.assertEqual(self.recipe.image_blob.ref_count, 1)
@@ -0,0 +1,125 @@
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from recipe.fieldsets import Fieldset
+from recipe.models import Ingredient, Recipe, Tag
+from recipe.serializers import RecipeDetailSerializer, RecipeSerializer
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def detail_url(recipe_id):
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def sample_recipe(user, index=0):
+    recipe = Recipe.objects.create(
+        user=user, title=f"recipe{index}", time_minutes=5, price=20.00
+    )
+    recipe.tags.add(
+        Tag.objects.create(user=user, name=f"tag{index}a"),
+        Tag.objects.create(user=user, name=f"tag{index}b"),
+    )
+    recipe.ingredients.add(
+        Ingredient.objects.create(user=user, name=f"ingredient{index}a"),
+        Ingredient.objects.create(user=user, name=f"ingredient{index}b"),
+    )
+
+    return recipe
+
+
+class RecipeQueryCountTests(TestCase):
+    """Test that recipe endpoints run a constant number of queries"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_query_count_is_constant(self):
+        """Test listing recipes does not query once per recipe"""
+        sample_recipe(self.user)
+        # ETag stamp and recipes, each with its card
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(1, 10):
+                sample_recipe(self.user, index)
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 10)
+        self.assertEqual(len(res.data["results"][0]["tags"]), 2)
+        self.assertEqual(len(res.data["results"][0]["ingredients"]), 2)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPES_URL, {"page_size": 4})
+        self.assertEqual(len(res.data["results"]), 4)
+
+    def test_retrieve_query_count(self):
+        """Test retrieving a recipe reads nested tags and ingredients off its card"""
+        recipe = sample_recipe(self.user)
+
+        # ETag stamp and the recipe with its card
+        with self.assertNumQueries(2):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["tags"]), 2)
+        self.assertEqual(len(res.data["ingredients"]), 2)
+
+
+class FastSerializerTests(TestCase):
+    """Test that payloads built from cards match the serializers"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        for index in range(3):
+            sample_recipe(self.user, index)
+        recipe = Recipe.objects.create(
+            user=self.user, title="ünïcode", time_minutes=1, price="3.5", link="x"
+        )
+        # Related objects added out of id order
+        recipe.tags.add(*Tag.objects.order_by("-id")[:3])
+        self.queryset = Recipe.objects.order_by("id")
+
+    def test_list_payload_identical(self):
+        """Test list payloads render to the same bytes as RecipeSerializer"""
+        recipes = self.queryset.prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.order_by("id")),
+            Prefetch("ingredients", queryset=Ingredient.objects.order_by("id")),
+        )
+        expected = RecipeSerializer(recipes, many=True).data
+
+        fieldset = Fieldset.from_params({})
+        data = fieldset.serialize(fieldset.values(self.queryset))
+
+        self.assertEqual(JSONRenderer().render(data), JSONRenderer().render(expected))
+
+    def test_detail_payload_identical(self):
+        """Test detail payloads render to the same bytes as the serializer"""
+        fieldset = Fieldset.from_params({}, detail=True)
+        for recipe in self.queryset.prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.order_by("id")),
+            Prefetch("ingredients", queryset=Ingredient.objects.order_by("id")),
+        ):
+            expected = RecipeDetailSerializer(recipe).data
+
+            (data,) = fieldset.serialize(
+                fieldset.values(self.queryset.filter(id=recipe.id))
+            )
+
+            self.assertEqual(
+                JSONRenderer().render(data), JSONRenderer().render(expected)
+            )
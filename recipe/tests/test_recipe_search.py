@@ -0,0 +1,75 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe.models import Ingredient, Recipe, Tag
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def sample_recipe(user, **params):
+    default = {"title": "recipe1", "time_minutes": 5, "price": 20.00}
+    default.update(params)
+
+    return Recipe.objects.create(user=user, **default)
+
+
+class RecipeSearchApiTests(TestCase):
+    """Test searching recipes by title, tag and ingredient names"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.curry = sample_recipe(self.user, title="Chickpea curry")
+        self.salad = sample_recipe(self.user, title="Green salad")
+        self.salad.ingredients.add(
+            Ingredient.objects.create(user=self.user, name="chickpeas")
+        )
+        self.soup = sample_recipe(self.user, title="Tomato soup")
+        self.soup.tags.add(Tag.objects.create(user=self.user, name="winter"))
+
+    def search(self, text):
+        res = self.client.get(RECIPES_URL, {"search": text})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item["id"] for item in res.data["results"]]
+
+    def test_search_title_and_ingredients(self):
+        """Test that titles and ingredient names are searched"""
+        ids = self.search("chickpea")
+
+        self.assertCountEqual(ids, [self.curry.id, self.salad.id])
+
+    def test_search_tags(self):
+        """Test that tag names are searched"""
+        self.assertEqual(self.search("winter"), [self.soup.id])
+
+    def test_search_follows_tag_changes(self):
+        """Test that adding and renaming tags updates search results"""
+        tag = Tag.objects.create(user=self.user, name="spicy")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.curry.tags.add(tag)
+        self.assertEqual(self.search("spicy"), [self.curry.id])
+
+        tag.name = "mild"
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.save()
+        self.assertEqual(self.search("spicy"), [])
+        self.assertEqual(self.search("mild"), [self.curry.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.recipe_set.clear()
+        self.assertEqual(self.search("mild"), [])
+
+    @skipUnless(connection.vendor == "postgresql", "Ranking requires Postgres")
+    def test_search_ranked(self):
+        """Test that title matches rank above ingredient matches"""
+        self.assertEqual(self.search("chickpea"), [self.curry.id, self.salad.id])
@@ -4,7 +4,7 @@ from django.urls import reverse
 from django.contrib.auth import get_user_model
 
 from recipe.models import Tag
-from recipe.serializers import TagSerializer
+from recipe.serializers import TagUsageSerializer
 
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -42,10 +42,10 @@ class PrivateTagsApiTest(TestCase):
         res = self.client.get(TAGS_URL)
 
         tags = Tag.objects.all()
-        serializer = TagSerializer(tags, many=True)
+        serializer = TagUsageSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_tags_limited_to_user(self):
         """Test that retrived tags are limited to a user"""
@@ -56,7 +56,7 @@ class PrivateTagsApiTest(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data["results"]), 1)
 
     def test_create_tag_successful(self):
         """Test that creating a new tag is successful"""
@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe.importer import RecipeImporter
+from recipe.models import Ingredient, Tag
+
+TAGS_URL = reverse("recipe:tag-list")
+INGREDIENTS_URL = reverse("recipe:ingredient-list")
+
+
+class UniqueNameTests(TestCase):
+    """Test case-insensitive unique names of tags and ingredients"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "example@email.com", "testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_duplicate_rejected(self):
+        """Test that the database rejects names differing only in case"""
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        with self.assertRaises(IntegrityError):
+            Tag.objects.create(user=self.user, name="vegan")
+
+    def test_same_name_for_other_users(self):
+        """Test that names are only unique per user"""
+        other = get_user_model().objects.create_user("other@email.com", "testpass")
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        Tag.objects.create(user=other, name="Vegan")
+
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_get_or_create_by_name(self):
+        """Test that an existing object is returned regardless of case"""
+        tag, created = Tag.objects.get_or_create_by_name(self.user, "Vegan")
+        existing, created_again = Tag.objects.get_or_create_by_name(self.user, "VEGAN")
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(existing.id, tag.id)
+        self.assertEqual(existing.name, "Vegan")
+
+    def test_create_idempotent(self):
+        """Test that creating a tag twice returns the existing one"""
+        first = self.client.post(TAGS_URL, {"name": "Vegan"})
+        second = self.client.post(TAGS_URL, {"name": "vegan"})
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data["id"], first.data["id"])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_create_ingredient_idempotent(self):
+        """Test that creating an ingredient twice returns the existing one"""
+        first = self.client.post(INGREDIENTS_URL, {"name": "Salt"})
+        second = self.client.post(INGREDIENTS_URL, {"name": "Salt"})
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(Ingredient.objects.count(), 1)
+
+    def test_import_matches_names_in_any_case(self):
+        """Test that imported names resolve to existing objects by case"""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        records = [
+            {"title": "r1", "time_minutes": 1, "price": "1.00", "tags": ["vegan"]},
+            {"title": "r2", "time_minutes": 1, "price": "1.00", "tags": ["VEGAN"]},
+        ]
+
+        RecipeImporter(self.user).run(records)
+
+        self.assertEqual(list(Tag.objects.values_list("id", flat=True)), [tag.id])
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 2)
+
+
+class MergeDuplicatesMigrationTests(TransactionTestCase):
+    """Test the migration folding duplicate names together"""
+
+    before = [("recipe", "0007_tag_ingredient_recipe_count")]
+    after = [("recipe", "0008_tag_ingredient_unique_name")]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicates_merged(self):
+        """Test that duplicates are merged and their recipes re-pointed"""
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        User = apps.get_model("core", "User")
+        Tag = apps.get_model("recipe", "Tag")
+        Recipe = apps.get_model("recipe", "Recipe")
+
+        user = User.objects.create(email="example@email.com")
+        keep = Tag.objects.create(user=user, name="Vegan")
+        lower = Tag.objects.create(user=user, name="vegan")
+        upper = Tag.objects.create(user=user, name="VEGAN")
+        other = Tag.objects.create(user=user, name="Dessert")
+        both = Recipe.objects.create(user=user, title="r1", time_minutes=1, price=1)
+        both.tags.add(keep, lower, other)
+        only = Recipe.objects.create(user=user, title="r2", time_minutes=1, price=1)
+        only.tags.add(lower, upper)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+
+        self.assertEqual(
+            set(Tag.objects.values_list("id", flat=True)), {keep.id, other.id}
+        )
+        through = Recipe.tags.through.objects
+        self.assertEqual(
+            set(through.filter(recipe_id=both.id).values_list("tag_id", flat=True)),
+            {keep.id, other.id},
+        )
+        self.assertEqual(
+            list(through.filter(recipe_id=only.id).values_list("tag_id", flat=True)),
+            [keep.id],
+        )
+        self.assertEqual(Tag.objects.get(id=keep.id).recipe_count, 2)
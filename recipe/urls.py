@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from recipe.async_views import async_route
 from recipe.views import IngredientViewSet, ReciepViewSet, TagViewSet
 
 router = DefaultRouter()
@@ -8,7 +9,28 @@ router.register("tags", TagViewSet)
 router.register("ingredients", IngredientViewSet)
 router.register("recipes", ReciepViewSet)
 
+
+def _router_view(name):
+    return next(url.callback for url in router.urls if url.name == name)
+
+
+# List and detail GETs take the async path, everything else reaches the
+# router's views through the fallback
+async_urls = [
+    path(
+        f"{prefix}/",
+        async_route(viewset, "list", _router_view(f"{basename}-list")),
+    )
+    for prefix, viewset, basename in router.registry
+] + [
+    path(
+        f"{prefix}/<int:pk>/",
+        async_route(viewset, "retrieve", _router_view(f"{basename}-detail")),
+    )
+    for prefix, viewset, basename in router.registry
+]
+
 app_name = "recipe"
-urlpatterns = [
+urlpatterns = async_urls + [
     path("", include(router.urls)),
 ]
@@ -1,52 +1,367 @@
+import io
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import Http404, StreamingHttpResponse
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
-from rest_framework.mixins import ListModelMixin, CreateModelMixin
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.mixins import (
+    CreateModelMixin,
+    ListModelMixin,
+    RetrieveModelMixin,
+)
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
 
+from core.authentication import CachedTokenAuthentication
+from core.replicas import ReplicaReadMixin
+from recipe import blobs, bulk
+from recipe.cache import acached_response, cached_response, make_etag
+from recipe.export import iter_ndjson
+from recipe.fieldsets import Fieldset
+from recipe.filters import ID_MAX, ID_MIN, filter_assigned, filter_recipes
+from recipe.importer import (
+    FORMATS,
+    READ_ERRORS,
+    RecipeImporter,
+    guess_format,
+    parse_records,
+)
+from recipe.pagination import IdCursorPagination
+from recipe.search import search_recipes
 from recipe.serializers import (
-    IngredientSerializer,
+    IngredientUsageSerializer,
     RecipeDetailSerializer,
+    RecipeImageSerializer,
     RecipeSerializer,
-    TagSerializer,
+    TagUsageSerializer,
 )
+from recipe.signals import touching_once
 from recipe.models import Ingredient, Recipe, Tag
 
 
-class BaseRecipeAttrViewSet(GenericViewSet, ListModelMixin, CreateModelMixin):
-    authentication_classes = (TokenAuthentication,)
+def get_lookup_id(view):
+    """Return the object id of a detail URL, 404 if it can't be an id"""
+    lookup = view.kwargs[view.lookup_url_kwarg or view.lookup_field]
+    try:
+        pk = int(lookup)
+    except ValueError:
+        raise Http404
+    if not ID_MIN <= pk <= ID_MAX:
+        raise Http404
+
+    return pk
+
+
+class BaseRecipeAttrViewSet(
+    ReplicaReadMixin,
+    GenericViewSet,
+    ListModelMixin,
+    RetrieveModelMixin,
+    CreateModelMixin,
+):
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = IdCursorPagination
+    ordering_fields = ("recipe_count",)
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action == "list":
+            queryset = filter_assigned(queryset, self.request.query_params)
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        return queryset
+
+    def get_values(self):
+        return self.get_queryset().values(*self.serializer_class.Meta.fields)
+
+    async def alist(self):
+        """Async `list`, the rows are already in the serializer's shape"""
+        page = await self.paginator.apaginate_queryset(
+            self.get_values(), self.request, view=self
+        )
+
+        return self.get_paginated_response(page)
+
+    def get_object(self):
+        get_lookup_id(self)
+
+        return super().get_object()
+
+    async def aretrieve(self):
+        """Async `retrieve`"""
+        row = await self.get_values().filter(pk=get_lookup_id(self)).afirst()
+        if row is None:
+            raise Http404
+
+        return Response(row)
+
+    def create(self, request, *args, **kwargs):
+        """Create an object, or return the user's one of the same name"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        instance, created = self.queryset.model.objects.get_or_create_by_name(
+            request.user, serializer.validated_data["name"]
+        )
+
+        return Response(
+            self.get_serializer(instance).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
-    serializer_class = TagSerializer
+    serializer_class = TagUsageSerializer
     queryset = Tag.objects.all()
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
-    serializer_class = IngredientSerializer
+    serializer_class = IngredientUsageSerializer
     queryset = Ingredient.objects.all()
 
 
-class ReciepViewSet(ModelViewSet):
-    authentication_classes = (TokenAuthentication,)
+class ReciepViewSet(ReplicaReadMixin, ModelViewSet):
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = IdCursorPagination
     serializer_class = RecipeSerializer
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.defer("search_vector", "card")
+    bulk_max_items = 1000
+    bulk_handlers = {
+        "POST": bulk.create_recipes,
+        "PATCH": bulk.update_recipes,
+        "DELETE": bulk.delete_recipes,
+    }
+
+    def get_filtered_queryset(self):
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action in ("list", "export"):
+            queryset = filter_recipes(queryset, self.request.query_params)
+            search = self.request.query_params.get("search")
+            if search:
+                queryset = search_recipes(queryset, search)
+
+        return queryset
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        # Lists and details are served from `.values()`, see `list_values`
+        return self.get_filtered_queryset()
+
+    def get_list_stamp(self):
+        # Row count catches deletes, the newest stamp any create or update
+        return self.get_filtered_queryset().aggregate(
+            count=Count("id"), updated_at=Max("updated_at")
+        )
+
+    def get_list_etag(self, stamp=None):
+        stamp = stamp or self.get_list_stamp()
+
+        return make_etag(
+            "list",
+            self.request.get_full_path(),
+            self.request.accepted_renderer.format,
+            stamp["count"],
+            stamp["updated_at"],
+        )
+
+    def get_object(self):
+        get_lookup_id(self)
+
+        return super().get_object()
+
+    def get_detail_queryset(self):
+        return self.get_filtered_queryset().filter(pk=get_lookup_id(self))
+
+    def get_detail_etag(self, updated_at=None):
+        if updated_at is None:
+            updated_at = (
+                self.get_detail_queryset().values_list("updated_at", flat=True).first()
+            )
+        if updated_at is None:
+            return None
+
+        return make_etag(
+            "detail",
+            get_lookup_id(self),
+            self.request.accepted_renderer.format,
+            self.get_fieldset().key,
+            updated_at,
+        )
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, self.list_values, self.get_list_etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(request, self.retrieve_values, self.get_detail_etag)
+
+    def get_fieldset(self):
+        return Fieldset.from_params(
+            self.request.query_params, detail=self.action == "retrieve"
+        )
+
+    def list_values(self):
+        """List recipes in the requested fieldset, see `recipe.fieldsets`"""
+        fieldset = self.get_fieldset()
+        page = self.paginate_queryset(fieldset.values(self.get_filtered_queryset()))
+
+        return self.get_paginated_response(fieldset.serialize(page))
+
+    def retrieve_values(self):
+        """Retrieve a recipe in the requested fieldset, see `recipe.fieldsets`"""
+        fieldset = self.get_fieldset()
+        row = fieldset.values(self.get_detail_queryset()).first()
+        payloads = fieldset.serialize([row] if row else [])
+        if not payloads:
+            raise Http404
+
+        return Response(payloads[0])
+
+    async def alist(self):
+        """Async `list`, sharing its ETags and cached responses"""
+
+        async def get_etag():
+            stamp = await self.get_filtered_queryset().aaggregate(
+                count=Count("id"), updated_at=Max("updated_at")
+            )
+            return self.get_list_etag(stamp)
+
+        return await acached_response(self.request, self.alist_values, get_etag)
+
+    async def aretrieve(self):
+        """Async `retrieve`, sharing its ETags and cached responses"""
+
+        async def get_etag():
+            queryset = self.get_detail_queryset().values_list("updated_at", flat=True)
+            updated_at = await queryset.afirst()
+            return updated_at and self.get_detail_etag(updated_at)
+
+        return await acached_response(self.request, self.aretrieve_values, get_etag)
+
+    async def alist_values(self):
+        fieldset = self.get_fieldset()
+        page = await self.paginator.apaginate_queryset(
+            fieldset.values(self.get_filtered_queryset()), self.request, view=self
+        )
+
+        return self.get_paginated_response(await fieldset.aserialize(page))
+
+    async def aretrieve_values(self):
+        fieldset = self.get_fieldset()
+        row = await fieldset.values(self.get_detail_queryset()).afirst()
+        payloads = await fieldset.aserialize([row] if row else [])
+        if not payloads:
+            raise Http404
+
+        return Response(payloads[0])
 
     def get_serializer_class(self):
         if self.action == "retrieve":
             return RecipeDetailSerializer
+        if self.action == "upload_image":
+            return RecipeImageSerializer
 
         return self.serializer_class
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # The recipe and its relations commit together, touched once
+        with transaction.atomic(), touching_once():
+            serializer.save(user=self.request.user)
+
+    def perform_update(self, serializer):
+        with transaction.atomic(), touching_once():
+            serializer.save()
+
+    @action(detail=False, methods=["post", "patch", "delete"])
+    def bulk(self, request):
+        """Create, update or delete a list of recipes in a single transaction"""
+        items = request.data
+        if not isinstance(items, list):
+            msg = "Expected a list of items."
+            return Response(
+                {"non_field_errors": [msg]}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.bulk_max_items:
+            msg = f"Ensure this list has no more than {self.bulk_max_items} items."
+            return Response(
+                {"non_field_errors": [msg]}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = self.bulk_handlers[request.method](request.user, items)
+
+        return Response({"results": results})
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """Stream all of the user's recipes as newline-delimited JSON"""
+        queryset = self.get_queryset().order_by("id")
+        response = StreamingHttpResponse(
+            iter_ndjson(queryset), content_type="application/x-ndjson"
+        )
+        response["Content-Disposition"] = 'attachment; filename="recipes.ndjson"'
+
+        return response
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=(MultiPartParser,),
+    )
+    def import_file(self, request):
+        """Import recipes from an uploaded NDJSON or CSV file"""
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"file": ["No file was submitted."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        format = request.data.get("format") or guess_format(upload.name)
+        if format not in FORMATS:
+            return Response(
+                {"format": [f'"{format}" is not a valid choice.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        stream = io.TextIOWrapper(upload, encoding="utf-8", newline="")
+        try:
+            # Files are read as they are imported, one failing to read
+            # halfway must not leave the batches before it imported
+            with transaction.atomic():
+                importer = RecipeImporter(request.user).run(
+                    parse_records(stream, format)
+                )
+        except READ_ERRORS as exc:
+            return Response(
+                {"file": [f"The file can't be read: {exc}"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {
+                "created": importer.created,
+                "failed": importer.failed,
+                "errors": importer.errors,
+            }
+        )
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="upload-image",
+        parser_classes=(MultiPartParser,),
+    )
+    def upload_image(self, request, pk=None):
+        """Upload an image to a recipe, its variants are rendered in the background"""
+        # Spool the upload to a temporary file whatever its size, hashing it
+        # on the way, storage then moves that file into place
+        request._request.upload_handlers = [
+            blobs.HashingUploadHandler(request._request)
+        ]
+        recipe = self.get_object()
+        serializer = self.get_serializer(recipe, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        blobs.attach_image(recipe, serializer.validated_data["image"])
+
+        return Response(self.get_serializer(recipe).data)
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.instrumentation.RequestInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -85,9 +86,54 @@ DATABASES = {
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASSWORD"),
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# The ASGI server runs each request's queries on a thread of its own, so
+# persistent connections would never be reused there. A process-wide pool
+# of DB_POOL_MAX_SIZE connections replaces them unless set to 0; keep
+# workers * DB_POOL_MAX_SIZE below the server's max_connections.
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 10))
+
+if DB_POOL_MAX_SIZE:
+    DATABASES["default"].update(
+        {
+            "ENGINE": "core.backends.postgresql",
+            "CONN_MAX_AGE": 0,
+            "OPTIONS": {
+                "pool": {
+                    "max_size": DB_POOL_MAX_SIZE,
+                    "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 1)),
+                    "overflow": os.environ.get("DB_POOL_OVERFLOW", "1") == "1",
+                    "max_lifetime": int(os.environ.get("DB_POOL_MAX_LIFETIME", 3600)),
+                }
+            },
+        }
+    )
+
+# Read replicas of the default database, by host. Safe-method requests of
+# the recipe and user endpoints read from one less than REPLICA_MAX_LAG
+# seconds behind, see core.replicas. Users who wrote in the last
+# REPLICA_STICKY_SECONDS read from the default database, so keep it above
+# REPLICA_MAX_LAG + REPLICA_LAG_CHECK_INTERVAL.
+DB_REPLICA_HOSTS = os.environ.get("DB_REPLICA_HOSTS", "")
+
+DATABASE_REPLICAS = []
+for host in filter(None, DB_REPLICA_HOSTS.split(",")):
+    alias = f"replica{len(DATABASE_REPLICAS)}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["core.replicas.ReplicaRouter"]
+REPLICA_MAX_LAG = float(os.environ.get("REPLICA_MAX_LAG", 2))
+REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get("REPLICA_LAG_CHECK_INTERVAL", 1))
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 5))
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -107,6 +153,39 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# New passwords are hashed by the first hasher, the others only verify and
+# have their hashes upgraded on sign-in. See core.hashers for the pool.
+
+PASSWORD_HASHERS = {
+    "argon2": [
+        "core.hashers.PooledArgon2PasswordHasher",
+        "core.hashers.PooledPBKDF2PasswordHasher",
+    ],
+    "pbkdf2": [
+        "core.hashers.PooledPBKDF2PasswordHasher",
+        "core.hashers.PooledArgon2PasswordHasher",
+    ],
+}[os.environ.get("PASSWORD_HASHER", "argon2")]
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get("PASSWORD_ARGON2_TIME_COST", 2))
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.environ.get("PASSWORD_ARGON2_MEMORY_COST", 64 * 1024)
+)
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get("PASSWORD_ARGON2_PARALLELISM", 2))
+PASSWORD_HASHING_WORKERS = int(os.environ.get("PASSWORD_HASHING_WORKERS", 2))
+PASSWORD_HASHING_QUEUE = int(os.environ.get("PASSWORD_HASHING_QUEUE", 16))
+PASSWORD_HASHING_TIMEOUT = float(os.environ.get("PASSWORD_HASHING_TIMEOUT", 5))
+
+# Seconds API tokens are valid for, rotate them through accounts:token-refresh
+AUTH_TOKEN_TTL = int(os.environ.get("AUTH_TOKEN_TTL", 7 * 24 * 60 * 60))
+
+REST_FRAMEWORK = {
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": os.environ.get("LOGIN_IP_RATE", "30/min"),
+        "login_email": os.environ.get("LOGIN_EMAIL_RATE", "5/min"),
+    },
+}
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.0/topics/i18n/
@@ -127,7 +206,10 @@ STATIC_URL = "/static/"
 STATIC_ROOT = "/vol/web/static"
 
 MEDIA_URL = "/media/"
-MEDIA_URL = "vol/web/media"
+MEDIA_ROOT = "/vol/web/media"
+
+# Threads rendering recipe image variants, 0 renders them in the request
+RECIPE_IMAGE_WORKERS = int(os.environ.get("RECIPE_IMAGE_WORKERS", 2))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
@@ -136,3 +218,27 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # User Model
 AUTH_USER_MODEL = "core.User"
+
+# Threads deleting accounts in the background, 0 deletes them in the request
+ACCOUNT_DELETION_WORKERS = int(os.environ.get("ACCOUNT_DELETION_WORKERS", 1))
+
+# Request instrumentation. Sampled requests get a Server-Timing header and
+# log one line at INFO, set INSTRUMENTATION_LOG_LEVEL=INFO to keep them
+INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get("INSTRUMENTATION_SAMPLE_RATE", 0.01))
+INSTRUMENTATION_SLOW_QUERY_MS = float(
+    os.environ.get("INSTRUMENTATION_SLOW_QUERY_MS", 100)
+)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "core.instrumentation": {
+            "handlers": ["console"],
+            "level": os.environ.get("INSTRUMENTATION_LOG_LEVEL", "WARNING"),
+        },
+    },
+}
@@ -0,0 +1,19 @@
+"""Settings for running the tests against SQLite
+
+The second database stands in for a read replica. Tests reading from it
+enable replica routing by overriding `DATABASE_REPLICAS`.
+"""
+
+from recipe_app_api.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+    "replica": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+}
+DATABASE_REPLICAS = []
+
+# Keep request logs out of the test output, assertLogs() still sees them
+LOGGING = {
+    **LOGGING,  # noqa: F405
+    "loggers": {"core.instrumentation": {"handlers": [], "propagate": False}},
+}